@@ -0,0 +1,227 @@
+"""
+Benchmarks for the whole edit pipeline of evolvesaveeditor.py
+run from evolvesaveeditor dir as:
+    python benchmarks/benchmark_evolvesaveeditor.py --output benchmark_results.json
+
+Every stage (codec, json round trip, each adjuster and a full edit of a save file) is timed on saves from
+early game up to synthetic saves many times bigger than a real late game save.
+Results are printed as a table and written as json so runs can be compared over time.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+# pylint: disable=wrong-import-position
+from evolvesaveeditor import EvolveSaveEditor as Ese  # noqa: E402
+from evolvesaveeditor import LZ_STRING_BACKEND_FAST, LZ_STRING_BACKEND_LZSTRING  # noqa: E402
+from evolvesaveeditor import JSON_BACKEND_ORJSON, JSON_BACKEND_STDLIB  # noqa: E402
+from evolvesaveeditor import edit_one_save  # noqa: E402
+import evolvesaveeditor  # noqa: E402
+from evolvesavegenerator import generate_save  # noqa: E402
+import evolvesavegenerator  # noqa: E402
+
+test_data_dir = os.path.join(repo_dir, "tests", "files")
+
+# the fixtures, then generated saves the size of a late game save and many times bigger
+SAVE_SIZES = ("startgame", "endgame", "generated_x1", "generated_x10", "generated_x50")
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    # the adjusters log about every save that is missing things, which would swamp the timings
+    logging.disable(logging.WARNING)
+    results = run_benchmarks(args.sizes, args.repeat, args.lzstring)
+    print_results(results)
+    if args.output:
+        write_results(results, args.output)
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description="Benchmark the evolve save editor")
+    parser.add_argument("--sizes", nargs="+", choices=SAVE_SIZES, default=list(SAVE_SIZES),
+                        help="saves to run the benchmarks on (default: all of them)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of timed runs of each benchmark, the median is reported (default: %(default)s)")
+    parser.add_argument("--lzstring", action="store_true",
+                        help="also benchmark the lzstring package backend, which is very slow on big saves")
+    parser.add_argument("--output", help="json file to write the results to")
+    return parser.parse_args(args)
+
+
+def load_save(size):
+    """
+    :param str size: one of SAVE_SIZES
+    :return: save data for that size
+    :rtype: dict
+    """
+    if size.startswith("generated_x"):
+        factor = int(size.split("_x")[1])
+        buildings = {zone: count * factor for zone, count in evolvesavegenerator.DEFAULT_BUILDINGS.items()}
+        return generate_save(evolvesavegenerator.DEFAULT_RESOURCES * factor, buildings,
+                             evolvesavegenerator.DEFAULT_ARPA_PROJECTS * factor,
+                             evolvesavegenerator.DEFAULT_JOBS * factor)
+    with open(os.path.join(test_data_dir, f"{size}_original.txt"), encoding="utf-8") as file:
+        return json.loads(Ese.decompress_lz_string(file.read()))
+
+
+def run_benchmarks(sizes, repeat, include_lzstring=False):
+    results = []
+    json_backends = [JSON_BACKEND_STDLIB]
+    if JSON_BACKEND_ORJSON in evolvesaveeditor.get_available_json_backends():
+        json_backends.append(JSON_BACKEND_ORJSON)
+    for size in sizes:
+        save_data = load_save(size)
+        json_str = json.dumps(save_data, separators=(',', ':'))
+        lz_string = Ese.compress_lz_string(json_str)
+        json_bytes = len(json_str.encode("utf-8"))
+
+        backends = [LZ_STRING_BACKEND_FAST] + ([LZ_STRING_BACKEND_LZSTRING] if include_lzstring else [])
+        for backend in backends:
+            results.append(benchmark(f"decompress[{backend}]", size, json_bytes, repeat,
+                                     lambda b=backend: Ese.decompress_lz_string(lz_string, b)))
+            results.append(benchmark(f"compress[{backend}]", size, json_bytes, repeat,
+                                     lambda b=backend: Ese.compress_lz_string(json_str, b)))
+        for backend in json_backends:
+            results.append(benchmark(f"parse_json[{backend}]", size, json_bytes, repeat,
+                                     lambda b=backend: Ese.parse_json(json_str, b)))
+            results.append(benchmark(f"dump_json[{backend}]", size, json_bytes, repeat,
+                                     lambda b=backend: Ese.dump_json(save_data, b)))
+        results.append(benchmark("parse_save_nodes", size, json_bytes, repeat,
+                                 lambda: Ese.parse_save_nodes(json_str, Ese.get_adjuster_nodes())))
+
+        for name, adjuster in get_adjusters().items():
+            results.append(benchmark(name, size, json_bytes, repeat, lambda a=adjuster: a(save_data)))
+        results.append(benchmark("adjust_save_data", size, json_bytes, repeat,
+                                 lambda: adjust_save_data(save_data)))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            save_path = os.path.join(temp_dir, "save.txt")
+
+            def edit(lazy):
+                with open(save_path, "w", encoding="utf-8") as file:
+                    file.write(lz_string)
+                if not edit_one_save(save_path, lazy=lazy).success:
+                    raise RuntimeError(f"could not edit {size} save")
+            results.append(benchmark("edit_one_save", size, json_bytes, repeat, lambda: edit(False)))
+            results.append(benchmark("edit_one_save[lazy]", size, json_bytes, repeat, lambda: edit(True)))
+    return results
+
+
+def get_adjusters():
+    return {
+        "fill_resources": lambda data: Ese.fill_resources(data, Ese.DEFAULT_UNBOUNDED_RESOURCE_AMOUNT),
+        "stack_resources": lambda data: Ese.stack_resources(data, Ese.DEFAULT_STACK_AMOUNT),
+        "adjust_buildings": lambda data: Ese.adjust_buildings(data, Ese.DEFAULT_BUILDING_AMOUNTS),
+        "fill_population": Ese.fill_population,
+        "fill_soldiers": Ese.fill_soldiers,
+        "adjust_prestige_currency": lambda data: Ese.adjust_prestige_currency(
+            data, Ese.DEFAULT_PRESTIGE_CURRENCY_AMOUNTS),
+        "adjust_arpa_research": Ese.adjust_arpa_research,
+    }
+
+
+def adjust_save_data(save_data):
+    ese = Ese()
+    ese.save_data = save_data
+    ese.adjust_save_data()
+    return ese.save_data
+
+
+def benchmark(name, size, json_bytes, repeat, func):
+    """
+    Time func and measure its peak memory use
+    Each timed run calls func enough times to take at least 10ms, so fast functions still get a usable number.
+    Peak memory is measured in a separate run, since tracemalloc slows everything down.
+    :return: one benchmark result
+    :rtype: dict
+    """
+    calls = 1
+    while True:
+        elapsed = time_calls(func, calls)
+        if elapsed >= 0.01 or calls >= 1000:
+            break
+        calls *= 10
+
+    timings = [time_calls(func, calls) / calls for _ in range(repeat)]
+    seconds = statistics.median(timings)
+
+    tracemalloc.start()
+    func()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "benchmark": name,
+        "save": size,
+        "json_bytes": json_bytes,
+        "seconds": seconds,
+        "min_seconds": min(timings),
+        "mb_per_second": json_bytes / seconds / 1_000_000 if seconds else None,
+        "saves_per_second": 1 / seconds if seconds else None,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def time_calls(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return time.perf_counter() - start
+
+
+def print_results(results):
+    print(f"{'benchmark':<26} {'save':<12} {'json size':>10} {'time':>12} {'MB/s':>9} {'saves/s':>10} "
+          f"{'peak memory':>12}")
+    for result in results:
+        print(f"{result['benchmark']:<26} {result['save']:<12} {result['json_bytes'] / 1000:>8.1f}kB "
+              f"{result['seconds'] * 1000:>10.3f}ms {format_rate(result['mb_per_second'], 9, 2)} "
+              f"{format_rate(result['saves_per_second'], 10, 1)} {result['peak_memory_bytes'] / 1000:>10.1f}kB")
+
+
+def format_rate(rate, width, decimals):
+    """
+    :param rate: a per second rate from benchmark(), None when the calls took too little time to measure
+    :type rate: float or None
+    :param int width: width to right align the rate to
+    :param int decimals: digits to show after the decimal point
+    :return: the rate formatted to width, or n/a when it is None
+    :rtype: str
+    """
+    return f"{'n/a':>{width}}" if rate is None else f"{rate:>{width}.{decimals}f}"
+
+
+def write_results(results, output_path):
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(output_path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo_dir, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
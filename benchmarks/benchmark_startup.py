@@ -0,0 +1,173 @@
+"""
+Startup benchmark for evolvesaveeditor.py
+run from evolvesaveeditor dir as:
+    python benchmarks/benchmark_startup.py --output startup_results.json
+
+The editor gets run thousands of times from scripts, where starting the interpreter and importing modules
+can take longer than editing a save. This times cold starts of the command line tool (and of the pyinstaller
+executable when it has been built) on a directory without saves, so only the startup is measured, and lists
+the modules that take longest to import according to python -X importtime.
+Exits with status 1 if a cold start takes longer than --budget-ms.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+script_path = os.path.join(repo_dir, "evolvesaveeditor.py")
+frozen_dir = os.path.join(repo_dir, "dist", "evolvesaveeditor")
+
+# what a cold start of the command line tool (python -m evolvesaveeditor) may take, interpreter startup included
+STARTUP_BUDGET_MS = 50
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    results = run_benchmarks(args.repeat)
+    print_results(results, args.budget_ms)
+    if args.output:
+        write_results(results, args.output)
+    if any(result["budget"] and result["milliseconds"] > args.budget_ms for result in results["startup"]):
+        sys.exit(1)
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description="Benchmark the startup of the evolve save editor")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="number of timed runs of each start, the median is reported (default: %(default)s)")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help="cold start time to fail above (default: %(default)s)")
+    parser.add_argument("--output", help="json file to write the results to")
+    return parser.parse_args(args)
+
+
+def get_frozen_executable():
+    """
+    :return: path of the executable pyinstaller builds into dist/, or None if it hasn't been built
+    """
+    for name in ("evolvesaveeditor.exe", "evolvesaveeditor"):
+        path = os.path.join(frozen_dir, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def get_environment(pycache_dir):
+    """
+    Environment to start python in, writing bytecode to pycache_dir
+    so imports are timed like an installed copy, not recompiled on every run
+    :param str pycache_dir: directory to write bytecode to
+    :return: environment variables
+    :rtype: dict
+    """
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache_dir)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def run_benchmarks(repeat):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = get_environment(os.path.join(temp_dir, "pycache"))
+        empty_dir = os.path.join(temp_dir, "saves")
+        os.mkdir(empty_dir)
+        commands = [
+            ("python", [sys.executable, "-c", "pass"], False),
+            ("import", [sys.executable, "-c", "import evolvesaveeditor"], False),
+            # python compiles a script it is passed on every run, -m uses the bytecode it wrote last time
+            ("script", [sys.executable, script_path, empty_dir], False),
+            ("cli", [sys.executable, "-m", "evolvesaveeditor", empty_dir], True),
+        ]
+        frozen_executable = get_frozen_executable()
+        if frozen_executable:
+            commands.append(("frozen", [frozen_executable, empty_dir], True))
+        startup = [time_startup(name, command, repeat, env, budget) for name, command, budget in commands]
+        imports = get_import_times(env)
+    return {"startup": startup, "imports": imports}
+
+
+def time_startup(name, command, repeat, env, budget):
+    # the first run writes the bytecode and warms the disk cache
+    subprocess.run(command, cwd=repo_dir, env=env, capture_output=True, check=True)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=repo_dir, env=env, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return {
+        "startup": name,
+        "milliseconds": statistics.median(times) * 1000,
+        "min_milliseconds": min(times) * 1000,
+        "budget": budget,
+    }
+
+
+def get_import_times(env, limit=15):
+    """
+    :param dict env: environment to run python in
+    :param int limit: number of modules to return
+    :return: the modules that took longest to import with evolvesaveeditor, including their own imports
+    :rtype: list
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import evolvesaveeditor"], cwd=repo_dir,
+                               env=env, capture_output=True, text=True, check=True)
+    return sorted(parse_import_times(completed.stderr), key=lambda module: module["cumulative_us"],
+                  reverse=True)[:limit]
+
+
+def parse_import_times(output):
+    """
+    :param str output: what python -X importtime writes to stderr
+    :return: the module, its own import time and the time including its imports, for each line
+    :rtype: list
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        modules.append({"module": module.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return modules
+
+
+def print_results(results, budget_ms):
+    print(f"{'startup':<10} {'time':>10} {'min':>10}")
+    for result in results["startup"]:
+        over_budget = " over budget" if result["budget"] and result["milliseconds"] > budget_ms else ""
+        print(f"{result['startup']:<10} {result['milliseconds']:>8.1f}ms {result['min_milliseconds']:>8.1f}ms"
+              f"{over_budget}")
+    print()
+    print(f"{'module':<40} {'self':>10} {'cumulative':>12}")
+    for module in results["imports"]:
+        print(f"{module['module']:<40} {module['self_us'] / 1000:>8.1f}ms {module['cumulative_us'] / 1000:>10.1f}ms")
+
+
+def write_results(results, output_path):
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **results,
+    }
+    with open(output_path, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo_dir, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
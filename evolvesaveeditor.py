@@ -3,70 +3,2627 @@ This script is intended to be a save editor for the game evolve
 The game can be found at https://pmotschmann.github.io/Evolve/
 """
 
-import argparse
+# the tool gets run thousands of times from scripts, so only what every run needs is imported up front.
+# argparse, logging, lzstring, orjson and the multiprocessing modules are imported where they get used.
+# pylint: disable=import-outside-toplevel
+import array
+import binascii
 import collections
-import copy
+import contextlib
+import functools
+import itertools
 import json
-import logging
+import marshal
 import os
+import re
 import sys
+import threading
+import time
+import types
 
-import lzstring
+LZ_STRING_BACKEND_FAST = "fast"
+LZ_STRING_BACKEND_LZSTRING = "lzstring"
+LZ_STRING_BACKENDS = (LZ_STRING_BACKEND_FAST, LZ_STRING_BACKEND_LZSTRING)
+
+# auto uses orjson when it is installed and the save is big enough to be worth importing it for,
+# and the json module otherwise
+JSON_BACKEND_AUTO = "auto"
+JSON_BACKEND_STDLIB = "stdlib"
+JSON_BACKEND_ORJSON = "orjson"
+JSON_BACKENDS = (JSON_BACKEND_AUTO, JSON_BACKEND_STDLIB, JSON_BACKEND_ORJSON)
+
+# how big the result cache can get before the least recently used saves are evicted from it
+DEFAULT_CACHE_SIZE_MB = 256
+
+# how big a ParsedSaveCache can get before the least recently used saves are evicted from it
+DEFAULT_PARSED_SAVE_CACHE_SIZE_MB = 64
+
+# what parse_args() returns for any option that isn't passed in
+DEFAULT_ARGS = {"jobs": 1, "lz_string_backend": LZ_STRING_BACKEND_FAST, "json_backend": JSON_BACKEND_AUTO,
+                "lazy": False, "profile": False, "cprofile": None, "stdin": False, "stdout": False,
+                "bulk": False, "cache": None, "cache_size": DEFAULT_CACHE_SIZE_MB, "no_cache": False,
+                "emit_patch": None, "patch": None, "command": None, "fsync_every": 1,
+                "adjustment_profile_file": None, "adjustment_profile": None, "stream": False}
+
+# save path that stands for reading the save from stdin, and the name it is reported under
+STDIN_PATH = "-"
+STDIN_NAME = "<stdin>"
+
+# command that applies a JSON Patch written by --emit-patch to saves, instead of running the adjusters over them
+APPLY_PATCH_COMMAND = "apply-patch"
+# command that prints what changed between two saves
+DIFF_COMMAND = "diff"
+# command that loads one save and writes a variant of it for each of many adjustment profiles
+FAN_OUT_COMMAND = "fan-out"
+COMMANDS = (APPLY_PATCH_COMMAND, DIFF_COMMAND, FAN_OUT_COMMAND)
+# RFC 6902 JSON Patch operations apply_patch() understands
+PATCH_OPERATIONS = ("add", "remove", "replace", "move", "copy", "test")
+
+# outcome of editing one save file, message says what went wrong when success is False,
+# patch is the JSON Patch of the edit when it was asked for
+EditResult = collections.namedtuple("EditResult", ["filepath", "success", "message", "timings", "patch"],
+                                    defaults=[None, None])
+# outcome of editing the save on one line of a bulk file, lz_string is the save as it was when success is False
+BulkResult = collections.namedtuple("BulkResult", ["line_number", "lz_string", "success", "message"])
+# outcome of fanning out one save, load is the EditResult of loading the save file that is shared by every variant
+# and outputs the EditResult of each variant written
+FanOutResult = collections.namedtuple("FanOutResult", ["load", "outputs"])
+# a value that differs between two saves, path is the keys and array indexes leading to it from the top of the save
+# and old or new is MISSING when the path is only in one of the saves
+SaveChange = collections.namedtuple("SaveChange", ["path", "old", "new"])
+MISSING = object()
+# a rule of an AdjustmentProfile, which sets the value at path (a JSON Pointer) in a save.
+# op is one of PROFILE_RULE_OPERATIONS: set replaces the value, min raises it to at least value
+# and max lowers it to at most value
+ProfileRule = collections.namedtuple("ProfileRule", ["path", "op", "value"])
+PROFILE_RULE_OPERATIONS = ("set", "min", "max")
+
+# saves are written to their temp file through a buffer this big, so most saves take a single write
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# bulk lines are sent to the worker processes in chunks of this many, so each one isn't a round trip of its own
+BULK_CHUNK_SIZE = 16
+# chunks each worker process can have queued up, which is as far ahead of the output the input is read
+BULK_CHUNKS_PER_JOB = 4
 
 
 def main():
     """
-    Call parse_args, then pass to edit_evolve_save() to do all the work
-    :return: nothing
+    Call parse_args, then pass to edit_evolve_save() (or diff_evolve_saves() for the diff command
+    and fan_out_evolve_save() for the fan-out command) to do all the work
+    :return: nothing, exits with status 1 if any save could not be edited
+    """
+    args = parse_args(sys.argv[1:])
+    run = {DIFF_COMMAND: diff_evolve_saves, FAN_OUT_COMMAND: fan_out_evolve_save}.get(args.command, edit_evolve_save)
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        success = profiler.runcall(run, args)
+        profiler.dump_stats(args.cprofile)
+    else:
+        success = run(args)
+    if not success:
+        sys.exit(1)
+
+
+def parse_args(args):
+    """
+        Parses and validates command line arguments
+        Save paths without any options are parsed without argparse, which takes longer to import than
+        the rest of the script does to run on a small save.
+        :param list args: arguments passed into the script (usually sys.argv[1:])
+        :return: arguments parsed into a neat object
+        """
+    if args and _get_command(args) is None and not any(arg.startswith("-") for arg in args):
+        return types.SimpleNamespace(filepaths=expand_save_paths(args), **DEFAULT_ARGS)
+    return _parse_args_with_argparse(args)
+
+
+def _get_command(args):
+    """
+    :param list args: arguments passed into the script
+    :return: the command the arguments start with, or None if they don't start with one.
+        A save file (or directory) named like a command is edited, as it was before there were commands
+    :rtype: str
+    """
+    if args and args[0] in COMMANDS and not os.path.exists(args[0]):
+        return args[0]
+    return None
+
+
+def _parse_args_with_argparse(args):
+    import argparse
+    command = _get_command(args)
+    if command == DIFF_COMMAND:
+        return _parse_diff_args(args[1:])
+    if command == FAN_OUT_COMMAND:
+        return _parse_fan_out_args(args[1:])
+    apply_patch = command == APPLY_PATCH_COMMAND
+    if apply_patch:
+        args = args[1:]
+        parser = argparse.ArgumentParser(
+            description="Apply a JSON Patch written by --emit-patch to saves, instead of running the adjusters")
+        parser.prog += f" {APPLY_PATCH_COMMAND}"
+        parser.add_argument("patch_file", help="RFC 6902 JSON Patch file to apply to each save")
+    else:
+        parser = argparse.ArgumentParser(
+            description="Save editor for game evolve",
+            epilog=f"{APPLY_PATCH_COMMAND} PATCH_FILE filepath [filepath ...] applies a patch written by "
+                   f"--emit-patch to saves instead, see {APPLY_PATCH_COMMAND} --help. "
+                   f"{DIFF_COMMAND} OLD_FILEPATH NEW_FILEPATH prints what changed between two saves. "
+                   f"{FAN_OUT_COMMAND} FILEPATH PROFILE_FILE [PROFILE_FILE ...] writes a variant of a save for "
+                   f"each adjustment profile, see {FAN_OUT_COMMAND} --help.")
+    parser.add_argument("filepaths", nargs="*", metavar="filepath",
+                        help="path to save file, directory of save files, or glob pattern matching save files. "
+                             f"{STDIN_PATH} reads the save from stdin and writes the edited save to stdout")
+    parser.add_argument("-j", "--jobs", type=_positive_int, default=DEFAULT_ARGS["jobs"],
+                        help="number of save files to edit in parallel (default: %(default)s)")
+    parser.add_argument("--lz-string-backend", choices=LZ_STRING_BACKENDS, default=DEFAULT_ARGS["lz_string_backend"],
+                        help="implementation used to decompress and compress the save (default: %(default)s)")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default=DEFAULT_ARGS["json_backend"],
+                        help="implementation used to parse and serialize the save, the output is the same with each "
+                             "(default: %(default)s, which is orjson for big saves when it is installed)")
+    parser.add_argument("--profile", action="store_true",
+                        help="print how long each stage of editing took for every save")
+    parser.add_argument("--cprofile", metavar="OUTPUT_FILE",
+                        help="write a cProfile profile of the run to OUTPUT_FILE, "
+                             "only the main process is profiled so use it with --jobs 1")
+    parser.add_argument("--stdin", action="store_true",
+                        help="read the save from stdin and write the edited save to stdout, "
+                             f"the same as passing {STDIN_PATH} as the filepath")
+    parser.add_argument("--bulk", action="store_true",
+                        help="the save file (or stdin) holds one exported save per line, the edited saves are "
+                             "written to stdout one per line in the same order")
+    parser.add_argument("--cache", nargs="?", const="", metavar="CACHE_FILE",
+                        help="keep edited saves in an SQLite file, so saves that were edited before are not edited "
+                             "again. Without CACHE_FILE it is results.sqlite3 in the user's cache directory "
+                             "(LOCALAPPDATA, XDG_CACHE_HOME or ~/.cache). Off by default")
+    parser.add_argument("--cache-size", type=_positive_int, metavar="MB",
+                        help="size the cache can grow to before the least recently used saves are evicted "
+                             f"(default: {DEFAULT_CACHE_SIZE_MB})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="edit every save without looking in or adding to the cache, even if --cache is passed in")
+    parser.add_argument("--stdout", action="store_true",
+                        help="write the edited save to stdout instead of back to the save file, "
+                             "which is left as it was")
+    parser.add_argument("--fsync-every", type=_non_negative_int, metavar="N",
+                        help="when editing many save files, fsync the directories they are in N files at a time "
+                             "instead of after each one is written, 0 to fsync them all once at the end. Each save is "
+                             "synced before it replaces the old one, so it is never left half written or empty, but "
+                             "until its directory is synced a power cut can undo its edit (default: 1)")
+    parser.add_argument("--stream", action="store_true",
+                        help="decompress and parse each save file as it is read, which takes less memory but about "
+                             "twice as long. Saves read from stdin, written to stdout or looked up in the cache are "
+                             "read whole")
+    if not apply_patch:
+        parser.add_argument("--lazy", action="store_true",
+                            help="only parse the parts of each save the adjusters change, "
+                                 "copying the rest back as it was")
+        parser.add_argument("--emit-patch", metavar="PATCH_FILE",
+                            help="also write the edits made to the save to PATCH_FILE as an RFC 6902 JSON Patch, "
+                                 f"which {APPLY_PATCH_COMMAND} can apply to other saves")
+        parser.add_argument("--adjustment-profile", metavar="PROFILE_FILE", dest="adjustment_profile_file",
+                            help="TOML or json file saying which adjusters to run, what amounts they adjust to and "
+                                 "values to set in each save after them (default: every adjuster, default amounts)")
+    parser.set_defaults(**DEFAULT_ARGS)
+    if apply_patch:
+        parser.set_defaults(command=APPLY_PATCH_COMMAND)
+    # intermixed, so the filepaths can come after options that follow the patch file
+    parsed_args = parser.parse_intermixed_args(args)
+    if parsed_args.json_backend == JSON_BACKEND_ORJSON and _import_orjson() is None:
+        parser.error("--json-backend orjson needs orjson to be installed")
+    parsed_args.filepaths = expand_save_paths(parsed_args.filepaths)
+    _check_stream_args(parser, parsed_args)
+    if parsed_args.bulk:
+        if len(parsed_args.filepaths) > 1:
+            parser.error("--bulk can only read one file")
+        if parsed_args.profile:
+            parser.error("--profile can't be used with --bulk")
+        parsed_args.stdout = True
+    _check_patch_args(parser, parsed_args)
+    _check_adjustment_profile_args(parser, parsed_args)
+    return parsed_args
+
+
+def _parse_diff_args(args):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Print the paths of the values that differ between two saves, with their old and new values")
+    parser.prog += f" {DIFF_COMMAND}"
+    parser.add_argument("old_filepath", help="path to the save file to compare from")
+    parser.add_argument("new_filepath", help="path to the save file to compare to")
+    parser.add_argument("--lz-string-backend", choices=LZ_STRING_BACKENDS, default=DEFAULT_ARGS["lz_string_backend"],
+                        help="implementation used to decompress the saves (default: %(default)s)")
+    parser.add_argument("--cprofile", metavar="OUTPUT_FILE",
+                        help="write a cProfile profile of the run to OUTPUT_FILE")
+    parser.set_defaults(**DEFAULT_ARGS)
+    parser.set_defaults(command=DIFF_COMMAND)
+    parsed_args = parser.parse_args(args)
+    parsed_args.filepaths = [parsed_args.old_filepath, parsed_args.new_filepath]
+    return parsed_args
+
+
+def _parse_fan_out_args(args):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Load a save once and write a variant of it for each adjustment profile, to "
+                    "SAVE_NAME.PROFILE_NAME next to the save or in --output-dir. The save file itself isn't changed")
+    parser.prog += f" {FAN_OUT_COMMAND}"
+    parser.add_argument("filepath", help="path to the save file to make the variants of")
+    parser.add_argument("profile_files", nargs="+", metavar="PROFILE_FILE",
+                        help="TOML or json adjustment profile to make a variant with, like --adjustment-profile takes")
+    parser.add_argument("-o", "--output-dir", help="directory to write the variants to (default: the save's)")
+    parser.add_argument("-j", "--jobs", type=_positive_int,
+                        help="number of variants to compress and write in parallel (default: the number of CPUs)")
+    parser.add_argument("--lz-string-backend", choices=LZ_STRING_BACKENDS, default=DEFAULT_ARGS["lz_string_backend"],
+                        help="implementation used to decompress and compress the saves (default: %(default)s)")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default=DEFAULT_ARGS["json_backend"],
+                        help="implementation used to parse and serialize the saves (default: %(default)s)")
+    parser.add_argument("--lazy", action="store_true",
+                        help="only parse the parts of the save the profiles change, copying the rest back as it was")
+    parser.add_argument("--profile", action="store_true",
+                        help="print how long loading the save and each stage of making every variant took")
+    parser.add_argument("--cprofile", metavar="OUTPUT_FILE",
+                        help="write a cProfile profile of the run to OUTPUT_FILE, only the main process is profiled")
+    parser.set_defaults(**DEFAULT_ARGS)
+    parser.set_defaults(command=FAN_OUT_COMMAND, jobs=os.cpu_count() or 1)
+    parsed_args = parser.parse_args(args)
+    if parsed_args.json_backend == JSON_BACKEND_ORJSON and _import_orjson() is None:
+        parser.error("--json-backend orjson needs orjson to be installed")
+    parsed_args.filepaths = [parsed_args.filepath]
+    parsed_args.output_paths = [get_fan_out_path(parsed_args.filepath, profile_file, parsed_args.output_dir)
+                                for profile_file in parsed_args.profile_files]
+    if len(set(parsed_args.output_paths)) < len(parsed_args.output_paths):
+        parser.error("each profile file needs a different name, the variants are named after them")
+    parsed_args.adjustment_profiles = []
+    for profile_file in parsed_args.profile_files:
+        try:
+            parsed_args.adjustment_profiles.append(load_adjustment_profile(profile_file))
+        except (OSError, ValueError) as err:
+            parser.error(f"could not load adjustment profile from {profile_file} ({err})")
+    return parsed_args
+
+
+def _check_stream_args(parser, parsed_args):
+    """
+    Makes --stdin, --stdout and STDIN_PATH agree with each other, failing the parse if they can't
+    :param parser: the argparse.ArgumentParser that parsed the arguments
+    :param parsed_args: the parsed arguments, changed in place
+    :return: nothing
+    """
+    if parsed_args.stdin:
+        if parsed_args.filepaths not in ([], [STDIN_PATH]):
+            parser.error("--stdin can't be used with save file paths")
+        parsed_args.filepaths = [STDIN_PATH]
+    if not parsed_args.filepaths:
+        parser.error(f"a save file path, {STDIN_PATH} or --stdin is needed")
+    if STDIN_PATH in parsed_args.filepaths:
+        if len(parsed_args.filepaths) > 1:
+            parser.error(f"{STDIN_PATH} can't be used with other save file paths")
+        parsed_args.stdin = parsed_args.stdout = True
+    if parsed_args.stdout and len(parsed_args.filepaths) > 1:
+        parser.error("--stdout can only write one save")
+
+
+def _check_patch_args(parser, parsed_args):
+    """
+    Loads the patch file of the apply-patch command and makes sure --emit-patch has one save to take a patch of
+    :param parser: the argparse.ArgumentParser that parsed the arguments
+    :param parsed_args: the parsed arguments, changed in place
+    :return: nothing
+    """
+    if getattr(parsed_args, "patch_file", None) is not None:
+        try:
+            parsed_args.patch = load_patch_file(parsed_args.patch_file)
+        except (OSError, ValueError) as err:
+            parser.error(f"could not load patch from {parsed_args.patch_file} ({err})")
+    if parsed_args.emit_patch is not None:
+        if parsed_args.bulk or len(parsed_args.filepaths) > 1:
+            parser.error("--emit-patch can only take the patch of one save")
+
+
+def _check_adjustment_profile_args(parser, parsed_args):
+    """
+    Loads and compiles the profile of --adjustment-profile, once for every save that gets edited
+    :param parser: the argparse.ArgumentParser that parsed the arguments
+    :param parsed_args: the parsed arguments, changed in place
+    :return: nothing
+    """
+    if getattr(parsed_args, "adjustment_profile_file", None) is not None:
+        try:
+            parsed_args.adjustment_profile = load_adjustment_profile(parsed_args.adjustment_profile_file)
+        except (OSError, ValueError) as err:
+            parser.error(f"could not load adjustment profile from {parsed_args.adjustment_profile_file} ({err})")
+
+
+def _positive_int(value):
+    import argparse
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive number")
+    return number
+
+
+def _non_negative_int(value):
+    import argparse
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} is not zero or a positive number")
+    return number
+
+
+def expand_save_paths(paths):
+    """
+    Turns paths passed in on the command line into a list of save files
+    Directories are replaced by the files directly inside them and glob patterns by the files they match.
+    Anything else (including patterns that don't match) is kept as is, so it gets reported when it can't be edited.
+    :param list paths: paths, directories or glob patterns
+    :return: save file paths in the order they were passed in, without duplicates
+    :rtype: list
+    """
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            expanded.extend(sorted(entry.path for entry in os.scandir(path) if entry.is_file()))
+        elif path == STDIN_PATH:
+            expanded.append(path)
+        elif any(char in path for char in "*?["):
+            import glob
+            expanded.extend(sorted(match for match in glob.glob(path, recursive=True) if not os.path.isdir(match))
+                            or [path])
+        else:
+            expanded.append(path)
+    return list(dict.fromkeys(expanded))
+
+
+def edit_evolve_save(args):
+    """
+    Edit every save file passed in on the command line and print how each one went
+    With --stdout the edited save is written to stdout, so how it went is printed to stderr instead.
+    With apply-patch, the patch is applied to each save in place of the adjusters.
+    With --adjustment-profile, the saves are adjusted as the profile says.
+    :param args: parsed command line arguments from parse_args()
+    :return: True if every save was edited, False if any failed
+    :rtype: bool
+    """
+    cache = None if args.cache is None or args.no_cache else ResultCache(args.cache or get_default_cache_path(),
+                                                                         args.cache_size * 1024 * 1024)
+    try:
+        if args.bulk:
+            return edit_bulk_save_file(args.filepaths[0], sys.stdout, args.jobs, args.lz_string_backend, args.lazy,
+                                       args.json_backend, cache, args.patch,
+                                       adjustment_profile=args.adjustment_profile)
+        if args.stdout or args.emit_patch is not None:
+            results = [edit_one_save(args.filepaths[0], args.lz_string_backend, args.lazy, args.json_backend,
+                                     sys.stdout if args.stdout else None, cache, args.patch,
+                                     emit_patch=args.emit_patch is not None,
+                                     adjustment_profile=args.adjustment_profile, stream=args.stream)]
+            if args.emit_patch is not None:
+                results = [write_patch_file(args.emit_patch, results[0])]
+            print_edit_summary(results, args.profile, sys.stderr if args.stdout else None)
+        else:
+            results = edit_evolve_saves(args.filepaths, args.jobs, args.lz_string_backend, args.lazy,
+                                        args.json_backend, cache, args.patch, args.fsync_every,
+                                        adjustment_profile=args.adjustment_profile, stream=args.stream)
+            print_edit_summary(results, args.profile)
+    finally:
+        if cache is not None:
+            cache.close()
+    return all(result.success for result in results)
+
+
+def get_default_cache_path():
+    """
+    :return: path of the result cache when --cache is passed in without a file, in the user's cache directory
+    :rtype: str
+    """
+    cache_dir = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or \
+        os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_dir, "evolvesaveeditor", "results.sqlite3")
+
+
+def load_patch_file(filepath):
+    """
+    :param str filepath: path of a JSON Patch file, like --emit-patch writes
+    :return: the JSON Patch operations in the file
+    :rtype: list
+    :raises OSError: if the file couldn't be read
+    :raises ValueError: if the file doesn't hold a JSON Patch
+    """
+    with open(filepath, "r") as file:
+        patch = json.load(file)
+    if not isinstance(patch, list) or not all(_is_patch_operation(operation) for operation in patch):
+        raise ValueError("not a JSON Patch")
+    return patch
+
+
+def _is_patch_operation(operation):
+    """
+    :return: True if operation has everything its op needs: a path, the path to move or copy from and the value to
+        add, replace or test against
+    :rtype: bool
+    """
+    if not isinstance(operation, dict) or operation.get("op") not in PATCH_OPERATIONS or \
+            not isinstance(operation.get("path"), str):
+        return False
+    if operation["op"] in ("move", "copy"):
+        return isinstance(operation.get("from"), str)
+    return operation["op"] == "remove" or "value" in operation
+
+
+def load_adjustment_profile(filepath):
+    """
+    :param str filepath: path of an adjustment profile, a .toml file or otherwise json
+    :return: the profile in the file, compiled and ready to adjust any number of saves with
+    :rtype: AdjustmentProfile
+    :raises OSError: if the file couldn't be read
+    :raises ValueError: if the file doesn't hold an adjustment profile
+    """
+    if os.path.splitext(filepath)[1].lower() == ".toml":
+        try:
+            import tomllib
+        except ImportError as err:
+            raise ValueError("TOML profiles need python 3.11 or higher, use a json profile instead") from err
+        with open(filepath, "rb") as file:
+            config = tomllib.load(file)
+    else:
+        with open(filepath, "r") as file:
+            config = json.load(file)
+    return AdjustmentProfile.from_dict(config)
+
+
+def write_patch_file(filepath, result):
+    """
+    Write the JSON Patch of an edit to a file
+    :param str filepath: path of the file to write the patch to
+    :param EditResult result: how the edit went, from edit_one_save() with emit_patch set
+    :return: result, or a failed copy of it if the patch couldn't be written
+    :rtype: EditResult
+    """
+    if not result.success:
+        return result
+    try:
+        with open(filepath, "w") as file:
+            json.dump(result.patch, file, separators=(",", ":"))
+    except OSError as err:
+        return result._replace(success=False, message=f"could not write patch ({type(err).__name__}: {err})")
+    return result
+
+
+def edit_evolve_saves(filepaths, jobs=1, lz_string_backend=LZ_STRING_BACKEND_FAST, lazy=False,
+                      json_backend=JSON_BACKEND_AUTO, cache=None, patch=None, fsync_every=1, adjustment_profile=None,
+                      stream=False):
+    """
+    Edit many save files, spread across a pool of worker processes when jobs is more than 1
+    A save that fails doesn't stop the others from being edited.
+    :param list filepaths: paths of the save files to edit in place
+    :param int jobs: number of worker processes to use
+    :param str lz_string_backend: one of LZ_STRING_BACKENDS
+    :param bool lazy: only parse the nodes of each save that the adjusters need
+    :param str json_backend: one of JSON_BACKENDS
+    :param ResultCache cache: cache to look edited saves up in and add them to, or None to not use one
+    :param list patch: JSON Patch to apply to each save instead of running the adjusters, or None to run them
+    :param int fsync_every: fsync the directories of the edited save files this many files at a time once they are
+        written, 0 for all of them at the end, or 1 to fsync each one's as it replaces the save. The saves themselves
+        are always fsynced before they replace the old ones
+    :param AdjustmentProfile adjustment_profile: profile to adjust the saves with, or None for the default one
+    :param bool stream: decompress and parse each save file as it is read, unless cache is used
+    :return: EditResult for each save file, in the same order as filepaths
+    :rtype: list
+    """
+    fsync = fsync_every == 1
+    sync_batch = None if fsync else SyncBatch(fsync_every or None)
+    if jobs == 1 or len(filepaths) == 1:
+        results = [_sync_result(edit_one_save(filepath, lz_string_backend, lazy, json_backend, cache=cache,
+                                              patch=patch, fsync=fsync, adjustment_profile=adjustment_profile,
+                                              stream=stream),
+                                sync_batch)
+                   for filepath in filepaths]
+        return _flush_sync_batch(results, sync_batch)
+
+    import concurrent.futures
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(filepaths))) as executor:
+        # the profile is compiled once here and pickled to the workers as it is
+        futures = [executor.submit(edit_one_save, filepath, lz_string_backend, lazy, json_backend, cache=cache,
+                                   patch=patch, fsync=fsync, adjustment_profile=adjustment_profile, stream=stream)
+                   for filepath in filepaths]
+        for filepath, future in zip(filepaths, futures):
+            try:
+                results.append(_sync_result(future.result(), sync_batch))
+            except Exception as err:  # pylint: disable=broad-except
+                # the worker process itself died, only this file is lost
+                results.append(EditResult(filepath, False, f"{type(err).__name__}: {err}"))
+    return _flush_sync_batch(results, sync_batch)
+
+
+def _sync_result(result, sync_batch):
+    """
+    Add the file of a save that was edited to sync_batch
+    :return: result, or a failed copy of it if syncing failed
+    :rtype: EditResult
+    """
+    if sync_batch is None or not result.success:
+        return result
+    try:
+        sync_batch.add(result.filepath)
+    except OSError as err:
+        return result._replace(success=False, message=f"could not sync save data ({type(err).__name__}: {err})")
+    return result
+
+
+def _flush_sync_batch(results, sync_batch):
+    """
+    :return: results, with the last successful one failed if the saves left in sync_batch couldn't be synced
+    :rtype: list
+    """
+    if sync_batch is None:
+        return results
+    try:
+        sync_batch.flush()
+    except OSError as err:
+        for index in reversed(range(len(results))):
+            if results[index].success:
+                results[index] = results[index]._replace(
+                    success=False, message=f"could not sync save data ({type(err).__name__}: {err})")
+                break
+    return results
+
+
+def edit_one_save(filepath, lz_string_backend=LZ_STRING_BACKEND_FAST, lazy=False, json_backend=JSON_BACKEND_AUTO,
+                  output_file=None, cache=None, patch=None, emit_patch=False, fsync=True, adjustment_profile=None,
+                  stream=False):
+    """
+    Load, adjust and save one save file in place, or write the edited save to output_file instead
+    When emit_patch is set the cache isn't used, since the patch is taken from the loaded and edited save data.
+    A save file that is written back without a cache is loaded with load_data_from_file() and saved with
+    save_data_to_file(), the rest are read and written whole.
+    :param str filepath: path of the save file to edit, or STDIN_PATH to read the save from stdin
+    :param str lz_string_backend: one of LZ_STRING_BACKENDS
+    :param bool lazy: only parse the nodes of the save that the adjusters need
+    :param str json_backend: one of JSON_BACKENDS
+    :param output_file: open text file to write the edited save to, or None to write it back to filepath
+    :param ResultCache cache: cache to look the edited save up in and add it to, or None to not use one
+    :param list patch: JSON Patch to apply to the save instead of running the adjusters, or None to run them
+    :param bool emit_patch: give back the JSON Patch of the edit in the result
+    :param bool fsync: fsync the directory of the edited save once it replaces the file, off when the caller syncs
+        it later
+    :param AdjustmentProfile adjustment_profile: profile to adjust the save with, or None for the default one
+    :param bool stream: decompress and parse the save file as it is read, when it is loaded with load_data_from_file()
+    :return: how the edit went
+    :rtype: EditResult
+    """
+    ese = EvolveSaveEditor()
+    ese.lz_string_backend = lz_string_backend
+    ese.json_backend = json_backend
+    ese.fsync = fsync
+    ese.adjustment_profile = adjustment_profile
+    ese.stream_min_file_size = 0 if stream else None
+    name = STDIN_NAME if filepath == STDIN_PATH else filepath
+    try:
+        if filepath != STDIN_PATH and output_file is None and (cache is None or emit_patch):
+            changed = _edit_file(ese, filepath, lazy, patch)
+            if changed is None:
+                return EditResult(name, False, "could not load save data", ese.timings)
+            # serialized, compressed and written a piece at a time, or not at all when nothing changed
+            if not ese.save_data_to_file(filepath):
+                return EditResult(name, False, "could not write save data", ese.timings)
+            edit_patch = ese.get_patch() if emit_patch else None
+            return EditResult(name, True, "edited" if changed else "unchanged", ese.timings, edit_patch)
+        lz_string = _read_save(ese, filepath)
+        edited, message = (None, "could not load save data") if lz_string is None else \
+            _edit_export(ese, lz_string, lazy, None if emit_patch else cache,
+                         "stdin" if filepath == STDIN_PATH else f"file {filepath}", patch)
+        if edited is None:
+            return EditResult(name, False, message, ese.timings)
+        # when the edited save is lz_string itself, the file already holds it
+        if (edited is not lz_string or output_file is not None) and \
+                not _write_save(ese, filepath, edited, output_file):
+            return EditResult(name, False, "could not write save data", ese.timings)
+        edit_patch = ese.get_patch() if emit_patch else None
+    except Exception as err:  # pylint: disable=broad-except
+        # a save with unexpected data shouldn't take down the rest of the batch
+        return EditResult(name, False, f"{type(err).__name__}: {err}", ese.timings)
+    return EditResult(name, True, message, ese.timings, edit_patch)
+
+
+def _read_save(ese, filepath):
+    if filepath != STDIN_PATH:
+        return ese.read_file(filepath)
+    with ese.timings.span("read"):
+        return sys.stdin.read()
+
+
+def _write_save(ese, filepath, lz_string, output_file):
+    if output_file is None:
+        return ese.write_file(filepath, lz_string)
+    with ese.timings.span("write"):
+        output_file.write(lz_string)
+        output_file.flush()
+    return True
+
+
+def _edit_file(ese, filepath, lazy, patch):
+    """
+    Adjust one save file, or apply patch to it when there is one,
+    loading it with load_data_from_file(), which streams it when ese.stream_min_file_size says to
+    :return: True if the save was edited, False if it was already as the edit would make it, None if it couldn't
+        be loaded
+    :rtype: bool
+    """
+    if not ese.load_data_from_file(filepath, _get_edit_nodes(ese, lazy, patch)):
+        return None
+    return ese.adjust_save_data() if patch is None else ese.patch_save_data(patch)
+
+
+def _get_edit_nodes(ese, lazy, patch):
+    """
+    :return: the top-level nodes of a save to parse to adjust it, or to apply patch to it, or None for all of them
+    :rtype: frozenset
+    """
+    if patch is None:
+        return ese.get_adjustment_profile().nodes if lazy else None
+    # a patch only needs the nodes it goes through, so those are all that get parsed
+    return EvolveSaveEditor.get_patch_nodes(patch)
+
+
+def _edit_export(ese, lz_string, lazy, cache, source, patch=None):
+    """
+    Adjust one exported save, or apply patch to it when there is one,
+    or take the edited save from cache if it was edited before with the same settings
+    :return: the edited save, or None if it couldn't be loaded, and what happened to it.
+        The edited save is lz_string itself when the adjusters had nothing to change.
+    :rtype: tuple
+    """
+    if patch is None:
+        settings = dict(ese.get_settings(), lazy=lazy) if cache is not None else None
+    else:
+        settings = {"version": _get_editor_version(), "patch": patch} if cache is not None else None
+    nodes = _get_edit_nodes(ese, lazy, patch)
+    if cache is not None:
+        with ese.timings.span("cache"):
+            edited = cache.get(lz_string, settings)
+        if edited == lz_string:
+            return lz_string, "unchanged"
+        if edited is not None:
+            return edited, "edited from cache"
+    if not ese.load_data_from_string(lz_string, nodes, source):
+        return None, "could not load save data"
+    changed = ese.adjust_save_data() if patch is None else ese.patch_save_data(patch)
+    # when nothing changed this is lz_string, without serializing or compressing anything
+    edited = ese.save_data_to_string()
+    if cache is not None:
+        with ese.timings.span("cache"):
+            cache.put(lz_string, settings, edited)
+    return edited, "edited" if changed else "unchanged"
+
+
+def edit_bulk_save_file(filepath, output_file, jobs=1, lz_string_backend=LZ_STRING_BACKEND_FAST, lazy=False,
+                        json_backend=JSON_BACKEND_AUTO, cache=None, patch=None, adjustment_profile=None):
+    """
+    Edit the saves in a file that holds one exported save per line, writing the edited saves to output_file
+    Failed saves and how long it all took are printed to stderr, so output_file can be stdout.
+    :param str filepath: path of the file of saves, or STDIN_PATH to read them from stdin
+    :param output_file: open text file to write the edited saves to, one per line
+    :param int jobs: number of worker processes to use
+    :param str lz_string_backend: one of LZ_STRING_BACKENDS
+    :param bool lazy: only parse the nodes of each save that the adjusters need
+    :param str json_backend: one of JSON_BACKENDS
+    :param ResultCache cache: cache to look edited saves up in and add them to, or None to not use one
+    :param list patch: JSON Patch to apply to each save instead of running the adjusters, or None to run them
+    :param AdjustmentProfile adjustment_profile: profile to adjust the saves with, or None for the default one
+    :return: True if every save was edited, False if any failed
+    :rtype: bool
+    """
+    name = STDIN_NAME if filepath == STDIN_PATH else filepath
+    saves = failed = unchanged = 0
+    start = time.perf_counter()
+    try:
+        with (contextlib.nullcontext(sys.stdin) if filepath == STDIN_PATH else open(filepath, "r")) as input_file:
+            for result in edit_bulk_saves(input_file, jobs, lz_string_backend, lazy, json_backend, cache, patch,
+                                          adjustment_profile):
+                output_file.write(result.lz_string + "\n")
+                saves += 1
+                if not result.success:
+                    failed += 1
+                    print(f"FAILED: {name}:{result.line_number} ({result.message})", file=sys.stderr)
+                elif result.message == "unchanged":
+                    unchanged += 1
+        output_file.flush()
+    except OSError as err:
+        print(f"FAILED: {name} ({type(err).__name__}: {err})", file=sys.stderr)
+        return False
+    seconds = time.perf_counter() - start
+    print(f"{saves - failed - unchanged} of {saves} saves edited, {unchanged} unchanged, {failed} failed "
+          f"in {seconds:.2f}s ({saves / seconds if seconds else 0:.1f} saves/s)", file=sys.stderr)
+    return failed == 0
+
+
+def edit_bulk_saves(lines, jobs=1, lz_string_backend=LZ_STRING_BACKEND_FAST, lazy=False,
+                    json_backend=JSON_BACKEND_AUTO, cache=None, patch=None, adjustment_profile=None):
+    """
+    Edit exported saves given one per line, spread across a pool of worker processes when jobs is more than 1
+    Lines are only read as far as BULK_CHUNKS_PER_JOB chunks per worker ahead of the results given back,
+    so memory use stays the same however many lines there are.
+    :param lines: exported saves, one per item, like the lines of an open file
+    :type lines: collections.abc.Iterable
+    :param int jobs: number of worker processes to use
+    :param str lz_string_backend: one of LZ_STRING_BACKENDS
+    :param bool lazy: only parse the nodes of each save that the adjusters need
+    :param str json_backend: one of JSON_BACKENDS
+    :param ResultCache cache: cache to look edited saves up in and add them to, or None to not use one
+    :param list patch: JSON Patch to apply to each save instead of running the adjusters, or None to run them
+    :param AdjustmentProfile adjustment_profile: profile to adjust the saves with, or None for the default one
+    :return: BulkResult for each line, in the same order as lines
+    :rtype: collections.abc.Iterator
+    """
+    options = (lz_string_backend, lazy, json_backend, cache, patch, adjustment_profile)
+    line_numbers = itertools.count(1)
+    for chunk, outcomes in _edit_bulk_chunks(_chunk_lines(lines), jobs, options):
+        # line_numbers goes last, so zip stops at the end of the chunk without taking a number from it
+        for lz_string, (edited, message), line_number in zip(chunk, outcomes, line_numbers):
+            yield BulkResult(line_number, lz_string if edited is None else edited, edited is not None, message)
+
+
+def _chunk_lines(lines):
+    stripped_lines = (line.rstrip("\r\n") for line in lines)
+    while True:
+        chunk = list(itertools.islice(stripped_lines, BULK_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _edit_bulk_chunks(chunks, jobs, options):
+    """
+    :return: each chunk with what edit_exported_saves() gave back for it, in the same order as chunks
+    :rtype: collections.abc.Iterator
+    """
+    if jobs == 1:
+        for chunk in chunks:
+            yield chunk, edit_exported_saves(chunk, *options)
+        return
+
+    import concurrent.futures
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        for chunk in chunks:
+            if len(pending) >= jobs * BULK_CHUNKS_PER_JOB:
+                yield _get_chunk_outcomes(*pending.popleft())
+            pending.append((chunk, executor.submit(edit_exported_saves, chunk, *options)))
+        while pending:
+            yield _get_chunk_outcomes(*pending.popleft())
+
+
+def _get_chunk_outcomes(chunk, future):
+    try:
+        return chunk, future.result()
+    except Exception as err:  # pylint: disable=broad-except
+        # the worker process itself died, only the saves in this chunk are lost
+        return chunk, [(None, f"{type(err).__name__}: {err}")] * len(chunk)
+
+
+def edit_exported_saves(lz_strings, lz_string_backend=LZ_STRING_BACKEND_FAST, lazy=False,
+                        json_backend=JSON_BACKEND_AUTO, cache=None, patch=None, adjustment_profile=None):
+    """
+    Adjust exported saves without any files involved
+    A save that fails doesn't stop the others from being edited.
+    :param list lz_strings: saves, as exported from the game
+    :param str lz_string_backend: one of LZ_STRING_BACKENDS
+    :param bool lazy: only parse the nodes of each save that the adjusters need
+    :param str json_backend: one of JSON_BACKENDS
+    :param ResultCache cache: cache to look edited saves up in and add them to, or None to not use one
+    :param list patch: JSON Patch to apply to each save instead of running the adjusters, or None to run them
+    :param AdjustmentProfile adjustment_profile: profile to adjust the saves with, or None for the default one
+    :return: for each save, the edited save (or None if it failed) and what happened to it
+    :rtype: list
+    """
+    outcomes = []
+    for lz_string in lz_strings:
+        ese = EvolveSaveEditor()
+        ese.lz_string_backend = lz_string_backend
+        ese.json_backend = json_backend
+        ese.adjustment_profile = adjustment_profile
+        try:
+            outcomes.append(_edit_export(ese, lz_string, lazy, cache, "string", patch))
+        except Exception as err:  # pylint: disable=broad-except
+            outcomes.append((None, f"{type(err).__name__}: {err}"))
+    return outcomes
+
+
+def fan_out_evolve_save(args):
+    """
+    Write a variant of the save passed in on the command line for each adjustment profile and print how each one went
+    :param args: parsed command line arguments from parse_args()
+    :return: True if every variant was written, False if any failed
+    :rtype: bool
+    """
+    if args.output_dir is not None:
+        try:
+            os.makedirs(args.output_dir, exist_ok=True)
+        except OSError as err:
+            print(f"FAILED: could not make {args.output_dir} ({type(err).__name__}: {err})")
+            return False
+    result = fan_out_save(args.filepath, args.adjustment_profiles, args.output_paths, args.jobs,
+                          args.lz_string_backend, args.lazy, args.json_backend)
+    print(f"{'OK' if result.load.success else 'FAILED'}: {result.load.filepath} ({result.load.message})")
+    if args.profile:
+        print(result.load.timings.format())
+    print_edit_summary(result.outputs, args.profile)
+    return all(output.success for output in result.outputs)
+
+
+def get_fan_out_path(filepath, profile_path, output_dir=None):
+    """
+    :param str filepath: path of the save file the variant is made of
+    :param str profile_path: path of the adjustment profile the variant is made with
+    :param str output_dir: directory to put the variant in, or None for the one the save is in
+    :return: path of the variant, like saves/save.resources_only.txt for saves/save.txt and resources_only.toml
+    :rtype: str
+    """
+    save_dir, save_name = os.path.split(filepath)
+    stem, extension = os.path.splitext(save_name)
+    profile_name = os.path.splitext(os.path.basename(profile_path))[0]
+    return os.path.join(save_dir if output_dir is None else output_dir, f"{stem}.{profile_name}{extension}")
+
+
+def fan_out_save(filepath, adjustment_profiles, output_paths, jobs=1, lz_string_backend=LZ_STRING_BACKEND_FAST,
+                 lazy=False, json_backend=JSON_BACKEND_AUTO):
+    """
+    Load one save file once and write a variant of it adjusted with each of many adjustment profiles
+    Each variant is adjusted on a view of the loaded save (see EvolveSaveEditor.make_view()), so it copies only
+    what its profile changes and shares the rest of the save with the other variants.
+    The variants are adjusted and serialized here one after the other, and compressed and written by a pool of worker
+    processes when jobs is more than 1, so compressing one variant overlaps with making the next.
+    A variant that fails doesn't stop the others, and the save file itself isn't changed.
+    :param str filepath: path of the save file to make the variants of
+    :param list adjustment_profiles: AdjustmentProfile to make each variant with
+    :param list output_paths: path to write each variant to, in the same order as adjustment_profiles
+    :param int jobs: number of worker processes to use
+    :param str lz_string_backend: one of LZ_STRING_BACKENDS
+    :param bool lazy: only parse the nodes of the save that the profiles need
+    :param str json_backend: one of JSON_BACKENDS
+    :return: how loading the save and writing each variant went
+    :rtype: FanOutResult
+    """
+    ese = EvolveSaveEditor()
+    ese.lz_string_backend = lz_string_backend
+    ese.json_backend = json_backend
+    nodes = frozenset().union(*(profile.nodes for profile in adjustment_profiles)) if lazy else None
+    if not ese.load_data_from_file(filepath, nodes):
+        return FanOutResult(EditResult(filepath, False, "could not load save data", ese.timings),
+                            [EditResult(path, False, "could not load save data") for path in output_paths])
+    load = EditResult(filepath, True, "loaded", ese.timings)
+    variants = zip(adjustment_profiles, output_paths)
+    if jobs == 1 or len(output_paths) == 1:
+        outputs = []
+        for profile, output_path in variants:
+            result, json_str = _adjust_variant(ese, profile, output_path)
+            outputs.append(result if json_str is None else
+                           _merge_variant_result(result, write_json_save(output_path, json_str, lz_string_backend)))
+        return FanOutResult(load, outputs)
+
+    import concurrent.futures
+    pending = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(output_paths))) as executor:
+        for profile, output_path in variants:
+            result, json_str = _adjust_variant(ese, profile, output_path)
+            pending.append((result, None if json_str is None else
+                            executor.submit(write_json_save, output_path, json_str, lz_string_backend)))
+        outputs = [result if future is None else _get_variant_result(result, future) for result, future in pending]
+    return FanOutResult(load, outputs)
+
+
+def _adjust_variant(ese, profile, output_path):
+    """
+    Adjust a view of the save loaded into ese with profile
+    :return: how it went so far and the json text of the variant to compress, or None when there's nothing left to do
+        because it failed, or because it is the loaded save unchanged and has been written already
+    :rtype: tuple
+    """
+    view = ese.make_view()
+    view.adjustment_profile = profile
+    try:
+        changed = view.adjust_save_data()
+        json_str = view.save_data_to_json()
+        if json_str is None:
+            if not view.write_file(output_path, view.save_data_to_string()):
+                return EditResult(output_path, False, "could not write save data", view.timings), None
+            return EditResult(output_path, True, "unchanged", view.timings), None
+    except Exception as err:  # pylint: disable=broad-except
+        # a profile that doesn't fit the save shouldn't stop the other variants
+        return EditResult(output_path, False, f"{type(err).__name__}: {err}", view.timings), None
+    return EditResult(output_path, True, "edited" if changed else "unchanged", view.timings), json_str
+
+
+def _merge_variant_result(result, written):
+    """
+    :param EditResult result: how adjusting and serializing a variant went, from _adjust_variant()
+    :param EditResult written: how compressing and writing it went, from write_json_save()
+    :return: how making the variant went, with the timings of both
+    :rtype: EditResult
+    """
+    result.timings.spans.extend(written.timings.spans)
+    return result if written.success else written._replace(timings=result.timings)
+
+
+def _get_variant_result(result, future):
+    try:
+        return _merge_variant_result(result, future.result())
+    except Exception as err:  # pylint: disable=broad-except
+        # the worker process itself died, only this variant is lost
+        return result._replace(success=False, message=f"{type(err).__name__}: {err}")
+
+
+def write_json_save(output_path, json_str, lz_string_backend=LZ_STRING_BACKEND_FAST, fsync=True):
+    """
+    Compress the json text of save data into a save and write it to a file, the part of fan_out_save()
+    that runs in the worker processes
+    :param str output_path: path of the file to write the save to
+    :param str json_str: the json text of the save data, like EvolveSaveEditor.save_data_to_json() returns
+    :param str lz_string_backend: one of LZ_STRING_BACKENDS
+    :param bool fsync: fsync the directory of the save once it replaces the file
+    :return: how it went
+    :rtype: EditResult
+    """
+    ese = EvolveSaveEditor()
+    ese.lz_string_backend = lz_string_backend
+    ese.fsync = fsync
+    try:
+        with ese.timings.span("compress"):
+            lz_string = ese.compress_lz_string(json_str, lz_string_backend)
+        if not ese.write_file(output_path, lz_string):
+            return EditResult(output_path, False, "could not write save data", ese.timings)
+    except Exception as err:  # pylint: disable=broad-except
+        return EditResult(output_path, False, f"{type(err).__name__}: {err}", ese.timings)
+    return EditResult(output_path, True, "edited", ese.timings)
+
+
+def diff_evolve_saves(args):
+    """
+    Print what changed between the two saves passed in on the command line
+    :param args: parsed command line arguments from parse_args()
+    :return: True if both saves could be loaded, False otherwise
+    :rtype: bool
+    """
+    return diff_save_files(args.filepaths[0], args.filepaths[1], args.lz_string_backend)
+
+
+def diff_save_files(old_filepath, new_filepath, lz_string_backend=LZ_STRING_BACKEND_FAST, file=None):
+    """
+    Print each value that differs between two save files, one per line with its path and old and new values
+    Only the top-level nodes whose json text differs are parsed, see SaveHashIndex.
+    :param str old_filepath: path of the save to compare from
+    :param str new_filepath: path of the save to compare to
+    :param str lz_string_backend: one of LZ_STRING_BACKENDS
+    :param file: open text file to print to, stdout when None
+    :return: True if both saves could be loaded, False otherwise
+    :rtype: bool
+    """
+    indexes = []
+    for filepath in (old_filepath, new_filepath):
+        indexes.append(_load_save_hash_index(filepath, lz_string_backend))
+        if indexes[-1] is None:
+            print(f"FAILED: {filepath} (could not load save data)", file=file)
+            return False
+    try:
+        changes = indexes[0].diff(indexes[1])
+    except ValueError as err:
+        # a node that isn't valid json, found when diff() parsed it
+        print(f"FAILED: could not compare {old_filepath} and {new_filepath} ({type(err).__name__}: {err})", file=file)
+        return False
+    for change in changes:
+        print(format_save_change(change), file=file)
+    print(f"{len(changes)} values differ between {old_filepath} and {new_filepath}", file=file)
+    return True
+
+
+def _load_save_hash_index(filepath, lz_string_backend):
+    """
+    :return: index of the save in filepath, with its top-level nodes left to be parsed when they are first needed,
+        or None if the save couldn't be loaded
+    :rtype: SaveHashIndex
+    """
+    ese = EvolveSaveEditor()
+    lz_string = ese.read_file(filepath)
+    json_str = None if lz_string is None else ese.decompress_lz_string(lz_string, lz_string_backend)
+    try:
+        save_data, unparsed_nodes = (None, None) if json_str is None else \
+            EvolveSaveEditor.parse_save_nodes(json_str, ())
+    except ValueError:
+        # it couldn't be split into nodes and isn't valid json as a whole either
+        return None
+    return SaveHashIndex(save_data, unparsed_nodes) if isinstance(save_data, dict) else None
+
+
+def format_save_change(change):
+    """
+    :param SaveChange change: a value that differs between two saves
+    :return: the path of the value, like resource.Food.amount, and its old and new values as json
+    :rtype: str
+    """
+    old, new = (("(missing)" if value is MISSING else json.dumps(value)) for value in (change.old, change.new))
+    return f"{'.'.join(str(key) for key in change.path)}: {old} -> {new}"
+
+
+def print_edit_summary(results, show_timings=False, file=None):
+    for result in results:
+        status = "OK" if result.success else "FAILED"
+        print(f"{status}: {result.filepath} ({result.message})", file=file)
+        if show_timings and result.timings is not None:
+            print(result.timings.format(), file=file)
+    failed = sum(1 for result in results if not result.success)
+    unchanged = sum(1 for result in results if result.success and result.message == "unchanged")
+    print(f"{len(results) - failed - unchanged} of {len(results)} saves edited, {unchanged} unchanged, "
+          f"{failed} failed", file=file)
+
+
+def get_logger():
+    """
+    :return: the editor's logger, configured the first time it is asked for, by one thread only
+    :rtype: logging.Logger
+    """
+    import logging
+    logger = logging.getLogger("evolvesaveeditor.py")
+    if logger.name not in _CONFIGURED_LOGGERS:
+        with _LOGGING_LOCK:
+            if logger.name not in _CONFIGURED_LOGGERS:
+                configure_logging(logger)
+                _CONFIGURED_LOGGERS.add(logger.name)
+    return logger
+
+
+def configure_logging(logger):
+    logger.setLevel("INFO")
+    if not logger.hasHandlers():
+        add_console_logging(logger)
+
+
+def add_console_logging(logger):
+    import logging
+    # stderr keeps stdout clean for the edited save when it is written there
+    console_handler = logging.StreamHandler(sys.stderr)
+    log_format = get_logging_format()
+    console_handler.setFormatter(log_format)
+    logger.addHandler(console_handler)
+
+
+def get_logging_format():
+    import logging
+    return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+def _index_building_types(building_types):
+    """
+    Build a read only building name -> building type lookup out of lists of building names per type
+    :param dict building_types: building type -> list of building names of that type
+    :return: building name -> building type
+    :rtype: types.MappingProxyType
+    :raises ValueError: if a building is listed under more than one type
+    """
+    index = {}
+    for building_type, building_names in building_types.items():
+        for building_name in building_names:
+            if building_name in index:
+                raise ValueError(f"building {building_name} is listed as both {index[building_name]} "
+                                 f"and {building_type}")
+            index[building_name] = building_type
+    return types.MappingProxyType(index)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_editor_version():
+    """
+    :return: something that changes whenever the editor's code does, so cached edits from other versions aren't used
+    :rtype: str
+    """
+    import hashlib
+    try:
+        with open(__file__, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        # the pyinstaller executable doesn't include the source, but it is rebuilt whenever the code changes
+        stat = os.stat(sys.executable)
+        return f"{sys.executable}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+@functools.lru_cache(maxsize=None)
+def _import_orjson():
+    """
+    :return: the orjson module, or None if it isn't installed
+    """
+    try:
+        import orjson
+    except ImportError:  # pragma: no cover
+        return None
+    return orjson
+
+
+def get_available_json_backends():
+    """
+    :return: the JSON_BACKENDS that can be used here, which leaves out orjson when it isn't installed
+    :rtype: tuple
+    """
+    return tuple(backend for backend in JSON_BACKENDS if backend != JSON_BACKEND_ORJSON or _import_orjson() is not None)
+
+
+def _get_orjson(json_backend, json_size=None):
+    """
+    :param str json_backend: one of JSON_BACKENDS
+    :param int json_size: length of the json text that is going to be parsed, if there is any
+    :return: the orjson module if json_backend should use it, otherwise None
+    """
+    if json_backend == JSON_BACKEND_STDLIB:
+        return None
+    if json_backend == JSON_BACKEND_AUTO and "orjson" not in sys.modules and (json_size or 0) < _ORJSON_AUTO_MIN_SIZE:
+        # importing orjson takes longer than it saves on small saves
+        return None
+    return _import_orjson()
+
+
+def _orjson_floats_differ(dumped):
+    """
+    :param bytes dumped: json written by orjson
+    :return: True if dumped might have floats that json.dumps writes differently:
+        ones with an exponent (orjson leaves out its +) or below 0.0001 (orjson doesn't use an exponent for those)
+    :rtype: bool
+    """
+    for match in _ORJSON_EXPONENT.finditer(dumped):
+        if dumped[match.start() - 1:match.start()].isdigit():
+            return True
+    position = dumped.find(b"0.0000")
+    while position != -1:
+        if not dumped[position - 1:position].isdigit():
+            return True
+        position = dumped.find(b"0.0000", position + 1)
+    return False
+
+
+def _write_temp_file(filepath, pieces):
+    """
+    Write pieces to a new temp file next to filepath and fsync it, to be renamed over it
+    The temp file is always synced, since renaming one that isn't over the file could leave neither on disk
+    after a power cut.
+    :param str filepath: path of the file the temp file is going to replace
+    :param collections.abc.Iterable pieces: text to write
+    :return: path of the temp file
+    :rtype: str
+    :raises OSError: if the temp file couldn't be written, in which case it is removed
+    """
+    directory, name = os.path.split(filepath)
+    temp_path = os.path.join(directory, f".{name}.{os.urandom(6).hex()}.tmp")
+    # created the same way open() creates files, so a new save gets the permissions it always would have
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        file = open(fd, "wb", buffering=WRITE_BUFFER_SIZE)
+    except BaseException:
+        os.close(fd)
+        os.remove(temp_path)
+        raise
+    try:
+        with file:
+            with contextlib.suppress(FileNotFoundError):
+                # the file replacing a save keeps the save's permissions, like writing over it in place did
+                os.chmod(temp_path, os.stat(filepath).st_mode & 0o7777)
+            for piece in pieces:
+                file.write(piece.encode())
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+    return temp_path
+
+
+def _fsync_file(filepath):
+    # windows can only fsync files that are open for writing
+    fd = os.open(filepath, os.O_RDWR if os.name == "nt" else os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_directory(directory):
+    # makes renames in the directory last, windows can't open directories and doesn't need to
+    if os.name != "nt":
+        _fsync_file(directory or os.curdir)
+
+
+def _copy_with_changes(node, changes):
+    """
+    Copy-on-write helper for the adjusters, which never modify the save data they are passed.
+    Since an adjuster gives back the very node it was passed when it has nothing to change,
+    whether it changed anything is just whether its result is its input.
+    :param dict node: save data node to update
+    :param dict changes: keys of node to set, values that are equal to the ones in node (and of the same type,
+        so 1000.0 still replaces 1000) don't count as changes
+    :return: node itself if nothing changed, otherwise a shallow copy of node with changes applied
+    :rtype: dict
+    """
+    changed = {key: value for key, value in changes.items()
+               if key not in node or (node[key] is not value and
+                                      (type(node[key]) is not type(value) or node[key] != value))}
+    if not changed:
+        return node
+    updated = dict(node)
+    updated.update(changed)
+    return updated
+
+
+def _iter_save_members(save_data, unparsed_nodes):
+    """
+    :param dict save_data: the entire evolve savefile json data, or the part of it that was parsed
+    :param dict unparsed_nodes: top-level key -> json text or None, as returned by parse_save_nodes()
+    :return: (key, json text or None when the value is in save_data) for each top-level member to serialize in order,
+        or None when save_data has keys that aren't strings, which only the json module knows how to write
+    :rtype: collections.abc.Iterator
+    """
+    if unparsed_nodes is None:
+        if not all(isinstance(key, str) for key in save_data):
+            return None
+        return ((key, None) for key in save_data)
+    return ((key, None if key in save_data else json_text)
+            for key, json_text in itertools.chain(unparsed_nodes.items(),
+                                                  ((key, None) for key in save_data if key not in unparsed_nodes))
+            # an adjuster removed the node when it isn't in save_data and has no json text
+            if key in save_data or json_text is not None)
+
+
+def _add_patch_operations(patch, path, original, adjusted):
+    """
+    Append the JSON Patch operations that turn original into adjusted to patch
+    Values that are the very same object in both are skipped without looking inside them,
+    which with copy-on-write edits is everything outside of the nodes that were copied.
+    :param list patch: operations so far
+    :param str path: JSON Pointer of original and adjusted
+    :return: nothing
+    """
+    if original is adjusted:
+        return
+    if isinstance(original, dict) and isinstance(adjusted, dict):
+        for key in original:
+            if key not in adjusted:
+                patch.append({"op": "remove", "path": f"{path}/{_escape_json_pointer_token(key)}"})
+        for key, value in adjusted.items():
+            child_path = f"{path}/{_escape_json_pointer_token(key)}"
+            if key in original:
+                _add_patch_operations(patch, child_path, original[key], value)
+            else:
+                patch.append({"op": "add", "path": child_path, "value": value})
+    elif type(original) is not type(adjusted) or original != adjusted:
+        patch.append({"op": "replace", "path": path, "value": adjusted})
+
+
+def _escape_json_pointer_token(key):
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _split_json_pointer(pointer):
+    """
+    :param str pointer: RFC 6901 JSON Pointer, like "/resource/Food/amount"
+    :return: the keys and array indexes the pointer goes through, none for the whole document
+    :rtype: list
+    :raises ValueError: if pointer isn't a JSON Pointer
+    """
+    if not isinstance(pointer, str) or pointer[:1] not in ("", "/"):
+        raise ValueError(f"{pointer!r} is not a JSON Pointer")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:]]
+
+
+_JSON_DECODER = json.JSONDecoder()
+# names of the loggers get_logger() has configured, so threads logging at once don't each add a handler
+_CONFIGURED_LOGGERS = set()
+_LOGGING_LOCK = threading.Lock()
+# auto only imports orjson for json at least this long, since its import costs more than it saves on smaller saves
+_ORJSON_AUTO_MIN_SIZE = 256 * 1024
+# orjson reads integers of 19 digits or more as floats when they don't fit in 64 bits,
+# turning every digit into 0 makes them quick to look for
+_DIGITS_TO_ZERO = str.maketrans("123456789", "000000000")
+_LONG_DIGIT_RUN = "0" * 19
+_ORJSON_EXPONENT = re.compile(rb"e[-0-9]")
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON_SCALAR = re.compile(r"[-+.0-9A-Za-z]+")
+# a quote escaped by the backslash before it, which isn't itself escaped by an odd number of backslashes before that
+_JSON_ESCAPED_QUOTE = re.compile(r'(?<!\\)(?:\\\\)*\\"')
+# SaveHashIndex splits json text objects at least this long into their members, and parses shorter ones,
+# which is quicker than splitting them when most of what is in them needs comparing anyway
+_HASH_INDEX_SPLIT_MIN_SIZE = 2048
+
+
+def _scan_top_level(json_str, keys_to_parse=(), parse_value=None):
+    """
+    Find where each member of a top-level json object is, parsing only the values of keys_to_parse.
+    Other objects and arrays are skipped by counting their brackets, which is a lot faster than parsing them,
+    but gets thrown off by brackets inside strings. ValueError is raised when the result doesn't hold together,
+    and the caller should parse the whole of json_str instead.
+    :param str json_str: text of a json object
+    :param keys_to_parse: keys whose values should be parsed
+    :type keys_to_parse: collections.abc.Container
+    :param parse_value: function to parse the json text of a value with, the json module's decoder when None
+    :type parse_value: collections.abc.Callable
+    :return: (key, value start index, value end index, parsed value or None) for each member of the object, in order
+    :rtype: list
+    :raises ValueError: if json_str could not be split into members
+    """
+    pos = _JSON_WHITESPACE.match(json_str).end()
+    if json_str[pos:pos + 1] != "{":
+        raise ValueError("save data is not a json object")
+    pos = _JSON_WHITESPACE.match(json_str, pos + 1).end()
+    spans = []
+    while json_str[pos:pos + 1] != "}":
+        if spans:
+            if json_str[pos:pos + 1] != ",":
+                raise ValueError(f"expected ',' at {pos}")
+            pos = _JSON_WHITESPACE.match(json_str, pos + 1).end()
+        if json_str[pos:pos + 1] != '"':
+            raise ValueError(f"expected a key at {pos}")
+        key, pos = json.decoder.scanstring(json_str, pos + 1)
+        pos = _JSON_WHITESPACE.match(json_str, pos).end()
+        if json_str[pos:pos + 1] != ":":
+            raise ValueError(f"expected ':' at {pos}")
+        start = _JSON_WHITESPACE.match(json_str, pos + 1).end()
+        if key in keys_to_parse and parse_value is None:
+            value, end = _JSON_DECODER.raw_decode(json_str, start)
+        elif key in keys_to_parse:
+            end = _skip_json_value(json_str, start)
+            value = parse_value(json_str[start:end])
+        else:
+            value, end = None, _skip_json_value(json_str, start)
+        spans.append((key, start, end, value))
+        pos = _JSON_WHITESPACE.match(json_str, end).end()
+    if json_str[pos + 1:].strip():
+        raise ValueError(f"extra data after the json object at {pos + 1}")
+    return spans
+
+
+def _skip_json_value(json_str, start):
+    char = json_str[start:start + 1]
+    if char == '"':
+        return json.decoder.scanstring(json_str, start + 1)[1]
+    if char not in ("{", "["):
+        # a number, true, false or null
+        match = _JSON_SCALAR.match(json_str, start)
+        if match is None:
+            raise ValueError(f"expected a value at {start}")
+        return match.end()
+
+    close_char = "}" if char == "{" else "]"
+    depth = 1
+    pos = start + 1
+    while depth:
+        close = json_str.find(close_char, pos)
+        if close == -1:
+            raise ValueError(f"unterminated value at {start}")
+        depth += json_str.count(char, pos, close) - 1
+        pos = close + 1
+    # a bracket in a string would have moved the end into the middle of a string,
+    # leaving an odd number of quotes that aren't escaped
+    quotes = json_str.count('"', start, pos)
+    if json_str.find("\\", start, pos) != -1:
+        quotes -= len(_JSON_ESCAPED_QUOTE.findall(json_str, start, pos))
+    if quotes % 2:
+        raise ValueError(f"could not find the end of the value at {start}")
+    return pos
+
+
+class _TopLevelParser:
+    """
+    Parses a json object given a piece at a time, into the same save data and unparsed nodes parse_save_nodes() gives.
+    As the text comes in it is split into the object's members, skipping over their values by counting brackets like
+    _scan_top_level() does, and ValueError is raised when the result doesn't hold together. The values are parsed
+    by close(), one at a time with the text of each dropped once it is parsed. By then whatever was making the text,
+    like iter_decompress_from_base64(), is done with, and the memory it took can go to the parsed values instead.
+    Parsed values take several times the memory of their text, so parsing each as soon as it was read would hold them
+    alongside the decompressor's dictionary, which raises the peak memory of streaming a save rather than lowering it.
+    """
+
+    def __init__(self, nodes=None, parse_value=json.loads):
+        """
+        :param nodes: names of the top-level nodes to parse, or None for all of them
+        :type nodes: collections.abc.Collection
+        :param parse_value: function to parse the json text of a member's value with
+        :type parse_value: collections.abc.Callable
+        """
+        self.nodes = nodes
+        self.parse_value = parse_value
+        self._text = ""
+        self._position = 0
+        self._started = False
+        self._finished = False
+        # (key, json text of the value) of each member read so far
+        self._members = []
+
+    def feed(self, text):
+        """
+        :param str text: the next piece of the json text
+        :raises ValueError: if the json text isn't an object
+        """
+        self._text = self._text[self._position:] + text
+        self._position = 0
+        while self._read(final=False):
+            pass
+
+    def close(self):
+        """
+        :return: save data holding the parsed nodes, and top-level key -> json text of each node that wasn't parsed
+            (None for the parsed ones) in the order they appear, or None if everything was parsed
+        :rtype: tuple
+        :raises ValueError: if the json text isn't an object, or couldn't be split into its members
+        """
+        while self._read(final=True):
+            pass
+        if not self._finished:
+            raise ValueError("json text ended before the object did")
+        if _JSON_WHITESPACE.match(self._text, self._position).end() != len(self._text):
+            raise ValueError("extra data after the json object")
+        save_data = {}
+        unparsed_nodes = {}
+        hidden_nodes = set()
+        members, self._members = self._members, []
+        for index, (key, json_text) in enumerate(members):
+            members[index] = None
+            if self.nodes is None or key in self.nodes:
+                save_data[key] = self.parse_value(json_text)
+                unparsed_nodes[key] = None
+            else:
+                unparsed_nodes[key] = json_text
+                hidden_nodes.update(node for node in self.nodes if f'"{node}"' in json_text)
+        if self.nodes is None:
+            return save_data, None
+        # a node hidden inside one that was skipped over means the skipping went wrong
+        if hidden_nodes.difference(unparsed_nodes):
+            raise ValueError("not every node was found")
+        return save_data, unparsed_nodes
+
+    def _read(self, final):
+        """
+        Read the next part of the object from the text given so far
+        :param bool final: whether all of the text has been given
+        :return: True if a part was read and there may be more, False if more text is needed
+        :rtype: bool
+        """
+        text = self._text
+        pos = _JSON_WHITESPACE.match(text, self._position).end()
+        if pos == len(text) or self._finished:
+            return False
+        if not self._started:
+            if text[pos] != "{":
+                raise ValueError("save data is not a json object")
+            self._started = True
+            self._position = pos + 1
+            return True
+        if text[pos] == "}":
+            self._finished = True
+            self._position = pos + 1
+            return False
+        return self._read_member(text, pos, final)
+
+    def _read_member(self, text, pos, final):
+        read = self._read_key(text, pos)
+        if read is None:
+            return False
+        key, start = read
+        try:
+            end = _skip_json_value(text, start)
+        except ValueError:
+            # the value isn't all there yet, or brackets in its strings threw off skipping over it
+            if final:
+                raise
+            return False
+        # a number at the end of the text might go on in the next piece
+        if end == len(text) and not final:
+            return False
+        self._members.append((key, text[start:end]))
+        self._position = end
+        return True
+
+    def _read_key(self, text, pos):
+        """
+        :return: the key of the member at pos and where its value starts, or None if more text is needed
+        :rtype: tuple
+        """
+        if self._members:
+            if text[pos] != ",":
+                raise ValueError(f"expected ',' at {pos}")
+            pos = _JSON_WHITESPACE.match(text, pos + 1).end()
+        if pos == len(text):
+            return None
+        if text[pos] != '"':
+            raise ValueError(f"expected a key at {pos}")
+        try:
+            key, pos = json.decoder.scanstring(text, pos + 1)
+        except json.JSONDecodeError:
+            return None
+        pos = _JSON_WHITESPACE.match(text, pos).end()
+        if pos == len(text):
+            return None
+        if text[pos] != ":":
+            raise ValueError(f"expected ':' at {pos}")
+        return key, _JSON_WHITESPACE.match(text, pos + 1).end()
+
+
+class LZStringCodec:
+    """
+    LZString Base64 codec that produces the same output as lzstring.LZString's *Base64 methods.
+
+    The lzstring package moves one bit at a time through dict lookups and string concatenation.
+    This codec does the Base64 layer in bulk with binascii, and packs/unpacks whole codes at once
+    through an integer bit buffer. To make that work, every byte is bit-reversed so the stream can be read
+    least significant bit first, which is the order lzstring builds its values in.
+    """
+    BASE64_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+    _INVALID_BASE64 = re.compile(r"[^A-Za-z0-9+/=]")
+    _REVERSED_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+    # bits are moved from the buffer to the output 48 at a time, which is 6 bytes or 8 base64 characters
+    _CHUNK_MASK = (1 << 48) - 1
+    # iter_compress_to_base64() gives back the compressed text in pieces of this many 48 bit chunks
+    _STREAM_FLUSH_CHUNKS = 8192
+    # iter_decompress_from_base64() gives back the decompressed text in blocks of at least this many characters
+    _STREAM_BLOCK_SIZE = 64 * 1024
+    # iter_decompress_from_base64() keeps this many characters of the text it decompressed, for the dictionary
+    # entries in it. Entries that were last seen before then are put back together a character at a time
+    _STREAM_HISTORY_SIZE = 1024 * 1024
+
+    @staticmethod
+    def compress_to_base64(uncompressed):
+        """
+        Compress a string the same way lzstring.LZString.compressToBase64() does
+
+        :param uncompressed: text to compress
+        :type uncompressed: str or None
+        :return: base64 compressed text, padded with = to a multiple of 4 characters
+        :rtype: str
+        """
+        if uncompressed is None:
+            return ""
+        return "".join(LZStringCodec.iter_compress_to_base64((uncompressed,)))
+
+    @staticmethod
+    def iter_compress_to_base64(chunks):  # noqa: C901 - kept as one loop, calls are too slow here
+        """
+        Compress text given a piece at a time, giving back the base64 compressed text as it is made
+        Only the compressor's dictionary is kept, not the text or the compressed text.
+
+        :param chunks: pieces of the text to compress, like an iterative json encoder gives
+        :type chunks: collections.abc.Iterable
+        :return: pieces of the compressed text, which joined together are what compress_to_base64() returns
+        :rtype: collections.abc.Iterator
+        """
+        chunks_out = []
+        buffer = 0
+        buffered_bits = 0
+        total_bits = 0
+        written_chars = 0
+
+        # phrases are keyed by (code of the phrase minus its last character, last character),
+        # which identifies them as uniquely as lzstring's string keys without building the strings
+        char_codes = {}
+        phrases = {}
+        to_create = set()
+        enlarge_in = 2  # compensate for the first entry which should not count
+        dict_size = 3
+        num_bits = 2
+        word = None
+        word_char = None  # set when word is a single character
+
+        # codes get packed into the buffer least significant bit first, and flushed 48 bits at a time,
+        # which is 6 bytes or 8 base64 characters. Every _STREAM_FLUSH_CHUNKS flushes are encoded and given back
+        chunk_mask = LZStringCodec._CHUNK_MASK
+        flush_chunks = LZStringCodec._STREAM_FLUSH_CHUNKS
+        append = chunks_out.append
+        for char in itertools.chain(itertools.chain.from_iterable(chunks), (None,)):
+            if char is not None:
+                code = char_codes.get(char)
+                if code is None:
+                    code = char_codes[char] = dict_size
+                    dict_size += 1
+                    to_create.add(char)
+                if word is None:
+                    word = code
+                    word_char = char
+                    continue
+                phrase = (word, char)
+                phrase_code = phrases.get(phrase)
+                if phrase_code is not None:
+                    word = phrase_code
+                    word_char = None
+                    continue
+            elif word is None:
+                break
+
+            # output the code for word
+            if word_char is not None and word_char in to_create:
+                value = ord(word_char)
+                if value < 256:
+                    # a 0 marker followed by an 8 bit character
+                    buffer |= value << (buffered_bits + num_bits)
+                    width = num_bits + 8
+                else:
+                    # a 1 marker followed by a 16 bit character
+                    buffer |= (1 | (value & 0xFFFF) << num_bits) << buffered_bits
+                    width = num_bits + 16
+                enlarge_in -= 1
+                if enlarge_in == 0:
+                    enlarge_in = 1 << num_bits
+                    num_bits += 1
+                to_create.discard(word_char)
+            else:
+                buffer |= (word & ((1 << num_bits) - 1)) << buffered_bits
+                width = num_bits
+            buffered_bits += width
+            total_bits += width
+            if buffered_bits >= 48:
+                append((buffer & chunk_mask).to_bytes(6, "little"))
+                buffer >>= 48
+                buffered_bits -= 48
+                if len(chunks_out) == flush_chunks:
+                    packed = b"".join(chunks_out).translate(LZStringCodec._REVERSED_BITS)
+                    chunks_out.clear()
+                    written_chars += flush_chunks * 8
+                    yield binascii.b2a_base64(packed, newline=False).decode("ascii")
+            enlarge_in -= 1
+            if enlarge_in == 0:
+                enlarge_in = 1 << num_bits
+                num_bits += 1
+
+            if char is None:
+                break
+            phrases[phrase] = dict_size
+            dict_size += 1
+            word = code
+            word_char = char
+
+        if word is None:
+            # lzstring still counts the (missing) final word against the dictionary size
+            enlarge_in -= 1
+            if enlarge_in == 0:
+                num_bits += 1
+        # mark the end of the stream
+        buffer |= 2 << buffered_bits
+        buffered_bits += num_bits
+        total_bits += num_bits
+
+        # there is always at least one bit of padding to finish off the last character
+        char_count = total_bits // 6 + 1 - written_chars
+        # the extra zero byte makes sure binascii has enough real bits to fill that last character
+        append(buffer.to_bytes((buffered_bits + 7) // 8 + 1, "little"))
+        packed = b"".join(chunks_out).translate(LZStringCodec._REVERSED_BITS)
+        encoded = binascii.b2a_base64(packed, newline=False)[:char_count].decode("ascii")
+        yield encoded + "=" * (-(written_chars + char_count) % 4)
+
+    @staticmethod
+    def decompress_from_base64(compressed):  # noqa: C901 - kept as one loop, calls are too slow here
+        """
+        Decompress a string the same way lzstring.LZString.decompressFromBase64() does
+
+        Like lzstring, this raises IndexError when the data runs out before the end of stream marker,
+        and returns None when the data refers to a dictionary entry that doesn't exist.
+
+        :param compressed: base64 compressed text
+        :type compressed: str or None
+        :return: the decompressed text, or None if compressed was empty or invalid
+        :rtype: str or None
+        """
+        if compressed is None:
+            return ""
+        if compressed == "":
+            return None
+
+        # lzstring fetches the next character as soon as the current one is used up,
+        # so reading the last bit before the end of the data (or before an invalid character) is an error
+        invalid = LZStringCodec._INVALID_BASE64.search(compressed)
+        usable_chars = invalid.start() if invalid else len(compressed)
+        if usable_chars == 0:
+            raise ValueError(f"invalid base64 character {compressed[0]!r} in compressed data")
+        available_bits = usable_chars * 6 - 1
+
+        text = compressed[:usable_chars]
+        data = LZStringCodec._decode_base64(text + "A" * (-len(text) % 4)) + bytes(8)
+        reader = _BitReader(memoryview(data), available_bits)
+        read = reader.read
+
+        first = read(2)
+        if first == 0:
+            char = chr(read(8))
+        elif first == 1:
+            char = chr(read(16))
+        elif first == 2:
+            return ""
+        else:
+            raise ValueError("compressed data does not start with a character")
+
+        # dictionary slots 0-2 are reserved for the control codes
+        dictionary = ["", "", "", char]
+        enlarge_in = 4
+        num_bits = 3
+        word = char
+        result = [char]
+        append = result.append
+        while True:
+            code = read(num_bits)
+            if code == 0:
+                dictionary.append(chr(read(8)))
+                code = len(dictionary) - 1
+                enlarge_in -= 1
+            elif code == 1:
+                dictionary.append(chr(read(16)))
+                code = len(dictionary) - 1
+                enlarge_in -= 1
+            elif code == 2:
+                return "".join(result)
+
+            if enlarge_in == 0:
+                enlarge_in = 1 << num_bits
+                num_bits += 1
+
+            if code < len(dictionary):
+                entry = dictionary[code]
+            elif code == len(dictionary):
+                entry = word + word[0]
+            else:
+                return None
+            append(entry)
+
+            dictionary.append(word + entry[0])
+            enlarge_in -= 1
+            word = entry
+            if enlarge_in == 0:
+                enlarge_in = 1 << num_bits
+                num_bits += 1
+
+    @staticmethod
+    def iter_decompress_from_base64(chunks):  # noqa: C901 - kept as one loop, calls are too slow here
+        """
+        Decompress base64 text given a piece at a time, the same way decompress_from_base64() does all of it
+
+        The compressed text is decoded as it comes in and the decompressed text given back in blocks as it is made.
+        Where decompress_from_base64() keeps a string for every dictionary entry, which takes several times the memory
+        of the text, this keeps where in the text each entry was last seen, and only the last _STREAM_HISTORY_SIZE
+        characters of the text. Every entry is also kept as the entry it adds a character to and that character,
+        so the few that haven't been seen since their text was dropped are put back together from those.
+        The dictionary still takes about 14 bytes for every code in the compressed text, so the memory this needs
+        grows with the compressed text, but not with the decompressed text past _STREAM_HISTORY_SIZE.
+
+        :param chunks: pieces of base64 compressed text, like the blocks of a file being read
+        :type chunks: collections.abc.Iterable
+        :return: pieces of the decompressed text, which joined together are what decompress_from_base64() returns
+        :rtype: collections.abc.Iterator
+        :raises IndexError: if the data runs out before the end of stream marker, or there isn't any
+        :raises ValueError: if the data refers to a dictionary entry that doesn't exist
+        """
+        reader = _StreamBitReader(LZStringCodec._iter_base64_blocks(chunks))
+        read = reader.read
+
+        first = read(2)
+        if first == 0:
+            char = chr(read(8))
+        elif first == 1:
+            char = chr(read(16))
+        elif first == 2:
+            return
+        else:
+            raise ValueError("compressed data does not start with a character")
+
+        # entry i of the dictionary is the lengths[i] characters of text at starts[i] (counted from the start of the
+        # decompressed text), and also entry prefixes[i] followed by the character lasts[i].
+        # history holds the text from history_start up to the last block that was given back, and the entries made
+        # since then are kept in recent instead. Older entries that come up again in the block are moved to where
+        # they are in it (moved_codes to moved_starts) once it is added to history, so the ones in use stay in it.
+        # slots 0-2 are reserved for the control codes, slot 0 doubles as the empty entry the others are made from
+        history = ""
+        history_start = 0
+        history_size = LZStringCodec._STREAM_HISTORY_SIZE
+        starts = array.array("I", (0, 0, 0, 0))
+        lengths = array.array("I", (0, 0, 0, 1))
+        prefixes = array.array("I", (0, 0, 0, 0))
+        lasts = array.array("H", (0, 0, 0, ord(char)))
+        dictionary = (starts, lengths, prefixes, lasts)
+        recent = ["", "", "", char]
+        recent_start = 0
+        moved_codes = array.array("I")
+        moved_starts = array.array("I")
+        block = [char]
+        block_size = 1
+        block_limit = LZStringCodec._STREAM_BLOCK_SIZE
+        enlarge_in = 4
+        num_bits = 3
+        word = char
+        word_code = 3
+        word_start = 0
+        append = block.append
+        add_start, add_length, add_prefix, add_last, add_recent = (
+            starts.append, lengths.append, prefixes.append, lasts.append, recent.append)
+        move_code, move_start = moved_codes.append, moved_starts.append
+        while True:
+            code = read(num_bits)
+            if code < 2:
+                char = chr(read(8 if code == 0 else 16))
+                code = len(starts)
+                add_start(word_start + len(word))
+                add_length(1)
+                add_prefix(0)
+                add_last(ord(char))
+                add_recent(char)
+                enlarge_in -= 1
+            elif code == 2:
+                if block:
+                    yield "".join(block)
+                return
+
+            if enlarge_in == 0:
+                enlarge_in = 1 << num_bits
+                num_bits += 1
+
+            if code >= recent_start:
+                if code < len(starts):
+                    entry = recent[code - recent_start]
+                elif code == len(starts):
+                    entry = word + word[0]
+                else:
+                    raise ValueError(f"compressed data refers to dictionary entry {code}, which doesn't exist")
+            else:
+                start = starts[code] - history_start
+                if start >= 0:
+                    entry = history[start:start + lengths[code]]
+                    move_code(code)
+                    move_start(word_start + len(word))
+                else:
+                    # the entries it is made from start where it does, so they are moved along with it
+                    entry, chain = LZStringCodec._rebuild_entry(code, dictionary, history, history_start)
+                    moved_codes.extend(chain)
+                    moved_starts.extend(itertools.repeat(word_start + len(word), len(chain)))
+            append(entry)
+            block_size += len(entry)
+
+            # the new entry is word and the first character of entry, which comes right after it
+            add_start(word_start)
+            add_length(len(word) + 1)
+            add_prefix(word_code)
+            add_last(ord(entry[0]))
+            add_recent(word + entry[0])
+            enlarge_in -= 1
+            word_start += len(word)
+            word = entry
+            word_code = code
+            if enlarge_in == 0:
+                enlarge_in = 1 << num_bits
+                num_bits += 1
+
+            if block_size >= block_limit:
+                text = "".join(block)
+                history += text
+                if len(history) > history_size:
+                    history_start += len(history) - history_size
+                    history = history[-history_size:]
+                yield text
+                for moved_code, moved_start in zip(moved_codes, moved_starts):
+                    starts[moved_code] = moved_start
+                del moved_codes[:], moved_starts[:]
+                block.clear()
+                block_size = 0
+                recent.clear()
+                recent_start = len(starts)
+
+    @staticmethod
+    def _rebuild_entry(code, dictionary, history, history_start):
+        """
+        Put together a dictionary entry of iter_decompress_from_base64() whose text is no longer in its history,
+        from the entries it was made from
+        :param int code: the entry
+        :param tuple dictionary: starts, lengths, prefixes and lasts of the entries
+        :param str history: the text that is still kept
+        :param int history_start: where history starts in the decompressed text
+        :return: the text of the entry, and the codes of it and the entries it was made from that weren't in history
+        :rtype: tuple
+        """
+        starts, lengths, prefixes, lasts = dictionary
+        chain = []
+        while code and starts[code] < history_start:
+            chain.append(code)
+            code = prefixes[code]
+        chars = [chr(lasts[link]) for link in reversed(chain)]
+        if code:
+            start = starts[code] - history_start
+            chars.insert(0, history[start:start + lengths[code]])
+        return "".join(chars), chain
+
+    @staticmethod
+    def _iter_base64_blocks(chunks):
+        """
+        :param collections.abc.Iterable chunks: pieces of base64 compressed text
+        :return: (bit-reversed bytes, number of base64 characters they were decoded from) for the base64 up to
+            the first invalid character, in blocks of whole characters
+        :rtype: collections.abc.Iterator
+        """
+        carry = ""
+        for chunk in chunks:
+            invalid = LZStringCodec._INVALID_BASE64.search(chunk)
+            text = carry + (chunk if invalid is None else chunk[:invalid.start()])
+            usable_chars = len(text) - len(text) % 4
+            carry = text[usable_chars:]
+            if usable_chars:
+                yield LZStringCodec._decode_base64(text[:usable_chars]), usable_chars
+            if invalid is not None:
+                break
+        if carry:
+            yield LZStringCodec._decode_base64(carry + "A" * (-len(carry) % 4)), len(carry)
+
+    @staticmethod
+    def _decode_base64(text):
+        # '=' decodes to 64 in lzstring but only the low 6 bits get read, so it acts the same as 'A'
+        return binascii.a2b_base64(text.replace("=", "A")).translate(LZStringCodec._REVERSED_BITS)
+
+
+class _BitReader:
+    """Reads little endian bit fields from a buffer, 64 bits at a time"""
+
+    def __init__(self, data, available_bits):
+        self.data = data
+        self.available_bits = available_bits
+        self.position = 0
+        self.buffer = 0
+        self.buffered_bits = 0
+
+    def read(self, width):
+        self.available_bits -= width
+        if self.available_bits < 0:
+            raise IndexError("compressed data ended before the end of stream marker")
+        while self.buffered_bits < width:
+            position = self.position
+            self.buffer |= int.from_bytes(self.data[position:position + 8], "little") << self.buffered_bits
+            self.buffered_bits += 64
+            self.position = position + 8
+        value = self.buffer & ((1 << width) - 1)
+        self.buffer >>= width
+        self.buffered_bits -= width
+        return value
+
+
+class _StreamBitReader(_BitReader):
+    """Reads little endian bit fields from blocks of bytes, fetching the next block when it runs out of bits"""
+
+    def __init__(self, blocks):
+        """
+        :param blocks: (bytes, base64 characters they were decoded from), like LZStringCodec._iter_base64_blocks() gives
+        :type blocks: collections.abc.Iterator
+        """
+        super().__init__(b"", -1)
+        self.blocks = blocks
+
+    def read(self, width):
+        self.available_bits -= width
+        if self.available_bits < 0:
+            self._fetch()
+        while self.buffered_bits < width:
+            piece = self.data[self.position:self.position + 8]
+            self.buffer |= int.from_bytes(piece, "little") << self.buffered_bits
+            self.buffered_bits += 8 * len(piece)
+            self.position += len(piece)
+        value = self.buffer & ((1 << width) - 1)
+        self.buffer >>= width
+        self.buffered_bits -= width
+        return value
+
+    def _fetch(self):
+        # lzstring fetches the next character as soon as the current one is used up,
+        # so reading the last bit is an error, hence available_bits starting at -1
+        for data, chars in self.blocks:
+            self.data = self.data[self.position:] + data
+            self.position = 0
+            self.available_bits += chars * 6
+            if self.available_bits >= 0:
+                return
+        raise IndexError("compressed data ended before the end of stream marker")
+
+
+class TimingReport:
+    """
+    Wall clock time spent in each stage of editing a save, in the order the stages ran.
+    Stages are things like "read", "decompress", "parse", one per adjuster, "serialize", "compress" and "write".
+    Saves that are streamed have "stream_load" in place of the first three, and "stream_save" for the last three.
+    fill_resources, stack_resources and fill_population share the single "adjust_resources" stage.
     """
-    args = parse_args(sys.argv[1:])
-    edit_evolve_save(args)
 
+    def __init__(self):
+        self.spans = []
 
-def parse_args(args):
+    @contextlib.contextmanager
+    def span(self, stage):
+        """
+        Time the code in a with block as one stage
+        :param str stage: name of the stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((stage, time.perf_counter() - start))
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds in self.spans)
+
+    def as_dict(self):
+        """
+        :return: stage -> seconds spent in it, in the order the stages first ran
+        :rtype: dict
+        """
+        stages = {}
+        for stage, seconds in self.spans:
+            stages[stage] = stages.get(stage, 0) + seconds
+        return stages
+
+    def format(self):
+        """
+        :return: one line per stage with the time spent in it and its share of the total
+        :rtype: str
+        """
+        total = self.total
+        lines = []
+        for stage, seconds in self.as_dict().items():
+            share = seconds / total * 100 if total else 0
+            lines.append(f"{stage:>24} {seconds * 1000:10.3f} ms {share:5.1f}%")
+        lines.append(f"{'total':>24} {total * 1000:10.3f} ms")
+        return "\n".join(lines)
+
+
+class ResultCache:
     """
-        Parses and validates command line arguments
-        :param list args: arguments passed into the script (usually sys.argv[1:])
-        :return: arguments parsed into a neat object
+    Edited saves stored in an SQLite database, keyed by a hash of the exported save and of the settings it was
+    edited with, so a save that was edited before skips decompressing, parsing, adjusting and compressing.
+    Once the stored saves add up to more than max_bytes, the least recently used ones are evicted.
+    The database is opened the first time the cache is used in each process, so a cache can be passed to workers.
+    Threads can share a cache, they take turns using its connection.
+    If it can't be used (it is locked for too long, corrupt or the disk is full) saves are edited without it.
+    """
+    # seconds a save's last use is kept for before get() records a new one, so a save that is looked up
+    # over and over doesn't write to the database every time. Evictions go by the last use to this resolution
+    USED_RESOLUTION = 60 * 60
+
+    def __init__(self, path, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connection = None
+        # bytes stored as far as this process knows, other processes add to it too so it gets recounted before evicting
+        self._stored_bytes = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"path": self.path, "max_bytes": self.max_bytes, "_connection": None, "_stored_bytes": None,
+                "_failed": self._failed}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, lz_string, settings):
         """
-    parser = argparse.ArgumentParser(
-        description="Save editor for game evolve")
-    parser.add_argument("filepath", help="path to save file", type=argparse.FileType("r+"))
-    parsed_args = parser.parse_args(args)
-    filename = parsed_args.filepath.name
-    parsed_args.filepath.close()
-    parsed_args.filepath = filename
-    return parsed_args
+        :param str lz_string: the save, as exported from the game
+        :param dict settings: what the save is edited with, like EvolveSaveEditor.get_settings()
+        :return: the edited save, or None if it isn't in the cache
+        :rtype: str
+        """
+        if self._failed:
+            return None
+        with self._lock, self._guard():
+            connection = self._connect()
+            key = self._get_key(lz_string, settings)
+            row = connection.execute("SELECT save, used FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                now = time.time()
+                if now - row[1] >= self.USED_RESOLUTION:
+                    connection.execute("UPDATE results SET used = ? WHERE key = ?", (now, key))
+                return row[0]
+        return None
 
+    def put(self, lz_string, settings, edited):
+        """
+        :param str lz_string: the save, as exported from the game
+        :param dict settings: what the save was edited with, like EvolveSaveEditor.get_settings()
+        :param str edited: the edited save
+        :return: nothing
+        """
+        if self._failed:
+            return
+        with self._lock, self._guard():
+            connection = self._connect()
+            connection.execute("INSERT OR REPLACE INTO results (key, save, size, used) VALUES (?, ?, ?, ?)",
+                               (self._get_key(lz_string, settings), edited, len(edited), time.time()))
+            if self._stored_bytes is None:
+                self._stored_bytes = self._count_stored_bytes()
+            else:
+                self._stored_bytes += len(edited)
+            if self._stored_bytes > self.max_bytes:
+                self._evict()
 
-def edit_evolve_save(args):
-    ese = EvolveSaveEditor()
-    ese.load_data_from_file(args.filepath)
-    ese.adjust_save_data()
-    ese.save_data_to_file(args.filepath)
+    def close(self):
+        with self._lock:
+            self._close()
 
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
 
-def get_logger():
-    logger = logging.getLogger("evolvesaveeditor.py")
-    configure_logging(logger)
-    return logger
+    @contextlib.contextmanager
+    def _guard(self):
+        import sqlite3
+        try:
+            yield
+        except (sqlite3.Error, OSError) as err:
+            # an edit shouldn't fail because of the cache, stop using it instead
+            self._failed = True
+            self._close()
+            get_logger().warning(f"result cache {self.path} can't be used, editing without it: {err}")
 
+    def _connect(self):
+        if self._connection is None:
+            import sqlite3
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # autocommit, with a journal that lets other processes read while one writes
+            # the connection is shared by the threads using the cache, _lock keeps them from using it at once
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS results "
+                                     "(key BLOB PRIMARY KEY, save TEXT NOT NULL, size INTEGER NOT NULL, "
+                                     "used REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        return self._connection
 
-def configure_logging(logger):
-    logger.setLevel(logging.INFO)
-    if not logger.hasHandlers():
-        add_console_logging(logger)
+    @staticmethod
+    def _get_key(lz_string, settings):
+        import hashlib
+        key = hashlib.sha256(json.dumps(settings, sort_keys=True).encode())
+        key.update(b"\0")
+        key.update(lz_string.encode())
+        return key.digest()
 
+    def _count_stored_bytes(self):
+        return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
 
-def add_console_logging(logger):
-    console_handler = logging.StreamHandler(sys.stdout)
-    log_format = get_logging_format()
-    console_handler.setFormatter(log_format)
-    logger.addHandler(console_handler)
+    def _evict(self):
+        # evict down to 90% of max_bytes so the next few saves don't each need an eviction
+        to_free = self._count_stored_bytes() - self.max_bytes * 9 // 10
+        keys = []
+        for key, size in self._connection.execute("SELECT key, size FROM results ORDER BY used"):
+            if to_free <= 0:
+                break
+            keys.append((key,))
+            to_free -= size
+        self._connection.executemany("DELETE FROM results WHERE key = ?", keys)
+        self._stored_bytes = self._count_stored_bytes()
 
 
-def get_logging_format():
-    return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+class ParsedSaveCache:
+    """
+    Parsed saves kept in memory, keyed on the file each was loaded from: its path, size, modification time and a
+    hash of its contents. Loading a file that hasn't changed then skips decompressing and parsing it.
+    Saves are kept marshalled, which loads many times faster than json and means changing the save_data
+    of one editor can't change what the next one loads. Once they add up to more than max_bytes,
+    the least recently used are evicted. Editors in different threads can share a cache.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_PARSED_SAVE_CACHE_SIZE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # key -> marshalled (save_data, unparsed nodes), least recently used first
+        self._entries = collections.OrderedDict()
+        self._stored_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def get_key(filepath, lz_string, nodes=None):
+        """
+        :param filepath: path of the file the save was read from
+        :param str lz_string: what was read from the file
+        :param nodes: names of the top-level nodes parsed, or None for all of them
+        :type nodes: collections.abc.Iterable
+        :return: key of the file as it is now, or None if it can't be found anymore
+        :rtype: tuple
+        """
+        import hashlib
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        content_hash = hashlib.blake2b(lz_string.encode()).digest()
+        return (os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns, content_hash,
+                None if nodes is None else tuple(sorted(nodes)))
+
+    def get(self, key):
+        """
+        :param tuple key: from get_key()
+        :return: the parsed save data and unparsed nodes stored for key, or None if there are none
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return marshal.loads(entry)
+
+    def put(self, key, parsed):
+        """
+        :param tuple key: from get_key(), nothing is stored when it is None
+        :param tuple parsed: the parsed save data and unparsed nodes (or None)
+        :return: nothing
+        """
+        if key is None:
+            return
+        entry = marshal.dumps(parsed)
+        if len(entry) > self.max_bytes:
+            return
+        with self._lock:
+            self._stored_bytes += len(entry) - len(self._entries.pop(key, b""))
+            self._entries[key] = entry
+            while self._stored_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._stored_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stored_bytes = 0
+
+
+class SyncBatch:
+    """
+    Groups the fsyncs of the directories of save files that were written with EvolveSaveEditor.fsync turned off,
+    so editing a batch of saves doesn't wait on the disk for every one of them, and a directory several of them
+    are in is synced once. Each save is still synced to a temp file before that is renamed over the save,
+    so a crash, kill or power cut never leaves one half written or empty. Syncing the directory makes the rename
+    last, and until it is, a power cut or an OS crash can undo it, which leaves the save as it was before it was
+    edited. Safe to share between threads.
+    """
+
+    def __init__(self, every=None):
+        """
+        :param int every: fsync the files once this many of them have been added, None to wait for flush()
+        """
+        self.every = every
+        self._filepaths = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._filepaths)
+
+    def add(self, filepath):
+        """
+        :param str filepath: path of a file that was written and whose directory still needs syncing
+        :raises OSError: if that made the files due for syncing and they couldn't be synced
+        """
+        with self._lock:
+            self._filepaths.append(filepath)
+            if self.every is not None and len(self._filepaths) >= self.every:
+                self._flush()
+
+    def flush(self):
+        """
+        Fsync the directories of every file added since the last sync
+        :raises OSError: if any of them couldn't be synced
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        filepaths, self._filepaths = self._filepaths, []
+        directories = dict.fromkeys(os.path.dirname(os.path.realpath(filepath)) for filepath in filepaths)
+        for directory in directories:
+            _fsync_directory(directory)
+
+
+class SaveHashIndex:
+    """
+    Merkle tree over save data, for finding what differs between two saves without comparing all of them
+    Every object and array gets a hash made from the keys and values it holds, with the hash of each object or
+    array in it standing in for its contents, and two saves are compared by descending only into the objects
+    whose hashes differ. Hashes are kept once worked out, so an index compared to many saves hashes each node once.
+    Nodes that are still json text, such as the ones parse_save_nodes() didn't parse, are compared by their text
+    instead, which is quicker than hashing it. diff() splits the json text objects it descends into into their
+    members the way parse_save_nodes() splits the top level, so it only parses the values that differ. Brackets
+    inside strings can throw that split off, so when a member turns out not to be valid json the members are
+    parsed all together instead, which puts them back together the way they were written.
+    """
+
+    def __init__(self, save_data, unparsed_nodes=None):
+        """
+        :param dict save_data: the entire evolve savefile json data, or the part of it that was parsed
+        :param dict unparsed_nodes: top-level key -> json text or None, as returned by parse_save_nodes()
+        """
+        unparsed_nodes = unparsed_nodes or {}
+        # top-level key -> (json text, None) for nodes that weren't parsed or (None, node) for ones that were,
+        # in the order dump_save_nodes() writes them. Nodes inside them are (json text, value) pairs the same way
+        self.nodes = {}
+        for key in itertools.chain(unparsed_nodes, save_data):
+            if key in save_data:
+                self.nodes[key] = (None, save_data[key])
+            elif unparsed_nodes[key] is not None:
+                self.nodes[key] = (unparsed_nodes[key], None)
+        # path -> members of the object there and the value parsed from it, for the json text nodes diff() needed
+        self._members = {}
+        self._parsed = {}
+        # id of each parsed object and array hashed so far -> its hash, they are all kept alive by _nodes or _parsed
+        self._digests = {}
+
+    def get_digest(self, value):
+        """
+        :param value: a parsed object or array in the save, or a value in one of them
+        :return: hash of value and everything in it, kept for objects and arrays so each is only hashed once
+        :rtype: bytes
+        """
+        if not isinstance(value, (dict, list)):
+            # the name of the type keeps 1, 1.0 and true apart, they are written differently so aren't the same
+            return f"{type(value).__name__}:{value!r}".encode()
+        digest = self._digests.get(id(value))
+        if digest is None:
+            import hashlib
+            value_hash = hashlib.blake2b(b"{" if isinstance(value, dict) else b"[", digest_size=16)
+            for key, member in value.items() if isinstance(value, dict) else enumerate(value):
+                value_hash.update(f"{key!r}=".encode())
+                value_hash.update(self.get_digest(member))
+                value_hash.update(b",")
+            digest = self._digests[id(value)] = value_hash.digest()
+        return digest
+
+    def diff(self, other):
+        """
+        Compare this save to another one, descending only into the objects whose hashes differ
+        :param SaveHashIndex other: index of the save to compare to
+        :return: SaveChange for each value that differs, with this save's value as old and other's as new.
+            An object that is only in one of the saves is one change, not one for each value in it.
+        :rtype: list
+        :raises ValueError: if json text that had to be parsed isn't valid json
+        """
+        changes = []
+        self._diff_split_members((), self.nodes, other.nodes, other, changes)
+        return changes
+
+    def _diff_split_members(self, path, old_members, new_members, other, changes):
+        """
+        Compare the members of the objects at path, and if one of them isn't valid json, which is what a split
+        thrown off by brackets inside strings leaves, compare the objects parsed whole instead
+        """
+        count = len(changes)
+        try:
+            self._diff_members(path, old_members, new_members, other, changes)
+        except ValueError:
+            del changes[count:]
+            self._diff_values(path, self._parse_members(path, old_members), other._parse_members(path, new_members),
+                              other, changes)
+
+    def _parse_members(self, path, members):
+        """
+        :param tuple path: keys leading to the object from the top of the save
+        :param dict members: key -> node for each member of the object, like get_members() returns
+        :return: the object, with the json text of its members parsed all together the first time it is needed
+        :rtype: dict
+        :raises ValueError: if the json text of the members together isn't valid json
+        """
+        if path not in self._parsed:
+            value = EvolveSaveEditor.parse_json("{" + ",".join(f"{json.dumps(key)}:{json_text}" for key, (json_text, _)
+                                                               in members.items() if json_text is not None) + "}")
+            value.update((key, member) for key, (json_text, member) in members.items() if json_text is None)
+            self._parsed[path] = value
+        return self._parsed[path]
+
+    def _diff_members(self, path, old_members, new_members, other, changes):
+        for key, old_node in old_members.items():
+            if key in new_members:
+                self._diff_nodes(path + (key,), old_node, new_members[key], other, changes)
+            else:
+                changes.append(SaveChange(path + (key,), self.parse_node(path + (key,), old_node), MISSING))
+        changes.extend(SaveChange(path + (key,), MISSING, other.parse_node(path + (key,), new_node))
+                       for key, new_node in new_members.items() if key not in old_members)
+
+    def _diff_nodes(self, path, old_node, new_node, other, changes):
+        """
+        Compare the nodes at path, which are json text or parsed values.
+        Nodes that are both text are the same if their text is, and both parsed if their hashes are.
+        A text node and a parsed one always get compared by what is in them.
+        """
+        old_text, old_value = old_node
+        new_text, new_value = new_node
+        if old_text is not None and old_text == new_text:
+            return
+        if old_text is None and new_text is None and self.get_digest(old_value) == other.get_digest(new_value):
+            return
+        old_members = self.get_members(path, old_node)
+        new_members = other.get_members(path, new_node)
+        if old_members is not None and new_members is not None:
+            self._diff_split_members(path, old_members, new_members, other, changes)
+        else:
+            self._diff_values(path, self.parse_node(path, old_node), other.parse_node(path, new_node), other, changes)
+
+    def _diff_values(self, path, old, new, other, changes):
+        # exact types, since values that are equal but of different types like 1 and 1.0 or 1 and true
+        # are written differently in the save, and so differ
+        if type(old) is not type(new) or not isinstance(old, (dict, list)):
+            if type(old) is not type(new) or old != new:
+                changes.append(SaveChange(path, old, new))
+        elif self.get_digest(old) != other.get_digest(new):
+            old_members = old if isinstance(old, dict) else dict(enumerate(old))
+            new_members = new if isinstance(new, dict) else dict(enumerate(new))
+            for key, value in old_members.items():
+                if key in new_members:
+                    self._diff_values(path + (key,), value, new_members[key], other, changes)
+                else:
+                    changes.append(SaveChange(path + (key,), value, MISSING))
+            changes.extend(SaveChange(path + (key,), MISSING, value) for key, value in new_members.items()
+                           if key not in old_members)
+
+    def get_members(self, path, node):
+        """
+        Split json text objects the first time they are needed, parsing them instead when they are small
+        :param tuple path: keys leading to the node from the top of the save
+        :param tuple node: (json text, None) or (None, parsed value), like the values of nodes
+        :return: key -> node for each member of the node at path, or None if it isn't an object
+        :rtype: dict
+        """
+        json_text, value = node
+        if json_text is None:
+            return {key: (None, member) for key, member in value.items()} if isinstance(value, dict) else None
+        if path not in self._members and len(json_text) < _HASH_INDEX_SPLIT_MIN_SIZE:
+            self._members[path] = self.get_members(path, (None, self.parse_node(path, node)))
+        elif path not in self._members:
+            try:
+                self._members[path] = {key: (json_text[start:end], None)
+                                       for key, start, end, _ in _scan_top_level(json_text)}
+            except ValueError:
+                # not an object, or one _scan_top_level() can't split
+                self._members[path] = self.get_members(path, (None, self.parse_node(path, node)))
+        return self._members[path]
+
+    def parse_node(self, path, node):
+        """
+        :param tuple path: keys leading to the node from the top of the save
+        :param tuple node: (json text, None) or (None, parsed value), like the values of nodes
+        :return: the value of the node, parsed the first time it is needed if it is json text
+        :raises ValueError: if the json text isn't valid json
+        """
+        json_text, value = node
+        if json_text is None:
+            return value
+        if path not in self._parsed:
+            self._parsed[path] = EvolveSaveEditor.parse_json(json_text)
+        return self._parsed[path]
+
+
+class _PatchApplier:
+    """
+    Applies JSON Patch operations to a document without modifying it
+    Only the objects and arrays on the paths of the operations are copied, each of them once however many
+    operations go through it, the rest of the result is shared with the document.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        # ids of the containers copied here, which belong to the result and can be changed in place
+        self._copies = set()
+
+    def apply(self, operation):
+        """
+        :param dict operation: JSON Patch operation to apply to document, which is replaced by the result
+        :return: nothing
+        :raises ValueError: if the operation is malformed or can't be applied
+        """
+        try:
+            if operation["op"] not in PATCH_OPERATIONS:
+                raise ValueError(f"unknown op {operation['op']!r}")
+            getattr(self, f"_{operation['op']}")(_split_json_pointer(operation["path"]), operation)
+        except (KeyError, TypeError) as err:
+            raise ValueError(f"{operation!r} is not a JSON Patch operation") from err
+        except ValueError as err:
+            raise ValueError(f"could not {operation['op']} {operation['path']} ({err})") from err
+
+    def _add(self, path, operation):
+        self._insert(path, operation["value"])
+
+    def _remove(self, path, _operation):
+        self._pop(path)
+
+    def _replace(self, path, operation):
+        value = operation["value"]
+        if self._same(self._get(path), value):
+            return
+        if not path:
+            self.document = value
+            return
+        parent = self._writable(path[:-1])
+        parent[self._key(parent, path[-1])] = value
+
+    def _move(self, path, operation):
+        from_path = _split_json_pointer(operation["from"])
+        if path[:len(from_path)] == from_path:
+            if len(path) > len(from_path):
+                raise ValueError("a value can't be moved into itself")
+            return
+        self._insert(path, self._pop(from_path))
+
+    def _copy(self, path, operation):
+        import copy
+        # a deep copy, so changing one of the two later on doesn't change the other through a shared copy
+        self._insert(path, copy.deepcopy(self._get(_split_json_pointer(operation["from"]))))
+
+    def _test(self, path, operation):
+        value = self._get(path)
+        expected = operation["value"]
+        if value != expected or isinstance(value, bool) != isinstance(expected, bool):
+            raise ValueError("the value is not the one tested for")
+
+    def _insert(self, path, value):
+        if not path:
+            self.document = value
+            return
+        parent = self._get(path[:-1])
+        if isinstance(parent, dict) and path[-1] in parent and self._same(parent[path[-1]], value):
+            return
+        parent = self._writable(path[:-1])
+        if isinstance(parent, list):
+            parent.insert(len(parent) if path[-1] == "-" else self._index(parent, path[-1], len(parent)), value)
+        else:
+            parent[path[-1]] = value
+
+    def _pop(self, path):
+        if not path:
+            raise ValueError("the whole document can't be removed")
+        parent = self._writable(path[:-1])
+        return parent.pop(self._key(parent, path[-1]))
+
+    def _get(self, path):
+        node = self.document
+        for token in path:
+            node = node[self._key(node, token)]
+        return node
+
+    def _writable(self, path):
+        """
+        :return: the container at path, after copying it and every container above it that isn't a copy already
+        """
+        node = self.document = self._own(self.document)
+        for token in path:
+            key = self._key(node, token)
+            child = node[key] = self._own(node[key])
+            node = child
+        return node
+
+    def _own(self, node):
+        if id(node) in self._copies:
+            return node
+        if isinstance(node, dict):
+            node = dict(node)
+        elif isinstance(node, list):
+            node = list(node)
+        else:
+            raise ValueError("the path goes through a value that isn't an object or array")
+        self._copies.add(id(node))
+        return node
+
+    def _key(self, node, token):
+        if isinstance(node, dict):
+            if token not in node:
+                raise ValueError(f"there is no {token!r}")
+            return token
+        if isinstance(node, list):
+            return self._index(node, token, len(node) - 1)
+        raise ValueError("the path goes through a value that isn't an object or array")
+
+    @staticmethod
+    def _same(value, other):
+        # equal values of different types, like 1000 and 1000.0, are written differently so aren't the same
+        return value is other or (type(value) is type(other) and value == other)
+
+    @staticmethod
+    def _index(node, token, last):
+        if not (token.isascii() and token.isdigit() and (token == "0" or token[0] != "0")) or int(token) > last:
+            raise ValueError(f"{token!r} is not an index of an array of {len(node)}")
+        return int(token)
 
 
 class EvolveSaveEditor:
@@ -76,8 +2633,23 @@ class EvolveSaveEditor:
         1. Call a load method to input data from an external source into the instance
         2. Call adjust_save_data() to actually edit the data
         3. Call a save method to output save data from the instance to an external source
+    The time spent in each stage of those steps is recorded in timings.
+    Each instance keeps its own save data and the adjusters never modify the data they are passed,
+    so editors can run in many threads at once, even on the same loaded save data.
     """
-    save_data = {}
+    lz_string_backend = LZ_STRING_BACKEND_FAST
+    json_backend = JSON_BACKEND_AUTO
+    # ParsedSaveCache load_data_from_file() looks files up in before parsing them, None to always parse them
+    parsed_save_cache = None
+    # fsync the directory of a save once the save has replaced the file there, which makes the rename last,
+    # off when a SyncBatch syncs the directories later instead. The save itself is always synced before the rename
+    fsync = True
+    # load_data_from_file() decompresses and splits files at least this big into their top-level nodes as it reads
+    # them, which takes about twice as long but never holds the whole save, or the whole of its json text, as one
+    # string. None, the default, to always read files whole
+    stream_min_file_size = None
+    # AdjustmentProfile adjust_save_data() adjusts saves with, None for every adjuster with the DEFAULT amounts below
+    adjustment_profile = None
 
     BuildingAmountsParam = collections.namedtuple("BuildingAmountsParam",
                                                   ["boost", "housing", "job", "morale_job", "power_generator",
@@ -119,88 +2691,751 @@ class EvolveSaveEditor:
         "support": ["moon_base", "nav_beacon", "nexus", "red_tower", "spaceport", "space_station", "starport",
                     "swarm_control", "xfer_station"]
     }
+    # building name -> BUILDING_TYPES key, use get_building_category() to look buildings up
+    BUILDING_CATEGORIES = _index_building_types(BUILDING_TYPES)
+    # (zone, building name) -> how many citizens or soldiers each of those buildings holds
+    CITIZEN_CAPACITY = {("city", "basic_housing"): 1, ("city", "farm"): 1, ("space", "living_quarters"): 1,
+                        ("interstellar", "habitat"): 1, ("city", "cottage"): 2, ("city", "apartment"): 5}
+    SOLDIER_CAPACITY = {("city", "garrison"): 3, ("space", "space_barracks"): 2, ("interstellar", "cruiser"): 3}
+    # every adjuster that adjust_save_data() can run, in the order their changes are applied
+    ADJUSTERS = ("fill_resources", "stack_resources", "adjust_buildings", "fill_population", "fill_soldiers",
+                 "adjust_prestige_currency", "adjust_arpa_research")
+    # adjuster -> the top-level save data nodes it reads or changes
+    ADJUSTER_NODES = {
+        "fill_resources": ("resource",),
+        "stack_resources": ("resource", "city"),
+        "adjust_buildings": ("city", "space", "interstellar", "portal"),
+        "fill_population": ("resource", "city", "space", "interstellar", "race"),
+        "fill_soldiers": ("civic", "city", "space", "interstellar"),
+        "adjust_prestige_currency": ("race", "stats"),
+        "adjust_arpa_research": ("arpa",),
+    }
+    # characters of a save load_data_from_file() reads at a time when it streams the save
+    STREAM_READ_SIZE = 64 * 1024
     DEFAULT_UNBOUNDED_RESOURCE_AMOUNT = 2000000000000
     DEFAULT_STACK_AMOUNT = 1000
     DEFAULT_PRESTIGE_CURRENCY_AMOUNTS = {"Plasmid": 30000, "Phage": 20000, "Dark": 4000}
 
-    def load_data_from_file(self, filepath):
+    def __init__(self):
+        self.save_data = {}
+        self._handed_out = False
+        self.timings = TimingReport()
+        # top-level key -> json text of the nodes load_data_from_file() didn't parse, None for the ones it did
+        self._unparsed_nodes = None
+        # save_data as it was loaded, the save it was loaded from and the path of the file that held it (if any)
+        self._loaded = (None, None, None)
+
+    @property
+    def save_data(self):
+        """
+        The stored save data. Assigning it counts as changing it, whatever it is assigned,
+        and so does reading it, since whoever read it may have edited it in place
+        :rtype: dict
+        """
+        self._handed_out = True
+        return self._save_data
+
+    @save_data.setter
+    def save_data(self, save_data):
+        self._save_data = save_data
+        # save_data was assigned or changed since it was loaded
+        self._dirty = True
+        # the last adjust_save_data() or patch_save_data() found nothing to change, and nothing was assigned since
+        self._checked = False
+
+    @property
+    def changed(self):
+        """
+        False only when the last adjust_save_data() or patch_save_data() found nothing to change,
+        save_data was still the data that was loaded, and it hasn't been assigned or read since it was loaded,
+        in which case saving it skips serializing and compressing it.
+        Reading save_data counts as a change because an edit made in place can't be told apart from none.
+        :rtype: bool
+        """
+        return self._dirty or self._handed_out or not self._checked
+
+    def _set_loaded(self, lz_string, filepath):
+        """
+        Record that save_data was just loaded from lz_string, which was read from filepath (if any)
+        """
+        self._loaded = (self._save_data, lz_string, filepath)
+        self._dirty = False
+        # save_data was read since it was loaded, so it may have been edited in place
+        self._handed_out = False
+
+    def _set_checked(self, save_data):
+        """
+        Store save_data that adjust_save_data() or patch_save_data() made from the stored save data
+        :return: True if it changed anything, False if the save was already as it would make it
+        :rtype: bool
+        """
+        changed = save_data is not self._save_data
+        dirty = self._dirty
+        self.save_data = save_data
+        self._dirty = dirty or changed
+        self._checked = True
+        return changed
+
+    def make_view(self):
+        """
+        A new editor of the save loaded into this one, which shares its save data instead of copying it
+        The adjusters copy whatever they change, so adjusting the view leaves this editor's save data as it was,
+        and many views of one loaded save can each be adjusted differently, copying only what they change.
+        :return: editor with the save data, loaded save and settings of this one, and timings of its own
+        :rtype: EvolveSaveEditor
+        """
+        view = type(self)()
+        view.__dict__.update(self.__dict__)
+        view.timings = TimingReport()
+        # save_data edited in place through the view is edited in this editor too
+        self._handed_out = True
+        return view
+
+    def get_patch(self):
+        """
+        The edits made to save_data since it was loaded, such as by adjust_save_data(), as an RFC 6902 JSON Patch
+        patch_save_data() can apply it to other saves, without running the adjusters over them.
+        :return: JSON Patch operations, none if save_data hasn't changed
+        :rtype: list
+        """
+        return self.make_patch(self._loaded[0], self._save_data)
+
+    def get_hash_index(self):
+        """
+        :return: Merkle tree of the stored save data, to compare it to other saves with
+        :rtype: SaveHashIndex
+        """
+        return SaveHashIndex(self._save_data, self._unparsed_nodes)
+
+    def patch_save_data(self, patch):
+        """
+        Apply a JSON Patch, such as one get_patch() gave back for another save, to the stored save data
+        :param list patch: JSON Patch operations
+        :return: True if the patch changed anything, False if the save was already as it would make it
+        :rtype: bool
+        :raises ValueError: if the patch can't be applied to this save
+        """
+        with self.timings.span("apply_patch"):
+            data = self.apply_patch(self._save_data, patch)
+        return self._set_checked(data)
+
+    def get_settings(self):
+        """
+        :return: everything that decides how adjust_save_data() changes a save, including the editor's version
+        :rtype: dict
+        """
+        return dict(self.get_adjustment_profile().get_settings(), version=_get_editor_version())
+
+    def get_adjustment_profile(self):
+        """
+        :return: adjustment_profile, or a profile of every adjuster with the DEFAULT amounts when it isn't set
+        :rtype: AdjustmentProfile
+        """
+        return AdjustmentProfile() if self.adjustment_profile is None else self.adjustment_profile
+
+    def load_data_from_file(self, filepath, nodes=None):
+        """
+        Reads data from the file at the passed in filepath and stores it for later use
+
+        When nodes is passed in, only those top-level nodes are parsed into save_data.
+        The others are kept as json text and written back unchanged by save_data_to_file().
+        Files of at least stream_min_file_size, when it is set, are decompressed and parsed as they are read.
+
+        :param filepath: path to the file where data should be read
+        :param nodes: names of the top-level nodes to parse, like get_adjuster_nodes() returns, or None for all of them
+        :type nodes: collections.abc.Container
+        :return: True if the data was loaded, False otherwise
+        :rtype: bool
+        """
+        cache = self.parsed_save_cache
+        if cache is None and self._should_stream(filepath):
+            return self._stream_data_from_file(filepath, nodes)
+        lz_string = self.read_file(filepath)
+        if lz_string is None:
+            return False
+        if cache is None:
+            if not self.load_data_from_string(lz_string, nodes, f"file {os.path.normpath(filepath)}"):
+                return False
+            self._set_loaded(lz_string, os.path.normpath(filepath))
+            return True
+
+        with self.timings.span("parsed_save_cache"):
+            key = cache.get_key(filepath, lz_string, nodes)
+            cached = cache.get(key)
+        if cached is not None:
+            self.save_data, self._unparsed_nodes = cached
+        elif self.load_data_from_string(lz_string, nodes, f"file {os.path.normpath(filepath)}"):
+            with self.timings.span("parsed_save_cache"):
+                cache.put(key, (self._save_data, self._unparsed_nodes))
+        else:
+            return False
+        self._set_loaded(lz_string, os.path.normpath(filepath))
+        return True
+
+    def _should_stream(self, filepath):
+        if self.stream_min_file_size is None:
+            return False
+        try:
+            return os.path.getsize(filepath) >= self.stream_min_file_size
+        except OSError:
+            # read_file() reports it
+            return False
+
+    def _stream_data_from_file(self, filepath, nodes):
+        adjusted_path = os.path.normpath(filepath)
+        try:
+            with self.timings.span("stream_load"), open(adjusted_path, "r") as file:
+                chunks = iter(functools.partial(file.read, self.STREAM_READ_SIZE), "")
+                json_chunks = self.iter_decompress_lz_string(chunks, self.lz_string_backend)
+                self.save_data, self._unparsed_nodes = self.parse_save_chunks(json_chunks, nodes, self.json_backend)
+        except OSError:
+            logger = get_logger()
+            logger.warning(f"read_file() unable to read from file {adjusted_path}")
+            return False
+        except ValueError:
+            # the save is broken or its json couldn't be split into nodes, which loading it whole sorts out or reports
+            lz_string = self.read_file(filepath)
+            if lz_string is None or not self.load_data_from_string(lz_string, nodes, f"file {adjusted_path}"):
+                return False
+            self._set_loaded(lz_string, adjusted_path)
+            return True
+        # the save isn't kept, so saving it unchanged somewhere else means compressing it again
+        self._set_loaded(None, adjusted_path)
+        return True
+
+    def read_file(self, filepath):
         """
-        Reads data from the file at the passed in filepath and stores it for later use
-        :param filepath: path to the file where data should be read
-        :return: nothing
+        :param filepath: path to the file to read
+        :return: the contents of the file, or None if it couldn't be read
+        :rtype: str
         """
         adjusted_path = os.path.normpath(filepath)
         try:
-            with open(adjusted_path, "r") as file:
-                lz_string = file.read()
+            with self.timings.span("read"), open(adjusted_path, "r") as file:
+                return file.read()
         except OSError:
             logger = get_logger()
-            logger.warning(f"load_data_from_file() unable to read from file {adjusted_path}")
-            return
+            logger.warning(f"read_file() unable to read from file {adjusted_path}")
+            return None
+
+    def load_data_from_string(self, lz_string, nodes=None, source="string"):
+        """
+        Decompresses and parses an exported save and stores it for later use
 
-        json_str = self.decompress_lz_string(lz_string)
+        :param str lz_string: the save, as exported from the game
+        :param nodes: names of the top-level nodes to parse, like get_adjuster_nodes() returns, or None for all of them
+        :type nodes: collections.abc.Container
+        :param str source: where the save came from, for log messages
+        :return: True if the data was loaded, False otherwise
+        :rtype: bool
+        """
+        with self.timings.span("decompress"):
+            json_str = self.decompress_lz_string(lz_string, self.lz_string_backend)
         try:
-            self.save_data = json.loads(json_str)
+            with self.timings.span("parse"):
+                if nodes is None:
+                    self.save_data, self._unparsed_nodes = self.parse_json(json_str, self.json_backend), None
+                else:
+                    self.save_data, self._unparsed_nodes = self.parse_save_nodes(json_str, nodes, self.json_backend)
         except json.JSONDecodeError as err:
             logger = get_logger()
-            logger.warning(
-                f"load_data_from_file() could not load from file {adjusted_path} because of a json parse error {err}")
+            logger.warning(f"load_data_from_string() could not load from {source} because of a json parse error {err}")
             logger.debug(f"failed json: {json_str}")
-            return
+            return False
         except TypeError:
             logger = get_logger()
             logger.warning(
-                f"load_data_from_file() could not load from file {adjusted_path} because"
-                f" the data was not encoded properly")
-            return
+                f"load_data_from_string() could not load from {source} because the data was not encoded properly")
+            return False
+        self._set_loaded(lz_string, None)
+        return True
 
     def save_data_to_file(self, filepath):
         """
         Outputs stored data to a file at the passed in filepath
+        Nothing is written if the data was loaded from that same file and hasn't changed, see changed.
         :param filepath: path to the file where save data should be outputted
-        :return: nothing
+        :return: True if the data was written (or didn't need to be), False otherwise
+        :rtype: bool
+        """
+        if not self.changed and self._loaded[2] == os.path.normpath(filepath):
+            return True
+        if not self.changed and self._loaded[1] is not None:
+            return self.write_file(filepath, self._loaded[1])
+        # serialized, compressed and written a piece at a time, so neither the json nor the save is held in full
+        return self.write_file(filepath, self.iter_save_data_to_string(), "stream_save")
+
+    def write_file(self, filepath, lz_string, stage="write"):
+        """
+        The file is written to a temp file next to it, in binary with one big buffer, which is fsynced and then
+        renamed over the file, and the directory is fsynced unless fsync is turned off. So a crash, kill or power cut
+        part way through leaves the file as it was, never half written. A file that is a symlink has the file it links
+        to replaced.
+        :param filepath: path to the file to write
+        :param lz_string: what to write to it, or the pieces of it
+        :type lz_string: str or collections.abc.Iterable
+        :param str stage: what the time spent writing, including making the pieces, is recorded as in timings
+        :return: True if the file was written, False otherwise
+        :rtype: bool
         """
         adjusted_path = os.path.normpath(filepath)
-        json_str = json.dumps(self.save_data, separators=(',', ':'))
-        lz_string = self.compress_lz_string(json_str)
+        pieces = (lz_string,) if isinstance(lz_string, str) else lz_string
         try:
-            with open(adjusted_path, "w") as file:
-                file.write(lz_string)
+            with self.timings.span(stage):
+                real_path = os.path.realpath(adjusted_path)
+                temp_path = _write_temp_file(real_path, pieces)
+                try:
+                    os.replace(temp_path, real_path)
+                except OSError:
+                    os.remove(temp_path)
+                    raise
+                if self.fsync:
+                    _fsync_directory(os.path.dirname(real_path))
         except OSError:
             logger = get_logger()
-            logger.warning(f"save_data_to_file() unable to write to file {adjusted_path}")
+            logger.warning(f"write_file() unable to write to file {adjusted_path}")
+            return False
+        return True
+
+    def save_data_to_string(self):
+        """
+        Serializes and compresses the stored data into a save the game can import
+        If the data hasn't changed since it was loaded (see changed), the save it was loaded from is given back
+        as it was, unless load_data_from_file() streamed it, which doesn't keep the save.
+        :return: the save, in the same format the game exports
+        :rtype: str
+        """
+        json_str = self.save_data_to_json()
+        if json_str is None:
+            return self._loaded[1]
+        with self.timings.span("compress"):
+            return self.compress_lz_string(json_str, self.lz_string_backend)
+
+    def save_data_to_json(self):
+        """
+        Serializes the stored data into the json text that save_data_to_string() compresses,
+        for compressing somewhere else, like a worker process
+        :return: the json text, or None if the data hasn't changed since it was loaded (see changed)
+            and save_data_to_string() gives back the save it was loaded from as it was
+        :rtype: str
+        """
+        if not self.changed and self._loaded[1] is not None:
+            return None
+        with self.timings.span("serialize"):
+            return self.dump_save_nodes(self._save_data, self._unparsed_nodes, self.json_backend)
+
+    def iter_save_data_to_string(self):
+        """
+        Serialize and compress the stored data a piece at a time, like save_data_to_string() does all at once
+        The pieces are made as they are asked for, so only the compressor's dictionary is held onto,
+        not the json text or the save.
+        :return: pieces of the save, in the same format the game exports
+        :rtype: collections.abc.Iterator
+        """
+        json_pieces = self.iter_dump_save_nodes(self._save_data, self._unparsed_nodes, self.json_backend)
+        return self.iter_compress_lz_string(json_pieces, self.lz_string_backend)
+
+    @staticmethod
+    def get_adjuster_nodes(adjusters=ADJUSTERS):
+        """
+        :param adjusters: names of adjusters, from ADJUSTERS
+        :type adjusters: collections.abc.Iterable
+        :return: the top-level save data nodes those adjusters need
+        :rtype: frozenset
+        """
+        return frozenset(itertools.chain.from_iterable(EvolveSaveEditor.ADJUSTER_NODES[name] for name in adjusters))
+
+    @staticmethod
+    def get_patch_nodes(patch):
+        """
+        :param list patch: JSON Patch operations
+        :return: the top-level save data nodes the patch reads or changes, or None if it works on the whole save
+        :rtype: frozenset
+        """
+        nodes = set()
+        for operation in patch:
+            pointers = (operation["path"], operation["from"]) if operation["op"] in ("move", "copy") else \
+                (operation["path"],)
+            for pointer in pointers:
+                path = _split_json_pointer(pointer)
+                if not path:
+                    return None
+                nodes.add(path[0])
+        return frozenset(nodes)
+
+    @staticmethod
+    def make_patch(original, adjusted):
+        """
+        Diff two versions of save data into an RFC 6902 JSON Patch
+        Nodes that are the same object in both aren't compared, so diffing the result of the copy-on-write
+        adjusters with what they were passed only looks at the nodes they copied, not the whole save.
+        :param dict original: save data before it was edited
+        :param dict adjusted: save data after it was edited
+        :return: add, remove and replace operations that turn original into adjusted
+        :rtype: list
+        """
+        patch = []
+        _add_patch_operations(patch, "", original, adjusted)
+        return patch
+
+    @staticmethod
+    def apply_patch(save_data, patch):
+        """
+        Apply an RFC 6902 JSON Patch to save data without modifying it
+        Only the nodes the operations go through are copied, the rest is shared with save_data,
+        and an operation that sets a value to what it already is changes nothing.
+        :param dict save_data: the entire evolve savefile json data, or the nodes of it the patch needs
+        :param list patch: JSON Patch operations, like make_patch() returns
+        :return: save_data itself if the patch changed nothing, otherwise the patched save data
+        :rtype: dict
+        :raises ValueError: if an operation is malformed or can't be applied, such as one on a path that isn't there
+        """
+        applier = _PatchApplier(save_data)
+        for operation in patch:
+            applier.apply(operation)
+        return applier.document
+
+    @staticmethod
+    def parse_save_nodes(json_str, nodes, backend=JSON_BACKEND_AUTO):
+        """
+        Parse only some of the top-level nodes of save data json
+
+        If the json can't be split into its top-level nodes (brackets inside of strings can cause that),
+        all of it is parsed instead.
+
+        :param json_str: the entire evolve savefile json text
+        :type json_str: str
+        :param nodes: names of the top-level nodes to parse
+        :type nodes: collections.abc.Container
+        :param backend: one of JSON_BACKENDS
+        :type backend: str
+        :return: save data holding the parsed nodes, and top-level key -> json text of each node that wasn't parsed
+            (None for the parsed ones) in the order they appear, or None if everything was parsed
+        :rtype: tuple
+        """
+        # the json module's decoder finds where a value ends as it parses, orjson needs to be told
+        parse_value = None
+        if isinstance(json_str, str) and _get_orjson(backend, len(json_str)) is not None:
+            parse_value = functools.partial(EvolveSaveEditor.parse_json, backend=JSON_BACKEND_ORJSON)
+        try:
+            save_data = {}
+            unparsed_nodes = {}
+            for key, start, end, value in _scan_top_level(json_str, nodes, parse_value):
+                if key in nodes:
+                    save_data[key] = value
+                    unparsed_nodes[key] = None
+                else:
+                    unparsed_nodes[key] = json_str[start:end]
+            # a node hidden inside one that was skipped over means the skipping went wrong
+            if any(node not in unparsed_nodes and f'"{node}"' in json_str for node in nodes):
+                raise ValueError("not every node was found")
+        except ValueError:
+            return EvolveSaveEditor.parse_json(json_str, backend), None
+        return save_data, unparsed_nodes
+
+    @staticmethod
+    def parse_save_chunks(chunks, nodes=None, backend=JSON_BACKEND_AUTO):
+        """
+        Parse save data json given a piece at a time, like iter_decompress_lz_string() gives it
+
+        The text is split into its top-level nodes as it is given, so it is held once, as the text of each node,
+        and never as a whole. Once all of it has been given each node is parsed (or, when nodes is passed in and it
+        isn't one of them, kept as json text), with the text of each dropped once it is parsed.
+        Unlike parse_save_nodes(), when the json can't be split into its top-level nodes this raises ValueError,
+        and the caller should parse all of the text together instead.
+
+        :param chunks: pieces of the entire evolve savefile json text
+        :type chunks: collections.abc.Iterable
+        :param nodes: names of the top-level nodes to parse, or None for all of them
+        :type nodes: collections.abc.Collection
+        :param backend: one of JSON_BACKENDS
+        :type backend: str
+        :return: save data and unparsed nodes, the same as parse_save_nodes() returns
+            (unparsed nodes is None when nodes is None)
+        :rtype: tuple
+        :raises ValueError: if the json isn't an object, or couldn't be split into its top-level nodes
+        """
+        parser = _TopLevelParser(nodes, functools.partial(EvolveSaveEditor.parse_json, backend=backend))
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.close()
+
+    @staticmethod
+    def iter_dump_save_nodes(save_data, unparsed_nodes=None, backend=JSON_BACKEND_AUTO):
+        """
+        Serialize save data a piece at a time, like dump_save_nodes() does all at once
+        Each piece is at most one top-level node. The json module's iterative encoder would give smaller pieces,
+        but it is several times slower than serializing each node whole with dump_json(), and a node takes less memory
+        than the dictionary the compressor builds from it anyway.
+        :param save_data: the entire evolve savefile json data, or the part of it that was parsed
+        :type save_data: dict
+        :param unparsed_nodes: top-level key -> json text or None, as returned by parse_save_nodes()
+        :type unparsed_nodes: dict
+        :param backend: one of JSON_BACKENDS
+        :type backend: str
+        :return: pieces of json text, which joined together are what dump_save_nodes() returns
+        :rtype: collections.abc.Iterator
+        """
+        members = _iter_save_members(save_data, unparsed_nodes)
+        if members is None:
+            yield EvolveSaveEditor.dump_save_nodes(save_data, unparsed_nodes, backend)
             return
+        yield "{"
+        separator = ""
+        for key, json_text in members:
+            if json_text is None:
+                json_text = EvolveSaveEditor.dump_json(save_data[key], backend)
+            yield f"{separator}{json.dumps(key)}:{json_text}"
+            separator = ","
+        yield "}"
+
+    @staticmethod
+    def dump_save_nodes(save_data, unparsed_nodes=None, backend=JSON_BACKEND_AUTO):
+        """
+        Serialize save data, putting back the nodes parse_save_nodes() left as json text
+        Nodes in save_data are used over the unparsed ones, and any new nodes in save_data go at the end.
+        :param save_data: the entire evolve savefile json data, or the part of it that was parsed
+        :type save_data: dict
+        :param unparsed_nodes: top-level key -> json text or None, as returned by parse_save_nodes()
+        :type unparsed_nodes: dict
+        :param backend: one of JSON_BACKENDS
+        :type backend: str
+        :return: json text of the save data
+        :rtype: str
+        """
+        if unparsed_nodes is None:
+            return EvolveSaveEditor.dump_json(save_data, backend)
+        members = []
+        for key, json_text in _iter_save_members(save_data, unparsed_nodes):
+            if json_text is None:
+                json_text = EvolveSaveEditor.dump_json(save_data[key], backend)
+            members.append(f"{json.dumps(key)}:{json_text}")
+        return "{" + ",".join(members) + "}"
+
+    @staticmethod
+    def get_building_category(building_name):
+        """
+        Look up which type of building (one of the BUILDING_TYPES keys) a building is
+
+        :param building_name: name of the building as it appears in the save data, like "farm" or "dyson"
+        :type building_name: str
+        :return: the building type, or None if the building isn't a known type
+        :rtype: str or None
+        """
+        return EvolveSaveEditor.BUILDING_CATEGORIES.get(building_name)
+
+    @staticmethod
+    def parse_json(json_str, backend=JSON_BACKEND_AUTO):
+        """
+        Parse save data json, with orjson if the backend allows it, it is installed and, for auto, the json is big
+        enough to be worth importing orjson for
+
+        orjson reads integers too big for 64 bits as floats, so json with that many digits in a row is
+        parsed by the json module instead. So is json orjson rejects, like NaN, which the json module accepts.
+
+        :param json_str: json text to parse
+        :type json_str: str
+        :param backend: one of JSON_BACKENDS
+        :type backend: str
+        :return: the parsed data, the same as json.loads() returns
+        :raises json.JSONDecodeError: if json_str isn't json
+        """
+        fast_json = _get_orjson(backend, len(json_str)) if isinstance(json_str, str) else None
+        if fast_json is not None and _LONG_DIGIT_RUN not in json_str.translate(_DIGITS_TO_ZERO):
+            try:
+                return fast_json.loads(json_str)
+            except fast_json.JSONDecodeError:
+                pass
+        return json.loads(json_str)
+
+    @staticmethod
+    def dump_json(data, backend=JSON_BACKEND_AUTO):
+        """
+        Serialize save data to compact json, byte for byte the same as json.dumps(data, separators=(',', ':'))
+
+        The game rejects an import whose json changed, so orjson output is only used when it is the same as the
+        json module's: all ascii (the json module escapes everything else) and without floats orjson formats
+        differently. Otherwise, and for integers orjson can't write, the json module is used.
+        orjson writes NaN and infinity as null, but neither can be in save data since json has no way to write them.
+
+        :param data: save data to serialize
+        :type data: dict
+        :param backend: one of JSON_BACKENDS
+        :type backend: str
+        :return: compact json text
+        :rtype: str
+        """
+        fast_json = _get_orjson(backend)
+        if fast_json is not None:
+            try:
+                dumped = fast_json.dumps(data)
+            except fast_json.JSONEncodeError:
+                # integers too big for 64 bits or keys that aren't strings
+                pass
+            else:
+                if dumped.isascii() and b"\x7f" not in dumped and not _orjson_floats_differ(dumped):
+                    return dumped.decode("ascii")
+        return json.dumps(data, separators=(',', ':'))
+
+    @staticmethod
+    def compress_lz_string(raw, backend=LZ_STRING_BACKEND_FAST):
+        if backend == LZ_STRING_BACKEND_LZSTRING:
+            import lzstring
+            return lzstring.LZString.compressToBase64(raw)
+        return LZStringCodec.compress_to_base64(raw)
 
     @staticmethod
-    def compress_lz_string(raw):
-        return lzstring.LZString.compressToBase64(raw)
+    def iter_compress_lz_string(chunks, backend=LZ_STRING_BACKEND_FAST):
+        """
+        Compress json text given a piece at a time, giving back the save a piece at a time as it is made
+        The lzstring package can't do that, so with its backend the text is compressed once all of it has been given.
+        :param chunks: pieces of the json text, like iter_dump_save_nodes() gives
+        :type chunks: collections.abc.Iterable
+        :param backend: one of LZ_STRING_BACKENDS
+        :type backend: str
+        :return: pieces of the save, which joined together are what compress_lz_string() returns
+        :rtype: collections.abc.Iterator
+        """
+        if backend == LZ_STRING_BACKEND_LZSTRING:
+            return iter((EvolveSaveEditor.compress_lz_string("".join(chunks), backend),))
+        return LZStringCodec.iter_compress_to_base64(chunks)
 
     @staticmethod
-    def decompress_lz_string(compressed):
+    def decompress_lz_string(compressed, backend=LZ_STRING_BACKEND_FAST):
         try:
-            decompressed = lzstring.LZString.decompressFromBase64(compressed)
-        except IndexError:
+            if backend == LZ_STRING_BACKEND_LZSTRING:
+                import lzstring
+                decompressed = lzstring.LZString.decompressFromBase64(compressed)
+            else:
+                decompressed = LZStringCodec.decompress_from_base64(compressed)
+        except (IndexError, KeyError, ValueError):
             logger = get_logger()
             logger.warning(f"unable to decompress invalid value in decompress_lz_string()")
             logger.debug(f"failed decompress: {compressed}")
             return None
         return decompressed
 
-    def adjust_save_data(self):
-        # adjust_data method that calls all individual helper methods before saving the data to member
-        data = copy.deepcopy(self.save_data)
+    @staticmethod
+    def iter_decompress_lz_string(chunks, backend=LZ_STRING_BACKEND_FAST):
+        """
+        Decompress a save given a piece at a time, like the blocks of a file as it is read,
+        giving back its json text a piece at a time as well
+        The lzstring package can't do that, so with its backend the save is decompressed once all of it has been given.
+        :param chunks: pieces of the save, as exported from the game
+        :type chunks: collections.abc.Iterable
+        :param backend: one of LZ_STRING_BACKENDS
+        :type backend: str
+        :return: pieces of the json text of the save
+        :rtype: collections.abc.Iterator
+        :raises ValueError: if the save couldn't be decompressed, which unlike decompress_lz_string() isn't logged
+        """
+        try:
+            if backend == LZ_STRING_BACKEND_LZSTRING:
+                import lzstring
+                decompressed = lzstring.LZString.decompressFromBase64("".join(chunks))
+                if decompressed is None:
+                    raise ValueError("compressed data refers to a dictionary entry that doesn't exist")
+                yield decompressed
+            else:
+                yield from LZStringCodec.iter_decompress_from_base64(chunks)
+        except (IndexError, KeyError) as err:
+            raise ValueError(f"unable to decompress invalid value: {err}") from err
+
+    def adjust_save_data(self, adjusters=None):
+        """
+        Run the adjusters over the stored save data, with the amounts and rules of get_adjustment_profile()
+
+        The result is the same as calling each adjuster in ADJUSTERS order, but the resource adjusters
+        (fill_resources, stack_resources and fill_population) share a single pass over the resource node.
+        The adjusters never modify the data they are passed, they copy only the nodes they change,
+        so the original save data can be shared with the result instead of deep copied.
+        The rules of the profile are applied last.
+
+        :param adjusters: names of the adjusters to run, from ADJUSTERS, or None for the ones the profile runs
+        :type adjusters: collections.abc.Container
+        :return: True if the adjusters changed anything, False if the save was already as they would make it
+        :rtype: bool
+        """
+        data = self._save_data
+        profile = self.get_adjustment_profile()
+        if adjusters is None:
+            adjusters = profile.adjusters
+
+        # one census of the buildings, with their counts both before and after adjust_buildings, serves every adjuster
+        with self.timings.span("census"):
+            census = BuildingCensus(data, profile.building_amounts if "adjust_buildings" in adjusters else None)
+
+        # adjust_buildings doesn't read resources, so it can run before the resource pass.
+        # stack_resources runs before adjust_buildings in ADJUSTERS order and fill_population after it,
+        # so their rules get built from the buildings before and after adjusting them respectively.
+        adjusted_data = data
+        if "adjust_buildings" in adjusters:
+            with self.timings.span("adjust_buildings"):
+                adjusted_data = self.adjust_buildings(data, profile.building_amounts, census)
+
+        with self.timings.span("adjust_resources"):
+            resource_rules = []
+            if "fill_resources" in adjusters:
+                resource_rules.append(self._get_fill_resources_rule(data, profile.unbounded_resource_amount))
+            if "stack_resources" in adjusters:
+                resource_rules.append(self._get_stack_resources_rule(data, profile.stack_amount, census.counts))
+            if "fill_population" in adjusters:
+                resource_rules.append(self._get_fill_population_rule(adjusted_data, census.adjusted_counts))
+            data = self._adjust_resources(adjusted_data, resource_rules)
+
+        if "fill_soldiers" in adjusters:
+            with self.timings.span("fill_soldiers"):
+                data = self.fill_soldiers(data, census.adjusted_counts)
+        if "adjust_prestige_currency" in adjusters:
+            with self.timings.span("adjust_prestige_currency"):
+                data = self.adjust_prestige_currency(data, profile.prestige_currency_amounts)
+        if "adjust_arpa_research" in adjusters:
+            with self.timings.span("adjust_arpa_research"):
+                data = self.adjust_arpa_research(data)
+        if profile.rules:
+            with self.timings.span("profile_rules"):
+                data = profile.apply_rules(data)
 
-        # TODO: make this pull settings from somewhere to determine whether to run each one or not
-        # TODO: make this pull settings from somewhere to determine parameters for each call
-        data = self.fill_resources(data, self.DEFAULT_UNBOUNDED_RESOURCE_AMOUNT)
-        data = self.stack_resources(data, self.DEFAULT_STACK_AMOUNT)
-        data = self.adjust_buildings(data, self.DEFAULT_BUILDING_AMOUNTS)
-        data = self.fill_population(data)
-        data = self.fill_soldiers(data)
-        data = self.adjust_prestige_currency(data, self.DEFAULT_PRESTIGE_CURRENCY_AMOUNTS)
-        data = self.adjust_arpa_research(data)
+        return self._set_checked(data)
 
-        self.save_data = data
+    @staticmethod
+    def _adjust_resources(save_data, rules):
+        """
+        Visit each resource node once and run every rule on it, in order.
+
+        A rule is called as rule(resource_name, resource) and returns a dict of changes to make to the resource
+        (or nothing). Later rules see the changes made by earlier ones. A rule raising KeyError is skipped for
+        that resource. Rules that are None are ignored, which is what the _get_*_rule methods return
+        when their adjuster has nothing to do.
+
+        :param save_data: the entire evolve savefile json data that needs to be adjusted
+        :type save_data: dict
+        :param rules: rules to run on each resource
+        :type rules: list
+        :return: save_data with the changes from all rules
+        :rtype: dict
+        """
+        rules = [rule for rule in rules if rule is not None]
+        if not rules:
+            return save_data
+        resources = save_data["resource"]
+
+        updated_resources = {}
+        for name, resource in resources.items():
+            current = resource
+            for rule in rules:
+                try:
+                    changes = rule(name, current)
+                except KeyError:
+                    continue
+                if changes:
+                    if current is resource:
+                        current = dict(resource)
+                    current.update(changes)
+            if current is not resource:
+                updated_resources[name] = current
+
+        return _copy_with_changes(save_data, {"resource": _copy_with_changes(resources, updated_resources)})
 
     @staticmethod
     def fill_resources(save_data, amount_for_unbounded):
@@ -218,27 +3453,26 @@ class EvolveSaveEditor:
         :return: save_data with resources at max amounts and unbounded resources at amount_for_unbounded amount
         :rtype: dict
         """
+        rule = EvolveSaveEditor._get_fill_resources_rule(save_data, amount_for_unbounded)
+        return EvolveSaveEditor._adjust_resources(save_data, [rule])
+
+    @staticmethod
+    def _get_fill_resources_rule(save_data, amount_for_unbounded):
         # resource node has the data we are interested in
-        try:
-            resources = copy.deepcopy(save_data["resource"])
-        except KeyError:
+        if "resource" not in save_data:
             logger = get_logger()
             logger.warning("could not load resource node in data passed to fill_resources()")
-            return save_data
-
-        for name in resources:
-            resource = resources[name]
-            try:
-                if resource["max"] < 0 and resource["amount"] < amount_for_unbounded:
-                    resource["amount"] = amount_for_unbounded
-                if 0 < resource["max"] != resource["amount"]:
-                    resource["amount"] = resource["max"]
-            except KeyError:
-                continue
+            return None
+        return lambda name, resource: EvolveSaveEditor._fill_one_resource(resource, amount_for_unbounded)
 
-        updated_data = save_data
-        updated_data["resource"] = resources
-        return updated_data
+    @staticmethod
+    def _fill_one_resource(resource, amount_for_unbounded):
+        changes = {}
+        if resource["max"] < 0 and resource["amount"] < amount_for_unbounded:
+            changes["amount"] = amount_for_unbounded
+        if 0 < resource["max"] != changes.get("amount", resource["amount"]):
+            changes["amount"] = resource["max"]
+        return changes
 
     @staticmethod
     def stack_resources(save_data, amount):
@@ -261,66 +3495,57 @@ class EvolveSaveEditor:
         :return: save_data with resources at max amounts and unbounded resources at amount_for_unbounded amount
         :rtype: dict
         """
-        try:
-            resources = copy.deepcopy(save_data["resource"])
-            city = save_data["city"]
-        except KeyError:
+        rule = EvolveSaveEditor._get_stack_resources_rule(save_data, amount)
+        return EvolveSaveEditor._adjust_resources(save_data, [rule])
+
+    @staticmethod
+    def _get_stack_resources_rule(save_data, amount, building_counts=None):
+        if "resource" not in save_data or "city" not in save_data:
             logger = get_logger()
             logger.warning("could not load resource or city node in data passed to stack_resources()")
-            return save_data
+            return None
 
-        crates_unlocked, containers_unlocked = EvolveSaveEditor._are_stackables_unlocked(city)
+        if building_counts is None:
+            building_counts = BuildingCensus(save_data).counts
+        crates_unlocked, containers_unlocked = EvolveSaveEditor._are_stackables_unlocked(building_counts)
 
         if not crates_unlocked and not containers_unlocked:
             # nothing to add here
-            return save_data
-
-        for name in resources:
-            resource = resources[name]
-            try:
-                EvolveSaveEditor._stack_one_resource(resource, amount, crates_unlocked, containers_unlocked)
-            except KeyError:
-                continue
+            return None
 
-        updated_data = save_data
-        updated_data["resource"] = resources
-        return updated_data
+        return lambda name, resource: EvolveSaveEditor._stack_one_resource(
+            resource, amount, crates_unlocked, containers_unlocked)
 
     @staticmethod
-    def _are_stackables_unlocked(city):
-        crates_unlocked = False
-        containers_unlocked = False
-        try:
-            if city["storage_yard"]["count"] > 0:
-                crates_unlocked = True
-        except KeyError:
+    def _are_stackables_unlocked(building_counts):
+        crates_unlocked = building_counts["city"].get("storage_yard", 0) > 0
+        if not crates_unlocked:
             logger = get_logger()
             logger.info("crates are not unlocked")
 
-        try:
-            if city["warehouse"]["count"] > 0:
-                containers_unlocked = True
-        except KeyError:
+        containers_unlocked = building_counts["city"].get("warehouse", 0) > 0
+        if not containers_unlocked:
             logger = get_logger()
             logger.info("containers are not unlocked")
         return crates_unlocked, containers_unlocked
 
     @staticmethod
     def _stack_one_resource(resource, amount, crates_unlocked, containers_unlocked):
+        changes = {}
         if not resource["stackable"]:
             # this resource doesn't use containers and crates
-            return
+            return changes
         if resource["amount"] == 0:
             # don't add containers for resources that aren't unlocked yet
-            return
+            return changes
         if crates_unlocked and resource["crates"] < amount:
-            resource["crates"] = amount
+            changes["crates"] = amount
         if containers_unlocked and resource["containers"] < amount:
-            resource["containers"] = amount
-        return
+            changes["containers"] = amount
+        return changes
 
     @staticmethod
-    def adjust_buildings(save_data, amounts):
+    def adjust_buildings(save_data, amounts, census=None):
         """
         Adjust building counts to passed in amounts.
 
@@ -332,62 +3557,72 @@ class EvolveSaveEditor:
         :type save_data: dict
         :param amounts: object with properties BuildingAmountsParam indicating the desired number of each building type
         :type amounts: BuildingAmountsParam
+        :param census: census of save_data, if one has been taken already. It is only used if it was taken with
+            the same amounts, otherwise a new one is taken
+        :type census: BuildingCensus
         :return: save_data with building counts adjusted appropriately
         :rtype: dict
         """
-        try:
-            city = copy.deepcopy(save_data["city"])
-            space = copy.deepcopy(save_data["space"])
-            interstellar = copy.deepcopy(save_data["interstellar"])
-            portal = copy.deepcopy(save_data["portal"])
-        except KeyError:
+        if any(zone not in save_data for zone in BuildingCensus.ZONES):
             logger = get_logger()
             logger.warning(
                 "could not load city or space or interstellar or portal node in data passed to adjust_buildings()")
             return save_data
 
-        city = EvolveSaveEditor._update_building_counts(city, amounts)
-        space = EvolveSaveEditor._update_building_counts(space, amounts)
-        interstellar = EvolveSaveEditor._update_building_counts(interstellar, amounts)
-        portal = EvolveSaveEditor._update_building_counts(portal, amounts)
+        if census is None or census.amounts != amounts:
+            census = BuildingCensus(save_data, amounts)
+
+        updated_zones = {}
+        for zone in BuildingCensus.ZONES:
+            buildings = save_data[zone]
+            updated_buildings = {building_name: _copy_with_changes(buildings[building_name], {"count": count})
+                                 for building_name, count in census.changes[zone].items()}
+            updated_zones[zone] = _copy_with_changes(buildings, updated_buildings)
 
         # update the save data and return it
-        updated_data = save_data
-        updated_data["city"] = city
-        updated_data["space"] = space
-        updated_data["interstellar"] = interstellar
-        updated_data["portal"] = portal
-        return updated_data
+        return _copy_with_changes(save_data, updated_zones)
 
     @staticmethod
-    def _update_building_counts(data, amounts):
-        for building_name in data:
-            building = data[building_name]
+    def _get_adjusted_building_counts(building_counts, amounts):
+        """
+        Work out what adjust_buildings() would set the buildings in one zone to
+        :param building_counts: building name -> count for every building in the zone
+        :type building_counts: dict
+        :param amounts: object with properties BuildingAmountsParam indicating the desired number of each building type
+        :type amounts: BuildingAmountsParam
+        :return: building name -> new count, for just the buildings whose count changes
+        :rtype: dict
+        """
+        changes = {}
+        # special buildings can depend on buildings that were updated earlier in the loop
+        current_counts = collections.ChainMap(changes, building_counts)
+        for building_name, count in building_counts.items():
+            building_type = EvolveSaveEditor.BUILDING_CATEGORIES.get(building_name)
+            if building_type is None:
+                # not a building we know how to adjust
+                continue
             try:
-                if building["count"] == 0:
-                    continue
-                if building_name in EvolveSaveEditor.BUILDING_TYPES["special"]:
-                    building["count"] = EvolveSaveEditor._get_special_building_count(data, building_name,
-                                                                                     building["count"])
+                if count == 0:
                     continue
-                for type_name in EvolveSaveEditor.BUILDING_TYPES:
-                    if building_name in EvolveSaveEditor.BUILDING_TYPES[type_name]:
-                        amount = getattr(amounts, type_name)
-                        if building["count"] < amount:
-                            building["count"] = amount
-                        break
+                if building_type == "special":
+                    new_count = EvolveSaveEditor._get_special_building_count(current_counts, building_name, count)
+                else:
+                    amount = getattr(amounts, building_type)
+                    new_count = amount if count < amount else count
             except (KeyError, TypeError):
                 continue
-        return data
+            if new_count != count:
+                changes[building_name] = new_count
+        return changes
 
     @staticmethod
-    def _get_special_building_count(other_building_data, name, curr_count):
+    def _get_special_building_count(other_building_counts, name, curr_count):
         # world collider has total 1859 segments, last one has to be done manually
         if name == "world_collider" and curr_count < 1858:
             return 1858
         # swarm satellite scales based on swarm_control
         if name == "swarm_satellite":
-            max_swarms = 18 * other_building_data["swarm_control"]["count"]
+            max_swarms = 18 * other_building_counts["swarm_control"]
             if curr_count < max_swarms:
                 return max_swarms
         # other special buildings have total 100 segments, last one has to be done manually
@@ -396,7 +3631,7 @@ class EvolveSaveEditor:
         return curr_count
 
     @staticmethod
-    def fill_population(save_data):
+    def fill_population(save_data, building_counts=None):
         """
         Fills citizen count up to maximum based on recalculated population cap
 
@@ -406,61 +3641,46 @@ class EvolveSaveEditor:
 
         :param save_data: the entire evolve savefile json data that needs to be adjusted
         :type save_data: dict
+        :param building_counts: building counts per zone of save_data from a BuildingCensus, if one has been taken
+        :type building_counts: dict
         :return: save_data with population's max and amounts set to the newly calculated value
         :rtype: dict
         """
-        try:
-            resources = copy.deepcopy(save_data["resource"])
-            city = save_data["city"]
-            space = save_data["space"]
-            interstellar = save_data["interstellar"]
-            race = save_data["race"]
-        except KeyError:
+        rule = EvolveSaveEditor._get_fill_population_rule(save_data, building_counts)
+        return EvolveSaveEditor._adjust_resources(save_data, [rule])
+
+    @staticmethod
+    def _get_fill_population_rule(save_data, building_counts=None):
+        if any(node not in save_data for node in ("resource", "city", "space", "interstellar", "race")):
             logger = get_logger()
             logger.warning("could not load resource or city or space or interstellar or race node in data passed to "
                            "fill_population()")
-            return save_data
-        try:
-            # we need to know what species this is to figure out where the citizen count is stored
-            species = race["species"]
-            citizen_node = resources[species]
-        except KeyError:
+            return None
+        # we need to know what species this is to figure out where the citizen count is stored
+        species = save_data["race"].get("species")
+        if species not in save_data["resource"]:
             logger = get_logger()
             logger.warning("could not determine species in fill_population()")
-            return save_data
-
-        new_citizen_cap = 0
-        # use a wrapper function here to avoid a lot of try/except blocks
-        new_citizen_cap += EvolveSaveEditor._get_building_count(city, "basic_housing")
-        new_citizen_cap += EvolveSaveEditor._get_building_count(city, "farm")
-        new_citizen_cap += EvolveSaveEditor._get_building_count(space, "living_quarters")
-        new_citizen_cap += EvolveSaveEditor._get_building_count(interstellar, "habitat")
-        new_citizen_cap += EvolveSaveEditor._get_building_count(city, "cottage") * 2  # each one holds 2
-        new_citizen_cap += EvolveSaveEditor._get_building_count(city, "apartment") * 5  # each one holds 5
-
-        try:
-            if new_citizen_cap > citizen_node["amount"]:
-                citizen_node["max"] = new_citizen_cap
-                citizen_node["amount"] = new_citizen_cap
-        except KeyError:
-            logger = get_logger()
-            logger.warning("could not update population count in fill_population()")
-            return save_data
+            return None
 
-        updated_data = save_data
-        updated_data["resource"] = resources
-        return updated_data
+        if building_counts is None:
+            building_counts = BuildingCensus(save_data).counts
+        new_citizen_cap = BuildingCensus.get_capacity(building_counts, EvolveSaveEditor.CITIZEN_CAPACITY)
 
-    @staticmethod
-    def _get_building_count(save_data, building_name):
-        try:
-            return save_data[building_name]["count"]
-        except KeyError:
-            pass
-        return 0
+        def fill_citizens(name, resource):
+            if name != species:
+                return None
+            try:
+                if new_citizen_cap > resource["amount"]:
+                    return {"max": new_citizen_cap, "amount": new_citizen_cap}
+            except KeyError:
+                logger = get_logger()
+                logger.warning("could not update population count in fill_population()")
+            return None
+        return fill_citizens
 
     @staticmethod
-    def fill_soldiers(save_data):
+    def fill_soldiers(save_data, building_counts=None):
         """
         Fills soldier count up to maximum based on recalculated soldier cap
 
@@ -471,39 +3691,33 @@ class EvolveSaveEditor:
 
         :param save_data: the entire evolve savefile json data that needs to be adjusted
         :type save_data: dict
+        :param building_counts: building counts per zone of save_data from a BuildingCensus, if one has been taken
+        :type building_counts: dict
         :return: save_data with soldier's max and amounts set to the newly calculated value
         :rtype: dict
         """
-        try:
-            civic = copy.deepcopy(save_data["civic"])
-            city = save_data["city"]
-            space = save_data["space"]
-            interstellar = save_data["interstellar"]
-        except KeyError:
+        if any(node not in save_data for node in ("civic", "city", "space", "interstellar")):
             logger = get_logger()
             logger.warning(
                 "could not load civic or city or space or interstellar node in data passed to fill_soldiers()")
             return save_data
 
-        new_soldier_cap = 0
-        # use a wrapper function here to avoid a lot of try/except blocks
-        new_soldier_cap += EvolveSaveEditor._get_building_count(city, "garrison") * 3  # each one holds 3
-        new_soldier_cap += EvolveSaveEditor._get_building_count(space, "space_barracks") * 2  # each one holds 2
-        new_soldier_cap += EvolveSaveEditor._get_building_count(interstellar, "cruiser") * 3  # each one holds 3
+        if building_counts is None:
+            building_counts = BuildingCensus(save_data).counts
+        new_soldier_cap = BuildingCensus.get_capacity(building_counts, EvolveSaveEditor.SOLDIER_CAPACITY)
 
+        civic = save_data["civic"]
         try:
-            if new_soldier_cap > civic["garrison"]["workers"]:
-                civic["garrison"]["workers"] = new_soldier_cap
-                civic["garrison"]["max"] = new_soldier_cap
-                civic["garrison"]["wounded"] = 0
+            garrison = civic["garrison"]
+            if new_soldier_cap <= garrison["workers"]:
+                return save_data
         except KeyError:
             logger = get_logger()
             logger.warning("could not update garrison details in fill_soldiers()")
             return save_data
 
-        updated_data = save_data
-        updated_data["civic"] = civic
-        return updated_data
+        garrison = _copy_with_changes(garrison, {"workers": new_soldier_cap, "max": new_soldier_cap, "wounded": 0})
+        return _copy_with_changes(save_data, {"civic": _copy_with_changes(civic, {"garrison": garrison})})
 
     @staticmethod
     def adjust_prestige_currency(save_data, amounts):
@@ -527,8 +3741,8 @@ class EvolveSaveEditor:
         """
         # race node has the data for the current run, stats node has the overall totals
         try:
-            race = copy.deepcopy(save_data["race"])
-            stats = copy.deepcopy(save_data["stats"])
+            race = save_data["race"]
+            stats = save_data["stats"]
         except KeyError:
             logger = get_logger()
             logger.warning("could not load race or stats node in data passed to adjust_prestige_currency()")
@@ -546,10 +3760,7 @@ class EvolveSaveEditor:
         stats = EvolveSaveEditor._update_prestige_currency_stats(stats, "dark", dark_added)
 
         # update the save data and return it
-        updated_data = save_data
-        updated_data["race"] = race
-        updated_data["stats"] = stats
-        return updated_data
+        return _copy_with_changes(save_data, {"race": race, "stats": stats})
 
     @staticmethod
     def _update_prestige_currency_value(data, currency, amount):
@@ -558,7 +3769,7 @@ class EvolveSaveEditor:
             if amount and data[currency]["count"]:
                 added = amount - data[currency]["count"]
                 if added > 0:
-                    data[currency]["count"] = amount
+                    data = _copy_with_changes(data, {currency: _copy_with_changes(data[currency], {"count": amount})})
                 else:
                     added = 0
         except KeyError:
@@ -569,7 +3780,7 @@ class EvolveSaveEditor:
     def _update_prestige_currency_stats(data, currency, amount_added):
         try:
             if amount_added and data[currency]:
-                data[currency] = data[currency] + amount_added
+                data = _copy_with_changes(data, {currency: data[currency] + amount_added})
         except KeyError:
             pass
         return data
@@ -590,39 +3801,316 @@ class EvolveSaveEditor:
         :rtype: dict
         """
         try:
-            arpa = copy.deepcopy(save_data["arpa"])
+            arpa = save_data["arpa"]
         except KeyError:
             logger = get_logger()
             logger.warning("could not load arpa node in data passed to adjust_arpa_research()")
             return save_data
 
-        for research_name in arpa:
-            research = arpa[research_name]
+        updated_arpa = {}
+        for research_name, research in arpa.items():
             try:
                 # genetic sequencing is handled differently than others
                 if research_name == "sequence":
                     if research["progress"] < research["max"] - 5:
-                        research["progress"] = research["max"] - 5
+                        updated_arpa[research_name] = _copy_with_changes(research, {"progress": research["max"] - 5})
                 # launch facility only has 1 rank, ignore it if that rank is done
                 elif research_name == "launch_facility":
                     if research["rank"] >= 1:
                         continue
-                    EvolveSaveEditor._update_arpa_project(research)
+                    updated_arpa[research_name] = EvolveSaveEditor._update_arpa_project(research)
                 # we're in one of the uncapped rank researches
                 else:
-                    EvolveSaveEditor._update_arpa_project(research)
+                    updated_arpa[research_name] = EvolveSaveEditor._update_arpa_project(research)
             except (KeyError, TypeError):
                 continue
 
-        updated_data = save_data
-        updated_data["arpa"] = arpa
-        return updated_data
+        return _copy_with_changes(save_data, {"arpa": _copy_with_changes(arpa, updated_arpa)})
 
     @staticmethod
     def _update_arpa_project(research):
         if research["complete"] < 99:
-            research["complete"] = 99
+            return _copy_with_changes(research, {"complete": 99})
+        return research
+
+
+class BuildingCensus:
+    """
+    Counts of the buildings in the city, space, interstellar and portal zones of a save, taken in one pass.
+
+    counts holds zone -> building name -> count as they are in the save.
+    When amounts is passed in (and kept in amounts), changes holds zone -> building name -> count for the buildings that
+    adjust_buildings() changes with those amounts, and adjusted_counts holds all the counts after adjusting.
+    Otherwise adjusted_counts is the same as counts.
+    """
+    ZONES = ("city", "space", "interstellar", "portal")
+
+    def __init__(self, save_data, amounts=None):
+        """
+        :param save_data: the entire evolve savefile json data to count the buildings of
+        :type save_data: dict
+        :param amounts: amounts adjust_buildings() will be called with, if the adjusted counts are needed
+        :type amounts: EvolveSaveEditor.BuildingAmountsParam
+        """
+        self.amounts = amounts
+        self.counts = {zone: self._count_buildings(save_data.get(zone)) for zone in self.ZONES}
+        self.changes = {zone: {} for zone in self.ZONES}
+        # adjust_buildings() doesn't change anything unless all of the zones are there
+        if amounts is not None and all(zone in save_data for zone in self.ZONES):
+            for zone in self.ZONES:
+                self.changes[zone] = EvolveSaveEditor._get_adjusted_building_counts(self.counts[zone], amounts)
+        self.adjusted_counts = {zone: collections.ChainMap(self.changes[zone], self.counts[zone])
+                                for zone in self.ZONES}
+
+    @staticmethod
+    def _count_buildings(zone_data):
+        if not isinstance(zone_data, dict):
+            return {}
+        # zones also hold things like the city's biome and morale, only the nodes with a count are buildings
+        return {name: node["count"] for name, node in zone_data.items() if isinstance(node, dict) and "count" in node}
+
+    @staticmethod
+    def get_capacity(building_counts, capacity):
+        """
+        Add up how much of something (like citizens) the buildings hold
+        :param building_counts: zone -> building name -> count, like BuildingCensus.counts
+        :type building_counts: dict
+        :param capacity: (zone, building name) -> how much each building holds, like EvolveSaveEditor.CITIZEN_CAPACITY
+        :type capacity: dict
+        :return: total held by all the buildings
+        :rtype: int or float
+        """
+        total = 0
+        for (zone, building_name), held in capacity.items():
+            total += building_counts[zone].get(building_name, 0) * held
+        return total
+
+
+class AdjustmentProfile:
+    """
+    Which adjusters EvolveSaveEditor.adjust_save_data() runs, the amounts they adjust to,
+    and rules that set values in the save once they are done
+
+    A profile is compiled once, by from_dict() or load_adjustment_profile(), then adjusts any number of saves.
+    Its amounts are checked when it is compiled, and its rules are resolved into a tree of the keys they go through,
+    so apply_rules() walks each save along each path once, however many rules share it.
+    """
+    # adjuster -> the amounts it can be given in a profile
+    ADJUSTER_OPTIONS = {
+        "fill_resources": ("unbounded_amount",),
+        "stack_resources": ("amount",),
+        "adjust_buildings": EvolveSaveEditor.BuildingAmountsParam._fields,
+        "adjust_prestige_currency": tuple(EvolveSaveEditor.DEFAULT_PRESTIGE_CURRENCY_AMOUNTS),
+    }
+
+    def __init__(self, adjusters=None, building_amounts=None, unbounded_resource_amount=None, stack_amount=None,
+                 prestige_currency_amounts=None, rules=()):
+        """
+        Anything not passed in is the same as in EvolveSaveEditor's DEFAULT amounts
+        :param adjusters: names of the adjusters to run, from EvolveSaveEditor.ADJUSTERS
+        :type adjusters: collections.abc.Iterable
+        :param building_amounts: amounts for adjust_buildings()
+        :type building_amounts: EvolveSaveEditor.BuildingAmountsParam
+        :param unbounded_resource_amount: amount for fill_resources() to fill resources without a max to
+        :type unbounded_resource_amount: int or float
+        :param stack_amount: crates and containers for stack_resources() to assign to each resource
+        :type stack_amount: int or float
+        :param prestige_currency_amounts: prestige currency -> amount for adjust_prestige_currency()
+        :type prestige_currency_amounts: dict
+        :param rules: rules to apply after the adjusters, in order
+        :type rules: collections.abc.Iterable
+        :raises ValueError: if a rule's path isn't a JSON Pointer to something inside the save
+        """
+        self.adjusters = tuple(EvolveSaveEditor.ADJUSTERS if adjusters is None else adjusters)
+        self.building_amounts = EvolveSaveEditor.DEFAULT_BUILDING_AMOUNTS if building_amounts is None \
+            else building_amounts
+        self.unbounded_resource_amount = EvolveSaveEditor.DEFAULT_UNBOUNDED_RESOURCE_AMOUNT \
+            if unbounded_resource_amount is None else unbounded_resource_amount
+        self.stack_amount = EvolveSaveEditor.DEFAULT_STACK_AMOUNT if stack_amount is None else stack_amount
+        self.prestige_currency_amounts = EvolveSaveEditor.DEFAULT_PRESTIGE_CURRENCY_AMOUNTS \
+            if prestige_currency_amounts is None else prestige_currency_amounts
+        self.rules = tuple(rules)
+        self._rule_tree = self._compile_rules(self.rules)
+        # the top-level nodes the profile reads or changes, for parsing saves lazily
+        self.nodes = EvolveSaveEditor.get_adjuster_nodes(self.adjusters) | frozenset(self._rule_tree)
+
+    @staticmethod
+    def from_dict(config):
+        """
+        Compile a profile from its json (or TOML) form, like
+        {"adjusters": {"stack_resources": {"amount": 500}, "fill_soldiers": false},
+        "rules": [{"path": "/resource/Food/amount", "min": 1000}]}
+        Each adjuster can be true (the default) to run with the DEFAULT amounts, false to not run,
+        or an object of the amounts in ADJUSTER_OPTIONS to run with, those not given keep their DEFAULT amounts.
+        Each rule has a JSON Pointer path and one of PROFILE_RULE_OPERATIONS with its value.
+        :param dict config: the profile, as loaded from its file
+        :return: the compiled profile
+        :rtype: AdjustmentProfile
+        :raises ValueError: if config isn't an adjustment profile
+        """
+        if not isinstance(config, dict) or not set(config) <= {"adjusters", "rules"}:
+            raise ValueError("an adjustment profile holds only adjusters and rules")
+        adjuster_config = config.get("adjusters", {})
+        rule_config = config.get("rules", [])
+        if not isinstance(adjuster_config, dict) or not isinstance(rule_config, list):
+            raise ValueError("adjusters must be an object and rules a list")
+        unknown = set(adjuster_config) - set(EvolveSaveEditor.ADJUSTERS)
+        if unknown:
+            raise ValueError(f"unknown adjusters {', '.join(sorted(unknown))}")
+        adjusters = []
+        options = {}
+        for name in EvolveSaveEditor.ADJUSTERS:
+            setting = adjuster_config.get(name, True)
+            if setting is False:
+                continue
+            adjusters.append(name)
+            if setting is not True:
+                options.update(AdjustmentProfile._parse_options(name, setting))
+        rules = [AdjustmentProfile._parse_rule(rule) for rule in rule_config]
+        return AdjustmentProfile(adjusters, rules=rules, **options)
+
+    @staticmethod
+    def _parse_options(name, setting):
+        """
+        :return: keyword arguments of AdjustmentProfile for the amounts an adjuster is given in a profile
+        :rtype: dict
+        """
+        allowed = AdjustmentProfile.ADJUSTER_OPTIONS.get(name, ())
+        if not isinstance(setting, dict) or not set(setting) <= set(allowed):
+            raise ValueError(f"{name} must be true, false or an object of "
+                             f"{', '.join(allowed) if allowed else 'nothing, it has no amounts'}")
+        for option, value in setting.items():
+            if type(value) not in (int, float):
+                raise ValueError(f"{name} {option} must be a number")
+        if not setting:
+            return {}
+        if name == "fill_resources":
+            return {"unbounded_resource_amount": setting["unbounded_amount"]}
+        if name == "stack_resources":
+            return {"stack_amount": setting["amount"]}
+        if name == "adjust_buildings":
+            return {"building_amounts": EvolveSaveEditor.DEFAULT_BUILDING_AMOUNTS._replace(**setting)}
+        return {"prestige_currency_amounts": dict(EvolveSaveEditor.DEFAULT_PRESTIGE_CURRENCY_AMOUNTS, **setting)}
+
+    @staticmethod
+    def _parse_rule(rule):
+        """
+        :param dict rule: a rule as it is in a profile, like {"path": "/race/mutation", "set": 3}
+        :rtype: ProfileRule
+        """
+        ops = [op for op in PROFILE_RULE_OPERATIONS if isinstance(rule, dict) and op in rule]
+        if len(ops) != 1 or set(rule) != {"path", ops[0]}:
+            raise ValueError(f"{rule!r} is not a path with one of {', '.join(PROFILE_RULE_OPERATIONS)}")
+        value = rule[ops[0]]
+        if ops[0] != "set" and type(value) not in (int, float):
+            raise ValueError(f"{rule!r} needs a number to {ops[0]} the value to")
+        return ProfileRule(rule["path"], ops[0], value)
+
+    @staticmethod
+    def _compile_rules(rules):
+        """
+        :return: key -> (JSON Pointer, rules for the value there, tree of the keys below it) for each key
+            the rules go through from the top of the save
+        :rtype: dict
+        """
+        tree = {}
+        for rule in rules:
+            path = _split_json_pointer(rule.path)
+            if not path:
+                raise ValueError("a rule can't set the whole save")
+            children = tree
+            for depth, key in enumerate(path, 1):
+                pointer = "/" + "/".join(token.replace("~", "~0").replace("/", "~1") for token in path[:depth])
+                branch = children.setdefault(key, (pointer, [], {}))
+                children = branch[2]
+            branch[1].append(rule)
+        return tree
+
+    def apply_rules(self, save_data):
+        """
+        Apply the rules to save_data without modifying it
+        Rules for the same path are applied in the order they are in the profile, and before the rules for the
+        paths inside it. A rule whose path isn't in the save is skipped.
+        :param dict save_data: the entire evolve savefile json data to apply the rules to
+        :return: save_data if the rules changed nothing, otherwise a copy of it with just the nodes they changed copied
+        :rtype: dict
+        """
+        return self._apply_rule_tree(save_data, self._rule_tree)
+
+    @staticmethod
+    def _apply_rule_tree(node, tree):
+        changes = {}
+        for token, (pointer, rules, children) in tree.items():
+            key = AdjustmentProfile._get_key(node, token)
+            if key is None:
+                logger = get_logger()
+                logger.warning(f"could not find {pointer} in save data, skipping the profile rules for it")
+                continue
+            value = node[key]
+            for rule in rules:
+                value = AdjustmentProfile._apply_rule(value, rule)
+            changes[key] = AdjustmentProfile._apply_rule_tree(value, children) if children else value
+        if not changes:
+            return node
+        members = node if isinstance(node, dict) else dict(enumerate(node))
+        updated = _copy_with_changes(members, changes)
+        if updated is members:
+            return node
+        return updated if isinstance(node, dict) else list(updated.values())
+
+    @staticmethod
+    def _get_key(node, token):
+        """
+        :return: the key of node that token stands for, or None if node has no such key
+        """
+        if isinstance(node, dict):
+            return token if token in node else None
+        if isinstance(node, list) and token.isascii() and token.isdigit() and (token == "0" or token[0] != "0") \
+                and int(token) < len(node):
+            return int(token)
+        return None
+
+    @staticmethod
+    def _apply_rule(value, rule):
+        if rule.op == "set":
+            return rule.value
+        if type(value) not in (int, float):
+            logger = get_logger()
+            logger.warning(f"{rule.path} is not a number in save data, skipping the profile rule to {rule.op} it")
+            return value
+        if rule.op == "min":
+            return rule.value if value < rule.value else value
+        return rule.value if value > rule.value else value
+
+    def __getstate__(self):
+        # pickle can't find BuildingAmountsParam inside EvolveSaveEditor before protocol 4, which --jobs needs on 3.7
+        return dict(self.__dict__, building_amounts=self.building_amounts._asdict())
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.building_amounts = EvolveSaveEditor.BuildingAmountsParam(**state["building_amounts"])
+
+    def get_settings(self):
+        """
+        :return: everything in the profile that decides how adjust_save_data() changes a save
+        :rtype: dict
+        """
+        settings = {
+            "adjusters": list(self.adjusters),
+            "building_amounts": self.building_amounts._asdict(),
+            "unbounded_resource_amount": self.unbounded_resource_amount,
+            "stack_amount": self.stack_amount,
+            "prestige_currency_amounts": self.prestige_currency_amounts,
+        }
+        # only there when there are rules, so the settings of saves adjusted without any stay as they were
+        if self.rules:
+            settings["rules"] = [list(rule) for rule in self.rules]
+        return settings
 
 
 if __name__ == "__main__":  # pragma: no cover
+    # needed for the worker processes of --jobs to start in the pyinstaller executable
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
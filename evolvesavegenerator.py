@@ -0,0 +1,299 @@
+"""
+This script generates synthetic saves for the game evolve, for load and scaling tests of evolvesaveeditor.py
+Saves can be any size, and the same seed always generates the same save.
+"""
+
+import argparse
+import json
+import random
+import sys
+
+from evolvesaveeditor import EvolveSaveEditor
+
+# the buildings in each zone, every building in EvolveSaveEditor.BUILDING_TYPES is in at least one zone
+ZONE_BUILDINGS = {
+    "city": ("farm", "basic_housing", "shed", "university", "rock_quarry", "lumber_yard", "bank", "garrison", "silo",
+             "mine", "cement_plant", "library", "temple", "amphitheatre", "foundry", "cottage", "mill", "smelter",
+             "coal_mine", "metal_refinery", "storage_yard", "wardenclyffe", "trade", "coal_power", "apartment",
+             "hospital", "sawmill", "boot_camp", "warehouse", "factory", "oil_well", "wharf", "oil_depot",
+             "oil_power", "casino", "biolab", "fission_power", "tourist_center", "mass_driver", "lodge", "smokehouse",
+             "slave_pen", "soul_well", "shrine", "windmill"),
+    "space": ("satellite", "propellant_depot", "gps", "moon_base", "iridium_mine", "helium_mine", "observatory",
+              "nav_beacon", "spaceport", "swarm_control", "living_quarters", "garage", "red_mine", "fabrication",
+              "geothermal", "space_station", "outpost", "iridium_ship", "iron_ship", "biodome", "ziggurat",
+              "red_tower", "red_factory", "swarm_satellite", "swarm_plant", "gas_mining", "gas_storage",
+              "space_barracks", "oil_extractor", "elerium_ship", "exotic_lab", "elerium_contain", "drone",
+              "e_reactor", "world_collider", "vr_center", "citadel"),
+    "interstellar": ("starport", "nexus", "warehouse", "mining_droid", "xfer_station", "cargo_yard", "laboratory",
+                     "processing", "habitat", "dyson", "g_factory", "exchange", "cruiser", "neutron_miner",
+                     "far_reach", "stellar_engine", "harvester", "fusion", "elerium_prospector", "mass_ejector"),
+    "portal": ("turret", "carport", "war_drone", "sensor_drone", "attractor", "war_droid"),
+}
+
+# resource name -> (display name, kind), kind decides what the resource's max and storage look like
+RESOURCES = {
+    "Money": ("$", "capped"), "Knowledge": ("Knowledge", "capped"), "Crates": ("Crate", "capped"),
+    "Containers": ("Container", "capped"), "Food": ("Food", "stackable"), "Lumber": ("Lumber", "stackable"),
+    "Stone": ("Stone", "stackable"), "Furs": ("Furs", "stackable"), "Copper": ("Copper", "stackable"),
+    "Iron": ("Iron", "stackable"), "Aluminium": ("Aluminium", "stackable"), "Cement": ("Cement", "stackable"),
+    "Coal": ("Coal", "stackable"), "Oil": ("Oil", "capped"), "Uranium": ("Uranium", "capped"),
+    "Steel": ("Steel", "stackable"), "Titanium": ("Titanium", "stackable"), "Alloy": ("Alloy", "stackable"),
+    "Polymer": ("Polymer", "stackable"), "Iridium": ("Iridium", "stackable"), "Helium_3": ("Helium-3", "capped"),
+    "Deuterium": ("Deuterium", "capped"), "Neutronium": ("Neutronium", "capped"),
+    "Adamantite": ("Adamantite", "stackable"), "Infernite": ("Infernite", "capped"),
+    "Elerium": ("Elerium", "capped"), "Nano_Tube": ("Nano Tube", "capped"), "Graphene": ("Graphene", "stackable"),
+    "Stanene": ("Stanene", "stackable"), "Genes": ("Genes", "prestige"), "Soul_Gem": ("Soul_Gem", "prestige"),
+    "Plywood": ("Plywood", "craftable"), "Brick": ("Brick", "craftable"),
+    "Wrought_Iron": ("Wrought Iron", "craftable"), "Sheet_Metal": ("Sheet Metal", "craftable"),
+    "Mythril": ("Mythril", "craftable"), "Aerogel": ("Aerogel", "craftable"),
+}
+
+JOBS = ("farmer", "lumberjack", "quarry_worker", "miner", "coal_miner", "craftsman", "cement_worker", "entertainer",
+        "professor", "scientist", "banker", "colonist", "space_miner", "hell_surveyor")
+
+# sequence is the genetic sequencing, the others are arpa research projects
+ARPA_PROJECTS = ("sequence", "lhc", "stock_exchange", "monument", "launch_facility")
+
+SPECIES = ("human", "elven", "orc", "cath", "kobold", "sharkin", "octigoran", "entish", "scorpid")
+
+# about the size of a late game save
+DEFAULT_RESOURCES = len(RESOURCES) + 1
+DEFAULT_BUILDINGS = {"city": 40, "space": 36, "interstellar": 20, "portal": 6}
+DEFAULT_ARPA_PROJECTS = 5
+DEFAULT_JOBS = 14
+DEFAULT_SEED = 0
+
+
+def main():
+    """
+    Call parse_args, then generate a save and write it out
+    :return: nothing
+    """
+    args = parse_args(sys.argv[1:])
+    buildings = {zone: getattr(args, zone) for zone in ZONE_BUILDINGS}
+    save_data = generate_save(args.resources, buildings, args.arpa_projects, args.jobs, args.seed)
+    output = json.dumps(save_data, separators=(',', ':')) if args.format == "json" else export_save(save_data)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        sys.stdout.write(output)
+
+
+def parse_args(args):
+    """
+        Parses and validates command line arguments
+        :param list args: arguments passed into the script (usually sys.argv[1:])
+        :return: arguments parsed into a neat object
+        """
+    parser = argparse.ArgumentParser(
+        description="Synthetic save generator for game evolve")
+    parser.add_argument("--resources", type=_non_negative_int, default=DEFAULT_RESOURCES,
+                        help="number of resources (default: %(default)s)")
+    for zone, count in DEFAULT_BUILDINGS.items():
+        parser.add_argument(f"--{zone}", type=_non_negative_int, default=count,
+                            help=f"number of buildings in the {zone} zone (default: %(default)s)")
+    parser.add_argument("--arpa-projects", type=_non_negative_int, default=DEFAULT_ARPA_PROJECTS,
+                        help="number of arpa projects (default: %(default)s)")
+    parser.add_argument("--jobs", type=_non_negative_int, default=DEFAULT_JOBS,
+                        help="number of civic jobs (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help="seed for the random values, the same seed generates the same save (default: %(default)s)")
+    parser.add_argument("--format", choices=("lz", "json"), default="lz",
+                        help="lz for an exported save that can be imported into evolve, json for the raw save data "
+                             "(default: %(default)s)")
+    parser.add_argument("-o", "--output", help="file to write the save to (default: stdout)")
+    return parser.parse_args(args)
+
+
+def _non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} is a negative number")
+    return number
+
+
+def export_save(save_data):
+    """
+    Compress save data the way evolve exports it
+    :param dict save_data: the entire evolve savefile json data
+    :return: the save as an lz-string that can be imported into evolve or edited by evolvesaveeditor.py
+    :rtype: str
+    """
+    return EvolveSaveEditor.compress_lz_string(json.dumps(save_data, separators=(',', ':')))
+
+
+def generate_save(resources=DEFAULT_RESOURCES, buildings=None, arpa_projects=DEFAULT_ARPA_PROJECTS,
+                  jobs=DEFAULT_JOBS, seed=DEFAULT_SEED):
+    """
+    Generate the json data of an evolve save
+
+    The real resource, building, job and arpa project names are used first.
+    Asking for more than there are real names adds copies with a number on the end (like farm_2),
+    which evolvesaveeditor.py leaves alone since it doesn't know what they are.
+
+    :param resources: number of resources, including the one holding the species' citizens
+    :type resources: int
+    :param buildings: zone -> number of buildings in that zone, zones left out get their DEFAULT_BUILDINGS number
+    :type buildings: dict
+    :param arpa_projects: number of arpa projects, including the genetic sequencing
+    :type arpa_projects: int
+    :param jobs: number of civic jobs, not counting the garrison
+    :type jobs: int
+    :param seed: seed for the random values, the same seed generates the same save
+    :type seed: int
+    :return: the entire evolve savefile json data
+    :rtype: dict
+    """
+    rng = random.Random(seed)
+    buildings = {**DEFAULT_BUILDINGS, **(buildings or {})}
+    species = rng.choice(SPECIES)
+    return {
+        "seed": rng.randint(0, 99999),
+        "resource": _generate_resources(rng, species, resources),
+        "evolution": {},
+        "tech": {},
+        "city": {**_generate_city_info(rng), **_generate_buildings(rng, "city", buildings["city"])},
+        "space": _generate_buildings(rng, "space", buildings["space"]),
+        "interstellar": _generate_buildings(rng, "interstellar", buildings["interstellar"]),
+        "portal": _generate_buildings(rng, "portal", buildings["portal"]),
+        "civic": _generate_civic(rng, jobs),
+        "race": _generate_race(rng, species),
+        "genes": {},
+        "stats": _generate_stats(rng),
+        "event": rng.randint(0, 999),
+        "new": False,
+        "version": "0.5.6",
+        "settings": {"civTabs": 1, "theme": "dark", "locale": "en-US"},
+        "queue": {"display": True, "queue": []},
+        "lastMsg": {"m": "Generated save", "c": "info"},
+        "arpa": _generate_arpa(rng, arpa_projects),
+        "r_queue": {"display": True, "queue": []},
+    }
+
+
+def _get_names(real_names, count):
+    """
+    :return: count names, the real names first, then numbered copies of them
+    :rtype: list
+    """
+    names = list(real_names[:count])
+    copy_number = 2
+    while len(names) < count:
+        names.extend(f"{name}_{copy_number}" for name in real_names[:count - len(names)])
+        copy_number += 1
+    return names
+
+
+def _generate_resources(rng, species, count):
+    if count == 0:
+        return {}
+    resources = {species: {"name": species.title(), "display": True, "amount": rng.randint(1, 500), "crates": 0,
+                           "diff": 0, "delta": 0, "max": 500, "rate": 0, "stackable": False, "containers": 0}}
+    for name in _get_names(tuple(RESOURCES), count - 1):
+        base_name = name if name in RESOURCES else name.rsplit("_", 1)[0]
+        display, kind = RESOURCES[base_name]
+        resources[name] = _generate_resource(rng, display, kind)
+    return resources
+
+
+def _generate_resource(rng, display, kind):
+    if kind == "craftable":
+        maximum, amount = -1, rng.randint(0, 10 ** 13)
+    elif kind == "prestige":
+        maximum, amount = -2, rng.randint(0, 10 ** 9)
+    else:
+        maximum = rng.randint(1, 10 ** 12)
+        amount = round(rng.uniform(0, maximum), 2)
+    stackable = kind == "stackable"
+    return {"name": display, "display": True, "value": round(rng.uniform(1, 3000), 2), "amount": amount,
+            "crates": rng.randint(0, 1000) if stackable else 0, "diff": round(rng.uniform(0, 10 ** 9), 2),
+            "delta": 0, "max": maximum, "rate": 1, "stackable": stackable,
+            "containers": rng.randint(0, 3000) if stackable else 0, "trade": 0}
+
+
+def _generate_city_info(rng):
+    # the city holds more than buildings, these nodes have no count so nothing treats them as buildings
+    return {
+        "calendar": {"day": rng.randint(0, 400), "year": rng.randint(0, 100), "season": rng.randint(0, 3),
+                     "weather": rng.randint(0, 2), "temp": rng.randint(0, 2), "moon": rng.randint(0, 27),
+                     "wind": rng.randint(0, 1), "orbit": 365},
+        "biome": rng.choice(("grassland", "oceanic", "forest", "desert", "volcanic", "tundra")),
+        "morale": {"current": rng.randint(0, 3000), "unemployed": 0, "stress": 0, "entertain": 0, "leadership": 0,
+                   "season": 0, "weather": 0, "warmonger": 0, "tax": 0},
+        "powered": True,
+        "power": round(rng.uniform(0, 100000), 2),
+    }
+
+
+def _generate_buildings(rng, zone, count):
+    buildings = {}
+    for name in _get_names(ZONE_BUILDINGS[zone], count):
+        building_type = EvolveSaveEditor.BUILDING_CATEGORIES.get(name)
+        if rng.random() < 0.1:
+            # buildings that haven't been built yet
+            building_count = 0
+        elif building_type == "special":
+            building_count = _get_special_building_count(rng, buildings, name)
+        else:
+            building_count = rng.randint(1, 1000)
+        buildings[name] = {"count": building_count}
+        if rng.random() < 0.5:
+            buildings[name]["on"] = building_count
+    return buildings
+
+
+def _get_special_building_count(rng, buildings, name):
+    # keep special buildings short of complete, like evolvesaveeditor.py expects to find them
+    if name == "world_collider":
+        return rng.randint(1, 1858)
+    if name == "swarm_satellite":
+        return rng.randint(1, max(1, 18 * buildings.get("swarm_control", {}).get("count", 0)))
+    return rng.randint(1, 99)
+
+
+def _generate_civic(rng, count):
+    civic = {"free": rng.randint(0, 100)}
+    for name in _get_names(JOBS, count):
+        workers = rng.randint(0, 2000)
+        civic[name] = {"job": name, "name": name.replace("_", " ").title(), "display": True, "workers": workers,
+                       "max": rng.choice((-1, workers)), "impact": round(rng.uniform(0.1, 10), 2),
+                       "assigned": workers, "stress": rng.randint(1, 10)}
+    civic["taxes"] = {"tax_rate": rng.randint(0, 50), "display": True}
+    soldiers = rng.randint(0, 1000)
+    civic["garrison"] = {"display": True, "disabled": False, "progress": 0, "tactic": rng.randint(0, 4),
+                         "workers": soldiers, "wounded": rng.randint(0, soldiers), "raid": 0, "max": soldiers,
+                         "mercs": False, "fatigue": 0, "protest": 0, "m_use": 0}
+    return civic
+
+
+def _generate_race(rng, species):
+    return {"species": species, "Plasmid": {"count": rng.randint(1, 10 ** 6)},
+            "Phage": {"count": rng.randint(1, 10 ** 6)}, "Dark": {"count": round(rng.uniform(0.1, 100), 3)},
+            "seeded": False, "gods": "none", "old_gods": "none"}
+
+
+def _generate_stats(rng):
+    return {"start": rng.randint(1500000000000, 1600000000000), "days": rng.randint(0, 10000),
+            "tdays": rng.randint(10000, 20000), "reset": rng.randint(0, 10), "plasmid": rng.randint(1, 10 ** 7),
+            "phage": rng.randint(1, 10 ** 7), "dark": round(rng.uniform(0.1, 1000), 3), "achieve": {}, "feat": {}}
+
+
+def _generate_arpa(rng, count):
+    arpa = {}
+    for name in _get_names(ARPA_PROJECTS, count):
+        if name == "sequence":
+            maximum = rng.randint(100000, 1000000)
+            arpa[name] = {"max": maximum, "progress": rng.randint(0, maximum), "time": rng.randint(0, maximum),
+                          "on": True, "boost": False, "auto": False}
+        elif name == "launch_facility":
+            arpa[name] = {"complete": rng.randint(0, 99), "rank": rng.randint(0, 1)}
+        else:
+            arpa[name] = {"complete": rng.randint(0, 99), "rank": rng.randint(0, 100)}
+            if name == "monument":
+                arpa["m_type"] = rng.choice(("Obelisk", "Statue", "Sculpture", "Monolith"))
+    return arpa
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
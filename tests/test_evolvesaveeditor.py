@@ -5,14 +5,29 @@
 import builtins
 import copy
 import filecmp
+import io
+import itertools
+import json
+import marshal
 import os
+import pickle
+import pstats
+import random
+import subprocess
 import sys
+import tracemalloc
 from shutil import copyfile
 from unittest.mock import MagicMock
 
+import lzstring
 import pytest
 
+import evolvesaveeditor
+import evolvesavegenerator
+from evolvesaveeditor import AdjustmentProfile
+from evolvesaveeditor import BuildingCensus
 from evolvesaveeditor import EvolveSaveEditor as Ese
+from evolvesaveeditor import LZStringCodec
 from evolvesaveeditor import main
 
 # paths to test files and such
@@ -20,6 +35,14 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 test_data_dir = os.path.join(current_dir, "files")
 
 
+@pytest.fixture(autouse=True)
+def result_cache_path(tmp_path, monkeypatch):
+    # keep main() from using, or filling, the real result cache
+    path = str(tmp_path / "cache" / "results.sqlite3")
+    monkeypatch.setattr(evolvesaveeditor, "get_default_cache_path", lambda: path)
+    return path
+
+
 @pytest.fixture
 def unlocked_container_and_crate_json():
     return {"city": {"storage_yard": {"count": 1}, "warehouse": {"count": 1}}}
@@ -452,6 +475,390 @@ class TestEvolveSaveEditorSaveLoadFile:
         with monkeypatch.context() as mp:
             mp.setattr(builtins, "open", m)
             evolve_save_editor.save_data_to_file(actual_file)
+        assert not os.path.exists(actual_file)
+        assert not [name for name in os.listdir(test_data_dir) if name.endswith(".tmp")]
+
+    def test_save_data_to_file_leaves_file_as_it_was_when_writing_fails(self, evolve_save_editor, tmpdir,
+                                                                        monkeypatch):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+
+        def fail_part_way(_self):
+            yield "N4Ig"
+            raise OSError("disk full")
+
+        monkeypatch.setattr(Ese, "iter_save_data_to_string", fail_part_way)
+        evolve_save_editor.save_data = {"resource": {}}
+        assert not evolve_save_editor.save_data_to_file(actual_file)
+        assert filecmp.cmp(actual_file, os.path.join(test_data_dir, "startgame_original.txt"), shallow=False)
+        assert os.listdir(tmpdir) == ["save.txt"]
+
+    @pytest.mark.parametrize("fsync", [True, False])
+    def test_save_data_to_file_fsyncs_directory_unless_turned_off(self, evolve_save_editor, fsync, tmpdir,
+                                                                  monkeypatch):
+        m = MagicMock()
+        monkeypatch.setattr(os, "fsync", m)
+        evolve_save_editor.fsync = fsync
+        evolve_save_editor.save_data = {"resource": {}}
+        actual_file = os.path.join(tmpdir, "save.txt")
+        assert evolve_save_editor.save_data_to_file(actual_file)
+        assert Ese.decompress_lz_string(open(actual_file).read()) == '{"resource":{}}'
+        # the file always, and the directory when it can be opened
+        assert m.call_count == (2 if fsync and os.name != "nt" else 1)
+
+    @pytest.mark.skipif(os.name == "nt", reason="windows only has a read-only permission")
+    def test_save_data_to_file_keeps_permissions(self, evolve_save_editor, tmpdir):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        os.chmod(actual_file, 0o640)
+        evolve_save_editor.save_data = {"resource": {}}
+        assert evolve_save_editor.save_data_to_file(actual_file)
+        assert os.stat(actual_file).st_mode & 0o777 == 0o640
+
+    @pytest.mark.skipif(os.name == "nt", reason="making symlinks on windows needs extra privileges")
+    def test_save_data_to_file_writes_through_symlinks(self, evolve_save_editor, tmpdir):
+        target_file = os.path.join(tmpdir, "target.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), target_file)
+        link_file = os.path.join(tmpdir, "link.txt")
+        os.symlink(target_file, link_file)
+        evolve_save_editor.save_data = {"resource": {}}
+        assert evolve_save_editor.save_data_to_file(link_file)
+        assert os.path.islink(link_file)
+        assert Ese.decompress_lz_string(open(target_file).read()) == '{"resource":{}}'
+
+
+class TestEvolveSaveEditorLazyParse:
+    def test_scan_top_level_finds_each_member(self):
+        test_input = ' { "a" : {"b": [1, {"c": 2}]}, "d":[] ,"e":-1.5e3,"f":"x\\"}","g":null } '
+        actual = [(key, test_input[start:end], value)
+                  for key, start, end, value in evolvesaveeditor._scan_top_level(test_input, ["d"])]
+        expected = [("a", '{"b": [1, {"c": 2}]}', None), ("d", "[]", []), ("e", "-1.5e3", None),
+                    ("f", '"x\\"}"', None), ("g", "null", None)]
+        assert actual == expected
+
+    @pytest.mark.parametrize("value", ['{"b": "\\\\"}', '{"b": "\\\\\\"\\\\"}', '["\\\\", "\\\\\\\\"]'])
+    def test_scan_top_level_splits_escaped_backslashes(self, value):
+        # a string ending in an escaped backslash ends at the quote after it, which isn't escaped
+        test_input = f'{{"a":{value},"c":1}}'
+        actual = [(key, test_input[start:end]) for key, start, end, _ in evolvesaveeditor._scan_top_level(test_input)]
+        assert actual == [("a", value), ("c", "1")]
+        assert json.loads(value) is not None
+
+    @pytest.mark.parametrize("test_input", ['{"a": {"b": "\\\\}"}}', '{"a": {"b": "\\\\\\"}"}}'])
+    def test_scan_top_level_rejects_brackets_after_escapes(self, test_input):
+        with pytest.raises(ValueError):
+            evolvesaveeditor._scan_top_level(test_input)
+
+    def test_scan_top_level_handles_empty_object(self):
+        assert evolvesaveeditor._scan_top_level("{}") == []
+
+    @pytest.mark.parametrize("test_input", ['[1, 2]', '{"a": 1', '{"a" 1}', '{"a": 1 "b": 2}', '{"a": }',
+                                            '{"a": {"b": 1}', '{"a": 1} 2', '{"a": {"b": "}"}}'])
+    def test_scan_top_level_rejects_what_it_cant_split(self, test_input):
+        with pytest.raises(ValueError):
+            evolvesaveeditor._scan_top_level(test_input)
+
+    def test_parse_save_nodes_parses_only_nodes(self):
+        test_input = '{"resource":{"Food":{"amount":1}},"settings":{"theme":"dark"},"event":12}'
+        save_data, unparsed_nodes = Ese.parse_save_nodes(test_input, {"resource"})
+        assert save_data == {"resource": {"Food": {"amount": 1}}}
+        assert unparsed_nodes == {"resource": None, "settings": '{"theme":"dark"}', "event": "12"}
+
+    @pytest.mark.parametrize("test_input", [
+        '{"settings":{"theme":"}{"},"resource":{"Food":{}}}',
+        '{"settings":{"a":"{"},"resource":{"Food":{"b":"}"}}}',
+    ])
+    def test_parse_save_nodes_falls_back_on_brackets_in_strings(self, test_input):
+        save_data, unparsed_nodes = Ese.parse_save_nodes(test_input, {"resource"})
+        assert save_data == json.loads(test_input)
+        assert unparsed_nodes is None
+
+    def test_parse_save_nodes_raises_on_bad_json(self):
+        with pytest.raises(json.JSONDecodeError):
+            Ese.parse_save_nodes('{"resource":{"Food":}', {"resource"})
+
+    def test_dump_save_nodes_puts_unparsed_nodes_back(self):
+        unparsed_nodes = {"seed": "1", "resource": None, "gone": None, "settings": '{"theme":"dark"}'}
+        save_data = {"resource": {"Food": 2}, "settings": {"theme": "light"}, "new": True}
+        actual = Ese.dump_save_nodes(save_data, unparsed_nodes)
+        assert actual == '{"seed":1,"resource":{"Food":2},"settings":{"theme":"light"},"new":true}'
+
+    @pytest.mark.parametrize("file_name", ["startgame_original.txt", "endgame_original.txt"])
+    def test_parse_and_dump_save_nodes_round_trip(self, file_name):
+        with open(os.path.join(test_data_dir, file_name)) as file:
+            json_str = Ese.decompress_lz_string(file.read())
+        save_data, unparsed_nodes = Ese.parse_save_nodes(json_str, Ese.get_adjuster_nodes())
+        assert unparsed_nodes is not None
+        assert Ese.dump_save_nodes(save_data, unparsed_nodes) == json_str
+
+    def test_get_adjuster_nodes(self):
+        assert Ese.get_adjuster_nodes(["fill_resources", "adjust_arpa_research"]) == {"resource", "arpa"}
+        assert set(Ese.ADJUSTER_NODES) == set(Ese.ADJUSTERS)
+
+    def test_load_data_from_file_parses_only_nodes(self, evolve_save_editor, end_game_json):
+        test_input_file = os.path.join(test_data_dir, "endgame_original.txt")
+        assert evolve_save_editor.load_data_from_file(test_input_file, {"arpa", "race"})
+        assert evolve_save_editor.save_data == {"race": end_game_json["race"], "arpa": end_game_json["arpa"]}
+
+    def test_load_data_from_file_handles_bad_json_when_lazy(self, evolve_save_editor):
+        test_input_file = os.path.join(test_data_dir, "broken_json.txt")
+        assert not evolve_save_editor.load_data_from_file(test_input_file, Ese.get_adjuster_nodes())
+        assert evolve_save_editor.save_data == {}
+
+    def test_load_data_from_file_handles_bad_encoding_when_lazy(self, evolve_save_editor):
+        test_input_file = os.path.join(test_data_dir, "broken_encoding.txt")
+        assert not evolve_save_editor.load_data_from_file(test_input_file, Ese.get_adjuster_nodes())
+        assert evolve_save_editor.save_data == {}
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 100000])
+    @pytest.mark.parametrize("nodes", [None, {"resource", "race"}])
+    def test_parse_save_chunks_matches_parse_save_nodes(self, nodes, chunk_size):
+        with open(os.path.join(test_data_dir, "endgame_original.txt")) as file:
+            json_str = " " + Ese.decompress_lz_string(file.read()) + "\n"
+        chunks = (json_str[i:i + chunk_size] for i in range(0, len(json_str), chunk_size))
+        actual = Ese.parse_save_chunks(chunks, nodes)
+        expected = (json.loads(json_str), None) if nodes is None else Ese.parse_save_nodes(json_str, nodes)
+        assert actual == expected
+        assert list(actual[0]) == list(expected[0])
+
+    @pytest.mark.parametrize("test_input", ['[1, 2]', '{"a": 1', '{"a" 1}', '{"a": 1 "b": 2}', '{"a": }',
+                                            '{"a": {"b": 1}', '{"a": 1} 2', '{"a": {"b": "}"}}', '', '{"a": 1, 2}',
+                                            '{"settings":{"theme":"}{"},"resource":{"Food":{}}}',
+                                            '{"settings":{"a":"{"},"resource":{"Food":{"b":"}"}}}'])
+    def test_parse_save_chunks_rejects_what_it_cant_split(self, test_input):
+        with pytest.raises(ValueError):
+            Ese.parse_save_chunks(test_input, {"resource"})
+
+    @pytest.mark.parametrize("nodes", [None, {"resource", "race"}])
+    def test_load_data_from_file_streams_big_files(self, end_game_json, nodes, tmpdir, monkeypatch):
+        test_input_file = os.path.join(test_data_dir, "endgame_original.txt")
+        expected = Ese()
+        assert expected.load_data_from_file(test_input_file, nodes)
+        monkeypatch.setattr(Ese, "stream_min_file_size", os.path.getsize(test_input_file))
+        actual = Ese()
+        assert actual.load_data_from_file(test_input_file, nodes)
+        assert "stream_load" in actual.timings.as_dict()
+        assert actual.save_data == expected.save_data
+        assert not actual.patch_save_data([])
+        assert actual.save_data_to_file(test_input_file)
+        # the streamed save isn't kept, so an unchanged one is compressed again to go anywhere else
+        test_output_file = os.path.join(tmpdir, "output.txt")
+        assert actual.save_data_to_file(test_output_file)
+        assert filecmp.cmp(test_input_file, test_output_file, shallow=False)
+
+    @pytest.mark.parametrize("file_name", ["broken_json.txt", "broken_encoding.txt"])
+    def test_load_data_from_file_handles_bad_files_when_streaming(self, evolve_save_editor, file_name, monkeypatch):
+        monkeypatch.setattr(Ese, "stream_min_file_size", 0)
+        assert not evolve_save_editor.load_data_from_file(os.path.join(test_data_dir, file_name))
+        assert evolve_save_editor.save_data == {}
+
+    def test_load_data_from_file_falls_back_when_streaming_cant_split(self, evolve_save_editor, tmpdir,
+                                                                      monkeypatch):
+        monkeypatch.setattr(Ese, "stream_min_file_size", 0)
+        json_str = '{"settings":{"theme":"}{"},"resource":{"Food":{}}}'
+        test_input_file = os.path.join(tmpdir, "save.txt")
+        with open(test_input_file, "w") as file:
+            file.write(Ese.compress_lz_string(json_str))
+        assert evolve_save_editor.load_data_from_file(test_input_file, {"resource"})
+        assert evolve_save_editor.save_data == json.loads(json_str)
+
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_edit_one_save_streams_save_file(self, lazy, tmpdir):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        result = evolvesaveeditor.edit_one_save(actual_file, lazy=lazy, stream=True)
+        assert result[:3] == (actual_file, True, "edited")
+        assert "stream_load" in result.timings.as_dict()
+        assert filecmp.cmp(actual_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+
+    def test_edit_one_save_writes_save_file_a_piece_at_a_time(self, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        monkeypatch.setattr(Ese, "save_data_to_string", MagicMock(side_effect=AssertionError("built whole")))
+        result = evolvesaveeditor.edit_one_save(actual_file)
+        assert result[:3] == (actual_file, True, "edited")
+        assert "stream_save" in result.timings.as_dict()
+        assert {"serialize", "compress"}.isdisjoint(result.timings.as_dict())
+        assert filecmp.cmp(actual_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+
+    @pytest.mark.parametrize(("options", "expected"), [([], False), (["--stream"], True)])
+    def test_main_loads_save_files_with_load_data_from_file(self, options, expected, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        load = MagicMock(wraps=Ese.load_data_from_file)
+        stream = MagicMock(wraps=Ese._stream_data_from_file)
+        with monkeypatch.context() as mp:
+            mp.setattr(Ese, "load_data_from_file", lambda *args: load(*args))
+            mp.setattr(Ese, "_stream_data_from_file", lambda *args: stream(*args))
+            mp.setattr(sys, 'argv', ["program", *options, actual_file])
+            main()
+        assert load.call_count == 1
+        assert stream.called == expected
+        assert filecmp.cmp(actual_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+
+    @pytest.mark.parametrize("nodes", [None, {"resource", "race"}])
+    def test_iter_dump_save_nodes_matches_dump_save_nodes(self, nodes):
+        with open(os.path.join(test_data_dir, "endgame_original.txt")) as file:
+            json_str = Ese.decompress_lz_string(file.read())
+        save_data, unparsed_nodes = Ese.parse_save_chunks(json_str, nodes)
+        save_data = dict(save_data, race=None, new={"a": [1, "é"]})
+        pieces = list(Ese.iter_dump_save_nodes(save_data, unparsed_nodes))
+        assert len(pieces) > 2
+        assert "".join(pieces) == Ese.dump_save_nodes(save_data, unparsed_nodes)
+
+    def test_iter_dump_save_nodes_handles_keys_that_arent_strings(self):
+        save_data = {1: True, "a": {2: None}}
+        assert "".join(Ese.iter_dump_save_nodes(save_data)) == json.dumps(save_data, separators=(",", ":"))
+
+    @pytest.mark.parametrize("lz_string_backend", evolvesaveeditor.LZ_STRING_BACKENDS)
+    def test_save_data_to_file_streams_changed_save(self, evolve_save_editor, lz_string_backend, tmpdir):
+        test_input_file = os.path.join(test_data_dir, "endgame_original.txt")
+        evolve_save_editor.lz_string_backend = lz_string_backend
+        assert evolve_save_editor.load_data_from_file(test_input_file, Ese.get_adjuster_nodes())
+        evolve_save_editor.adjust_save_data()
+        test_output_file = os.path.join(tmpdir, "output.txt")
+        assert evolve_save_editor.save_data_to_file(test_output_file)
+        with open(test_output_file) as file:
+            assert file.read() == evolve_save_editor.save_data_to_string()
+
+    def test_lazy_edit_matches_full_edit_for_every_combination(self, evolve_save_editor):
+        with open(os.path.join(test_data_dir, "endgame_original.txt")) as file:
+            json_str = Ese.decompress_lz_string(file.read())
+        for count in range(len(Ese.ADJUSTERS) + 1):
+            for adjusters in itertools.combinations(Ese.ADJUSTERS, count):
+                evolve_save_editor.save_data = json.loads(json_str)
+                evolve_save_editor.adjust_save_data(adjusters)
+                expected = Ese.dump_save_nodes(evolve_save_editor.save_data)
+
+                evolve_save_editor.save_data, unparsed_nodes = Ese.parse_save_nodes(
+                    json_str, Ese.get_adjuster_nodes(adjusters))
+                evolve_save_editor.adjust_save_data(adjusters)
+                assert Ese.dump_save_nodes(evolve_save_editor.save_data, unparsed_nodes) == expected
+
+    def test_main_edits_lazily(self, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "startgame_final.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        expected_file = os.path.join(test_data_dir, "startgame_adjusted.txt")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--lazy", actual_file])
+            main()
+        assert filecmp.cmp(actual_file, expected_file)
+
+
+needs_orjson = pytest.mark.skipif(evolvesaveeditor._import_orjson() is None, reason="orjson is not installed")
+
+
+@needs_orjson
+class TestEvolveSaveEditorJsonBackend:
+    # characters json.dumps escapes in different ways: short escapes, \\u escapes, surrogate pairs and none at all
+    STRING_CHARACTERS = ["a", "Z", " ", "/", "\"", "\\", "\n", "\t", "\x00", "\x1f", "\x7f", "\xe9", " ",
+                         "\U0001f600", "{", "}", "0.00001", "1e5"]
+
+    @classmethod
+    def random_value(cls, rng, depth=0):
+        kind = rng.randrange(8 if depth < 3 else 6)
+        if kind == 0:
+            return rng.choice([True, False, None])
+        if kind == 1:
+            return rng.choice([1, -1]) * rng.randrange(2 ** rng.choice([8, 32, 63, 64, 70]))
+        if kind == 2:
+            return rng.choice([1, -1]) * rng.random() * 10 ** rng.randint(-12, 25)
+        if kind == 3:
+            return rng.choice([0.0, -0.0, 0.0001, 1e16, 1e15, 5e-324, 1.7976931348623157e308, 0.1 + 0.2])
+        if kind in (4, 5):
+            return "".join(rng.choice(cls.STRING_CHARACTERS) for _ in range(rng.randrange(5)))
+        if kind == 6:
+            return [cls.random_value(rng, depth + 1) for _ in range(rng.randrange(5))]
+        return {cls.random_value(rng, 3) if rng.random() < 0.8 else str(rng.random()): cls.random_value(rng, depth + 1)
+                for _ in range(rng.randrange(5))}
+
+    @pytest.mark.parametrize("backend", evolvesaveeditor.JSON_BACKENDS)
+    @pytest.mark.parametrize("file_name", ["startgame_original.txt", "endgame_original.txt"])
+    def test_backends_match_json_module_on_saves(self, backend, file_name):
+        with open(os.path.join(test_data_dir, file_name)) as file:
+            json_str = Ese.decompress_lz_string(file.read())
+        save_data = Ese.parse_json(json_str, backend)
+        assert save_data == json.loads(json_str)
+        assert Ese.dump_json(save_data, backend) == json_str
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_orjson_dump_is_byte_identical(self, seed):
+        rng = random.Random(seed)
+        for _ in range(50):
+            test_input = {str(i): self.random_value(rng) for i in range(5)}
+            expected = json.dumps(test_input, separators=(',', ':'))
+            assert Ese.dump_json(test_input, evolvesaveeditor.JSON_BACKEND_ORJSON) == expected
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_orjson_parse_matches_json_module(self, seed):
+        rng = random.Random(seed)
+        for _ in range(50):
+            test_input = json.dumps({str(i): self.random_value(rng) for i in range(5)})
+            actual = Ese.parse_json(test_input, evolvesaveeditor.JSON_BACKEND_ORJSON)
+            assert json.dumps(actual) == json.dumps(json.loads(test_input))
+
+    @pytest.mark.parametrize("test_input", [1e16, 1.5e-05, 1e-7, 123456789012345680.0, 2 ** 64, "\xe9", "\x7f",
+                                            " ", "\U0001f600", {1: 2}])
+    def test_orjson_dump_falls_back_where_it_differs(self, test_input):
+        expected = json.dumps([test_input], separators=(',', ':'))
+        assert Ese.dump_json([test_input], evolvesaveeditor.JSON_BACKEND_ORJSON) == expected
+
+    @pytest.mark.parametrize("test_input", ["[18446744073709551616]", "[-9223372036854775809]", "[NaN]",
+                                            "[1e400]", '["\\ud800"]'])
+    def test_orjson_parse_falls_back_where_it_differs(self, test_input):
+        actual = Ese.parse_json(test_input, evolvesaveeditor.JSON_BACKEND_ORJSON)
+        assert json.dumps(actual) == json.dumps(json.loads(test_input))
+
+    def test_orjson_parse_raises_on_bad_json(self):
+        with pytest.raises(json.JSONDecodeError):
+            Ese.parse_json('{"resource":', evolvesaveeditor.JSON_BACKEND_ORJSON)
+
+    @pytest.mark.parametrize("backend", evolvesaveeditor.JSON_BACKENDS)
+    def test_parse_and_dump_save_nodes_with_backend(self, backend):
+        test_input = '{"resource":{"Food":{"amount":12345678901234567890123}},"settings":{"a":1e-7},"arpa":[1.5]}'
+        save_data, unparsed_nodes = Ese.parse_save_nodes(test_input, {"resource", "arpa"}, backend)
+        assert save_data == {"resource": {"Food": {"amount": 12345678901234567890123}}, "arpa": [1.5]}
+        assert Ese.dump_save_nodes(save_data, unparsed_nodes, backend) == test_input
+
+    def test_auto_only_imports_orjson_for_big_json(self, monkeypatch):
+        monkeypatch.delitem(sys.modules, "orjson")
+        assert evolvesaveeditor._get_orjson(evolvesaveeditor.JSON_BACKEND_AUTO) is None
+        assert evolvesaveeditor._get_orjson(evolvesaveeditor.JSON_BACKEND_AUTO, 100) is None
+        big_size = evolvesaveeditor._ORJSON_AUTO_MIN_SIZE
+        assert evolvesaveeditor._get_orjson(evolvesaveeditor.JSON_BACKEND_AUTO, big_size) is not None
+
+    def test_auto_uses_orjson_once_imported(self):
+        assert evolvesaveeditor._get_orjson(evolvesaveeditor.JSON_BACKEND_ORJSON) is not None
+        assert evolvesaveeditor._get_orjson(evolvesaveeditor.JSON_BACKEND_AUTO) is not None
+        assert evolvesaveeditor._get_orjson(evolvesaveeditor.JSON_BACKEND_STDLIB) is None
+
+    @pytest.mark.parametrize("backend", evolvesaveeditor.JSON_BACKENDS)
+    def test_main_with_json_backend(self, backend, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "startgame_final.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        expected_file = os.path.join(test_data_dir, "startgame_adjusted.txt")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--json-backend", backend, actual_file])
+            main()
+        assert filecmp.cmp(actual_file, expected_file)
+
+
+class TestEvolveSaveEditorWithoutOrjson:
+    def test_json_backends_fall_back_to_json_module(self, monkeypatch):
+        monkeypatch.setattr(evolvesaveeditor, "_import_orjson", lambda: None)
+        for backend in evolvesaveeditor.JSON_BACKENDS:
+            assert Ese.parse_json('{"a":[1.5,"\\u00e9"]}', backend) == {"a": [1.5, "\xe9"]}
+            assert Ese.dump_json({"a": [1.5, "\xe9"]}, backend) == '{"a":[1.5,"\\u00e9"]}'
+
+    def test_available_json_backends(self, monkeypatch):
+        monkeypatch.setattr(evolvesaveeditor, "_import_orjson", lambda: None)
+        assert evolvesaveeditor.get_available_json_backends() == (evolvesaveeditor.JSON_BACKEND_AUTO,
+                                                                  evolvesaveeditor.JSON_BACKEND_STDLIB)
+
+    def test_parse_args_rejects_orjson_backend(self, monkeypatch):
+        monkeypatch.setattr(evolvesaveeditor, "_import_orjson", lambda: None)
+        with pytest.raises(SystemExit):
+            evolvesaveeditor.parse_args(["--json-backend", "orjson", "save.txt"])
 
 
 class TestEvolveSaveEditorLZString:
@@ -480,11 +887,190 @@ class TestEvolveSaveEditorLZString:
         assert actual is None
 
 
+class TestLZStringCodec:
+    # compare against the lzstring package, which is the reference implementation
+
+    @pytest.mark.parametrize("file_name", ["startgame_original.txt", "startgame_adjusted.txt",
+                                           "endgame_original.txt", "broken_json.txt"])
+    def test_decompress_from_base64_matches_lzstring_on_save_files(self, file_name):
+        with open(os.path.join(test_data_dir, file_name)) as file:
+            compressed = file.read()
+        expected = lzstring.LZString.decompressFromBase64(compressed)
+        actual = LZStringCodec.decompress_from_base64(compressed)
+        assert actual == expected
+
+    @pytest.mark.parametrize("file_name", ["startgame_original.txt", "startgame_adjusted.txt",
+                                           "endgame_original.txt"])
+    def test_compress_to_base64_matches_save_files(self, file_name):
+        with open(os.path.join(test_data_dir, file_name)) as file:
+            expected = file.read()
+        raw = lzstring.LZString.decompressFromBase64(expected)
+        actual = LZStringCodec.compress_to_base64(raw)
+        assert actual == expected
+
+    @pytest.mark.parametrize("alphabet", ["ab", "{}[]:,\"0123456789abcdef", "aé中\uffffĀ~"])
+    def test_codec_matches_lzstring_on_generated_text(self, alphabet):
+        rng = random.Random(2953)
+        for length in list(range(40)) + [100, 1000, 10000]:
+            raw = "".join(rng.choice(alphabet) for _ in range(length))
+            expected = lzstring.LZString.compressToBase64(raw)
+            actual = LZStringCodec.compress_to_base64(raw)
+            assert actual == expected
+            assert LZStringCodec.decompress_from_base64(actual) == raw
+
+    def test_decompress_from_base64_fails_like_lzstring_on_generated_garbage(self):
+        rng = random.Random(3311)
+        for _ in range(500):
+            compressed = "".join(rng.choice(LZStringCodec.BASE64_ALPHABET + "!\n")
+                                 for _ in range(rng.randint(1, 24)))
+            try:
+                expected = lzstring.LZString.decompressFromBase64(compressed)
+            except (IndexError, KeyError, UnboundLocalError):
+                expected = IndexError
+            try:
+                actual = LZStringCodec.decompress_from_base64(compressed)
+            except (IndexError, ValueError):
+                actual = IndexError
+            assert actual == expected
+
+    @pytest.mark.parametrize(("test_input", "expected"), [(None, ""), ("", None)])
+    def test_decompress_from_base64_handles_empty_values(self, test_input, expected):
+        assert LZStringCodec.decompress_from_base64(test_input) == expected
+
+    @pytest.mark.parametrize(("test_input", "expected"), [(None, ""), ("", "Q===")])
+    def test_compress_to_base64_handles_empty_values(self, test_input, expected):
+        assert LZStringCodec.compress_to_base64(test_input) == expected
+
+    def test_decompress_from_base64_ignores_trailing_newline(self):
+        assert LZStringCodec.decompress_from_base64("C4QwzsCmQ===\n") == "taste"
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+    @pytest.mark.parametrize("file_name", ["startgame_original.txt", "endgame_original.txt"])
+    def test_iter_compress_to_base64_matches_save_files(self, file_name, chunk_size, monkeypatch):
+        # flushing every 48 bits gives back as many pieces as it can
+        monkeypatch.setattr(LZStringCodec, "_STREAM_FLUSH_CHUNKS", 1)
+        with open(os.path.join(test_data_dir, file_name)) as file:
+            expected = file.read()
+        raw = lzstring.LZString.decompressFromBase64(expected)
+        chunks = (raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size))
+        pieces = list(LZStringCodec.iter_compress_to_base64(chunks))
+        assert len(pieces) > 1
+        assert "".join(pieces) == expected
+
+    @pytest.mark.parametrize("alphabet", ["ab", "aé中\uffffĀ~"])
+    def test_iter_compress_to_base64_matches_lzstring_on_generated_text(self, alphabet, monkeypatch):
+        monkeypatch.setattr(LZStringCodec, "_STREAM_FLUSH_CHUNKS", 2)
+        rng = random.Random(5003)
+        for length in list(range(40)) + [1000]:
+            raw = "".join(rng.choice(alphabet) for _ in range(length))
+            chunks = [raw[:length // 3], "", raw[length // 3:]]
+            assert "".join(LZStringCodec.iter_compress_to_base64(chunks)) == lzstring.LZString.compressToBase64(raw)
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+    @pytest.mark.parametrize("file_name", ["startgame_original.txt", "endgame_original.txt", "broken_json.txt"])
+    def test_iter_decompress_from_base64_matches_decompress_from_base64(self, file_name, chunk_size, monkeypatch):
+        # small blocks so most dictionary entries get looked up in the text decompressed so far
+        monkeypatch.setattr(LZStringCodec, "_STREAM_BLOCK_SIZE", 100)
+        with open(os.path.join(test_data_dir, file_name)) as file:
+            compressed = file.read()
+        chunks = (compressed[i:i + chunk_size] for i in range(0, len(compressed), chunk_size))
+        blocks = list(LZStringCodec.iter_decompress_from_base64(chunks))
+        assert len(blocks) > 1
+        assert "".join(blocks) == LZStringCodec.decompress_from_base64(compressed)
+
+    @pytest.mark.parametrize("alphabet", ["ab", "aé中\uffffĀ~"])
+    def test_iter_decompress_from_base64_matches_on_generated_text(self, alphabet, monkeypatch):
+        monkeypatch.setattr(LZStringCodec, "_STREAM_BLOCK_SIZE", 7)
+        rng = random.Random(4127)
+        for length in list(range(20)) + [1000, 10000]:
+            raw = "".join(rng.choice(alphabet) for _ in range(length))
+            compressed = LZStringCodec.compress_to_base64(raw)
+            assert "".join(LZStringCodec.iter_decompress_from_base64(compressed)) == raw
+
+    @pytest.mark.parametrize("file_name", ["endgame_original.txt", "broken_json.txt"])
+    def test_iter_decompress_from_base64_rebuilds_entries_dropped_from_history(self, file_name, monkeypatch):
+        monkeypatch.setattr(LZStringCodec, "_STREAM_BLOCK_SIZE", 100)
+        monkeypatch.setattr(LZStringCodec, "_STREAM_HISTORY_SIZE", 200)
+        rebuild_entry = MagicMock(wraps=LZStringCodec._rebuild_entry)
+        monkeypatch.setattr(LZStringCodec, "_rebuild_entry", rebuild_entry)
+        with open(os.path.join(test_data_dir, file_name)) as file:
+            compressed = file.read()
+        assert "".join(LZStringCodec.iter_decompress_from_base64(compressed)) == \
+            LZStringCodec.decompress_from_base64(compressed)
+        assert rebuild_entry.called
+
+    def test_iter_decompress_from_base64_keeps_only_its_history(self, monkeypatch):
+        # text much longer than the history it keeps, like a save much bigger than _STREAM_HISTORY_SIZE.
+        # Only the history and the dictionary, which grows with the much shorter compressed text, should be held
+        monkeypatch.setattr(LZStringCodec, "_STREAM_BLOCK_SIZE", 4096)
+        monkeypatch.setattr(LZStringCodec, "_STREAM_HISTORY_SIZE", 16 * 1024)
+        raw = '{"queue":[' + ",".join(f'{{"id":"farm","qty":{i % 10}}}' for i in range(50000)) + "]}"
+        compressed = LZStringCodec.compress_to_base64(raw)
+        chunks = (compressed[i:i + 4096] for i in range(0, len(compressed), 4096))
+        tracemalloc.start()
+        try:
+            length = sum(len(block) for block in LZStringCodec.iter_decompress_from_base64(chunks))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert length == len(raw)
+        assert peak < len(raw) / 2
+
+    def test_iter_decompress_from_base64_fails_like_decompress_from_base64_on_generated_garbage(self):
+        rng = random.Random(3311)
+        for _ in range(500):
+            compressed = "".join(rng.choice(LZStringCodec.BASE64_ALPHABET + "!\n")
+                                 for _ in range(rng.randint(0, 24)))
+            try:
+                expected = LZStringCodec.decompress_from_base64(compressed)
+            except (IndexError, ValueError):
+                expected = None
+            try:
+                actual = "".join(LZStringCodec.iter_decompress_from_base64(compressed))
+            except (IndexError, ValueError):
+                actual = None
+            assert actual == expected
+
+    def test_iter_decompress_lz_string_raises_value_error(self):
+        with pytest.raises(ValueError):
+            list(Ese.iter_decompress_lz_string(["C4Qw", "zs"]))
+        with pytest.raises(ValueError):
+            list(Ese.iter_decompress_lz_string(["potato"], evolvesaveeditor.LZ_STRING_BACKEND_LZSTRING))
+        assert "".join(Ese.iter_decompress_lz_string(["C4Qw", "zsCmQ==="])) == "taste"
+
+    def test_lzstring_backend_can_be_selected(self, monkeypatch):
+        m = MagicMock()
+        m.compressToBase64.return_value = "compressed"
+        m.decompressFromBase64.return_value = "decompressed"
+        with monkeypatch.context() as mp:
+            mp.setattr(lzstring, "LZString", m)
+            assert Ese.compress_lz_string("raw", evolvesaveeditor.LZ_STRING_BACKEND_LZSTRING) == "compressed"
+            assert Ese.decompress_lz_string("raw", evolvesaveeditor.LZ_STRING_BACKEND_LZSTRING) == "decompressed"
+
+
 class TestEvolveSaveEditorAdjustSaveData:
     def test_adjust_save_data_handles_empty_data(self, evolve_save_editor):
         evolve_save_editor.adjust_save_data()
         assert evolve_save_editor.save_data == {}
 
+    def test_adjust_save_data_does_not_modify_original_data(self, evolve_save_editor, end_game_json):
+        test_input = end_game_json
+        expected = copy.deepcopy(test_input)
+        evolve_save_editor.save_data = test_input
+        evolve_save_editor.adjust_save_data()
+        assert test_input == expected
+        assert evolve_save_editor.save_data != expected
+
+    def test_adjust_save_data_only_copies_changed_nodes(self, evolve_save_editor, end_game_json):
+        test_input = end_game_json
+        evolve_save_editor.save_data = test_input
+        evolve_save_editor.adjust_save_data()
+        actual = evolve_save_editor.save_data
+        assert actual["tech"] is test_input["tech"]
+        assert actual["resource"] is not test_input["resource"]
+        assert actual["resource"]["Food"] is not test_input["resource"]["Food"]
+        assert actual["resource"]["Knowledge"] is test_input["resource"]["Knowledge"]
+
     def test_adjust_save_data_fills_resources(self, evolve_save_editor):
         test_input = {"resource": {
             "Money": {"name": "$", "display": True, "amount": 5, "crates": 0, "max": 2000, "stackable": False,
@@ -572,6 +1158,49 @@ class TestEvolveSaveEditorAdjustSaveData:
         assert evolve_save_editor.save_data == expected
 
 
+class TestEvolveSaveEditorFusedResourcePass:
+    @staticmethod
+    def run_adjusters_one_by_one(save_data, adjusters):
+        calls = {
+            "fill_resources": lambda data: Ese.fill_resources(data, Ese.DEFAULT_UNBOUNDED_RESOURCE_AMOUNT),
+            "stack_resources": lambda data: Ese.stack_resources(data, Ese.DEFAULT_STACK_AMOUNT),
+            "adjust_buildings": lambda data: Ese.adjust_buildings(data, Ese.DEFAULT_BUILDING_AMOUNTS),
+            "fill_population": Ese.fill_population,
+            "fill_soldiers": Ese.fill_soldiers,
+            "adjust_prestige_currency": lambda data: Ese.adjust_prestige_currency(
+                data, Ese.DEFAULT_PRESTIGE_CURRENCY_AMOUNTS),
+            "adjust_arpa_research": Ese.adjust_arpa_research,
+        }
+        for adjuster in Ese.ADJUSTERS:
+            if adjuster in adjusters:
+                save_data = calls[adjuster](save_data)
+        return save_data
+
+    def test_adjust_save_data_matches_adjusters_one_by_one_for_every_combination(self, evolve_save_editor,
+                                                                                 start_game_json, end_game_json):
+        for test_input in [start_game_json, end_game_json]:
+            for count in range(len(Ese.ADJUSTERS) + 1):
+                for adjusters in itertools.combinations(Ese.ADJUSTERS, count):
+                    expected = self.run_adjusters_one_by_one(test_input, adjusters)
+                    evolve_save_editor.save_data = test_input
+                    evolve_save_editor.adjust_save_data(adjusters)
+                    assert evolve_save_editor.save_data == expected
+
+    def test_adjust_resources_runs_rules_in_order_on_each_resource(self):
+        test_input = {"resource": {"Food": {"amount": 1}, "Stone": {"amount": 2}, "Broken": {}}}
+        rules = [lambda name, resource: {"amount": resource["amount"] * 10},
+                 None,
+                 lambda name, resource: {"amount": resource["amount"] + 1} if name == "Food" else None]
+        expected = {"resource": {"Food": {"amount": 11}, "Stone": {"amount": 20}, "Broken": {}}}
+        actual = Ese._adjust_resources(test_input, rules)
+        assert actual == expected
+        assert actual["resource"]["Broken"] is test_input["resource"]["Broken"]
+
+    def test_adjust_resources_without_rules_returns_data(self):
+        test_input = {"city": {}}
+        assert Ese._adjust_resources(test_input, [None]) is test_input
+
+
 class TestEvolveSaveEditorFillResources:
     def test_fill_resources_skips_broken_elements(self):
         test_input = {"resource": {
@@ -700,6 +1329,18 @@ class TestEvolveSaveEditorAdjustBuildings:
         actual = Ese.adjust_buildings(test_input, Ese.DEFAULT_BUILDING_AMOUNTS)
         assert actual == expected
 
+    def test_adjust_buildings_retakes_census_of_other_amounts(self):
+        test_input = {"city": {"temple": {"count": 10}}, "space": {}, "interstellar": {}, "portal": {}}
+        census = BuildingCensus(test_input, Ese.DEFAULT_BUILDING_AMOUNTS)
+        actual = Ese.adjust_buildings(test_input, Ese.BuildingAmountsParam(boost=20), census)
+        assert actual["city"]["temple"]["count"] == 20
+
+    def test_adjust_buildings_compares_counts_by_value(self, monkeypatch):
+        # a count worked out to be the same as the one in the save, but as an int object of its own
+        monkeypatch.setattr(Ese, "_get_special_building_count", lambda counts, name, count: int(str(count)))
+        building_counts = {"dyson": 100000, "temple": 100000}
+        assert Ese._get_adjusted_building_counts(building_counts, Ese.BuildingAmountsParam(boost=100000)) == {}
+
     def test_adjust_buildings_boost_type(self):
         test_input = {"city": {"temple": {"count": 10}}, "space": {"ziggurat": {"count": 5}},
                       "interstellar": {"processing": {"count": 4}}, "portal": {"turret": {"count": 3}}}
@@ -781,6 +1422,57 @@ class TestEvolveSaveEditorAdjustBuildings:
         assert actual == expected
 
 
+class TestEvolveSaveEditorBuildingCategories:
+    def test_building_categories_matches_building_types(self):
+        for building_type, building_names in Ese.BUILDING_TYPES.items():
+            for building_name in building_names:
+                assert Ese.BUILDING_CATEGORIES[building_name] == building_type
+        assert len(Ese.BUILDING_CATEGORIES) == sum(len(names) for names in Ese.BUILDING_TYPES.values())
+
+    def test_building_categories_is_read_only(self):
+        with pytest.raises(TypeError):
+            Ese.BUILDING_CATEGORIES["farm"] = "boost"
+
+    def test_index_building_types_rejects_building_in_two_types(self):
+        with pytest.raises(ValueError):
+            evolvesaveeditor._index_building_types({"boost": ["farm"], "housing": ["cottage", "farm"]})
+
+    @pytest.mark.parametrize(("test_input", "expected"), [
+        ("farm", "housing"), ("dyson", "special"), ("casino", "morale_job"), ("biome", None), ("potato", None)
+    ])
+    def test_get_building_category(self, test_input, expected):
+        assert Ese.get_building_category(test_input) == expected
+
+
+class TestBuildingCensus:
+    def test_building_census_counts_only_buildings(self):
+        test_input = {"city": {"biome": "oceanic", "farm": {"count": 3}, "morale": {"current": 5}},
+                      "space": {"living_quarters": {"count": 2}}, "portal": "broken"}
+        census = BuildingCensus(test_input)
+        assert census.counts == {"city": {"farm": 3}, "space": {"living_quarters": 2}, "interstellar": {},
+                                 "portal": {}}
+        assert census.adjusted_counts == census.counts
+
+    def test_building_census_has_adjusted_counts(self):
+        test_input = {"city": {"farm": {"count": 3}, "university": {"count": 0}}, "space": {
+            "swarm_control": {"count": 5}, "swarm_satellite": {"count": 1}}, "interstellar": {}, "portal": {}}
+        census = BuildingCensus(test_input, Ese.DEFAULT_BUILDING_AMOUNTS)
+        assert census.changes["city"] == {"farm": Ese.DEFAULT_BUILDING_AMOUNTS.housing}
+        assert census.changes["space"] == {"swarm_control": Ese.DEFAULT_BUILDING_AMOUNTS.support,
+                                           "swarm_satellite": Ese.DEFAULT_BUILDING_AMOUNTS.support * 18}
+        assert census.adjusted_counts["city"]["university"] == 0
+        assert census.counts["city"]["farm"] == 3
+
+    def test_building_census_does_not_adjust_when_zone_missing(self):
+        test_input = {"city": {"farm": {"count": 3}}, "space": {}, "interstellar": {}}
+        census = BuildingCensus(test_input, Ese.DEFAULT_BUILDING_AMOUNTS)
+        assert census.adjusted_counts["city"]["farm"] == 3
+
+    def test_get_capacity_uses_capacity_table(self):
+        building_counts = {"city": {"cottage": 4, "apartment": 3, "farm": 1}, "space": {}, "interstellar": {}}
+        assert BuildingCensus.get_capacity(building_counts, Ese.CITIZEN_CAPACITY) == 4 * 2 + 3 * 5 + 1
+
+
 class TestEvolveSaveEditorFillPopulation:
     def test_fill_population_can_handle_no_buildings(self):
         test_input = {"resource": {}, "city": {}, "space": {}, "interstellar": {}, "race": {}}
@@ -953,6 +1645,1556 @@ class TestEvolveSaveEditorAdjustArpaResearch:
         assert actual == expected
 
 
+class TestAdjustmentProfile:
+    @pytest.fixture
+    def profile_save(self):
+        return {"seed": 1, "race": {"species": "human", "mutation": 0},
+                "resource": {"Food": {"amount": 5, "max": 100}, "Money": {"amount": 900, "max": 2000}},
+                "queue": [{"id": "a", "qty": 1}, {"id": "b", "qty": 2}]}
+
+    def test_default_profile_settings_unchanged(self, evolve_save_editor):
+        # saves edited before profiles existed are still found in the result cache
+        assert evolve_save_editor.get_settings() == {
+            "version": evolvesaveeditor._get_editor_version(),
+            "adjusters": list(Ese.ADJUSTERS),
+            "building_amounts": Ese.DEFAULT_BUILDING_AMOUNTS._asdict(),
+            "unbounded_resource_amount": Ese.DEFAULT_UNBOUNDED_RESOURCE_AMOUNT,
+            "stack_amount": Ese.DEFAULT_STACK_AMOUNT,
+            "prestige_currency_amounts": Ese.DEFAULT_PRESTIGE_CURRENCY_AMOUNTS,
+        }
+
+    def test_empty_profile_same_as_default(self, end_game_json):
+        default, profiled = Ese(), Ese()
+        default.save_data = profiled.save_data = end_game_json
+        profiled.adjustment_profile = AdjustmentProfile.from_dict({})
+        default.adjust_save_data()
+        profiled.adjust_save_data()
+        assert profiled.save_data == default.save_data
+        assert profiled.get_settings() == default.get_settings()
+
+    def test_profile_amounts(self, end_game_json, monkeypatch):
+        profiled = Ese()
+        profiled.save_data = end_game_json
+        profiled.adjustment_profile = AdjustmentProfile.from_dict({"adjusters": {
+            "fill_resources": {"unbounded_amount": 5000}, "stack_resources": {"amount": 20},
+            "adjust_buildings": {"housing": 30, "job": 40}, "adjust_prestige_currency": {"Plasmid": 50},
+        }})
+        profiled.adjust_save_data()
+        monkeypatch.setattr(Ese, "DEFAULT_UNBOUNDED_RESOURCE_AMOUNT", 5000)
+        monkeypatch.setattr(Ese, "DEFAULT_STACK_AMOUNT", 20)
+        monkeypatch.setattr(Ese, "DEFAULT_BUILDING_AMOUNTS", Ese.BuildingAmountsParam(housing=30, job=40))
+        monkeypatch.setattr(Ese, "DEFAULT_PRESTIGE_CURRENCY_AMOUNTS", dict(Ese.DEFAULT_PRESTIGE_CURRENCY_AMOUNTS,
+                                                                           Plasmid=50))
+        expected = Ese()
+        expected.save_data = end_game_json
+        expected.adjust_save_data()
+        assert profiled.save_data == expected.save_data
+
+    def test_disabled_adjusters(self, end_game_json):
+        profile = AdjustmentProfile.from_dict({"adjusters": {"adjust_arpa_research": True, "fill_soldiers": False,
+                                                             "fill_resources": False}})
+        assert profile.adjusters == ("stack_resources", "adjust_buildings", "fill_population",
+                                     "adjust_prestige_currency", "adjust_arpa_research")
+        profiled, expected = Ese(), Ese()
+        profiled.save_data = expected.save_data = end_game_json
+        profiled.adjustment_profile = profile
+        profiled.adjust_save_data()
+        expected.adjust_save_data(profile.adjusters)
+        assert profiled.save_data == expected.save_data
+
+    def test_rules(self, profile_save):
+        original = copy.deepcopy(profile_save)
+        profile = AdjustmentProfile.from_dict({"adjusters": {}, "rules": [
+            {"path": "/race/mutation", "set": 3},
+            {"path": "/resource/Food/amount", "min": 50},
+            {"path": "/resource/Money/amount", "max": 500},
+            {"path": "/resource/Money/amount", "min": 600},
+            {"path": "/queue/1/qty", "set": 10},
+        ]})
+        adjusted = profile.apply_rules(profile_save)
+        assert profile_save == original
+        assert adjusted["race"]["mutation"] == 3
+        assert adjusted["resource"]["Food"]["amount"] == 50
+        assert adjusted["resource"]["Money"]["amount"] == 600
+        assert adjusted["queue"] == [{"id": "a", "qty": 1}, {"id": "b", "qty": 10}]
+        # only the nodes on the paths of the rules are copied
+        assert adjusted["queue"][0] is profile_save["queue"][0]
+
+    def test_rules_that_change_nothing(self, profile_save):
+        profile = AdjustmentProfile.from_dict({"rules": [{"path": "/resource/Food/amount", "max": 50},
+                                                         {"path": "/race/species", "set": "human"}]})
+        assert profile.apply_rules(profile_save) is profile_save
+
+    @pytest.mark.parametrize("rule", [
+        {"path": "/resource/Stone/amount", "set": 1},
+        {"path": "/queue/2/qty", "set": 1},
+        {"path": "/queue/01/qty", "set": 1},
+        {"path": "/race/species", "min": 1},
+        {"path": "/seed/amount", "set": 1},
+    ])
+    def test_rule_not_in_save_skipped(self, profile_save, rule, caplog):
+        profile = AdjustmentProfile.from_dict({"rules": [rule, {"path": "/seed", "set": 2}]})
+        assert profile.apply_rules(profile_save) == dict(profile_save, seed=2)
+        assert "skipping the profile rule" in caplog.text
+
+    def test_rules_run_after_adjusters(self, end_game_json):
+        ese = Ese()
+        ese.save_data = end_game_json
+        ese.adjustment_profile = AdjustmentProfile.from_dict({"rules": [{"path": "/city/farm/count", "set": 7}]})
+        ese.adjust_save_data()
+        assert ese.save_data["city"]["farm"]["count"] == 7
+        assert "profile_rules" in ese.timings.as_dict()
+
+    def test_nodes(self):
+        profile = AdjustmentProfile.from_dict({
+            "adjusters": {name: False for name in Ese.ADJUSTERS if name != "adjust_arpa_research"},
+            "rules": [{"path": "/seed", "set": 1}, {"path": "/race/mutation", "set": 1}]})
+        assert profile.nodes == {"arpa", "seed", "race"}
+
+    def test_settings_include_profile(self, evolve_save_editor):
+        default_settings = evolve_save_editor.get_settings()
+        evolve_save_editor.adjustment_profile = AdjustmentProfile.from_dict(
+            {"adjusters": {"stack_resources": {"amount": 5}}, "rules": [{"path": "/seed", "set": 1}]})
+        settings = evolve_save_editor.get_settings()
+        assert settings["stack_amount"] == 5
+        assert settings["rules"] == [["/seed", "set", 1]]
+        assert evolvesaveeditor.ResultCache._get_key("save", settings) != \
+            evolvesaveeditor.ResultCache._get_key("save", default_settings)
+
+    @pytest.mark.parametrize("config", [
+        [],
+        {"adjuster": {}},
+        {"adjusters": []},
+        {"adjusters": {"fill_everything": True}},
+        {"adjusters": {"stack_resources": {"amount": "lots"}}},
+        {"adjusters": {"stack_resources": {"amount": True}}},
+        {"adjusters": {"stack_resources": {"count": 5}}},
+        {"adjusters": {"adjust_arpa_research": {"complete": 99}}},
+        {"adjusters": {"adjust_prestige_currency": {"Money": 5}}},
+        {"rules": {}},
+        {"rules": [{"path": "/seed"}]},
+        {"rules": [{"path": "/seed", "set": 1, "min": 1}]},
+        {"rules": [{"path": "/seed", "set": 1, "value": 1}]},
+        {"rules": [{"path": "/seed", "min": "1"}]},
+        {"rules": [{"path": "seed", "set": 1}]},
+        {"rules": [{"path": "", "set": {}}]},
+        {"rules": [["/seed", "set", 1]]},
+    ])
+    def test_invalid_profile(self, config):
+        with pytest.raises(ValueError):
+            AdjustmentProfile.from_dict(config)
+
+    def test_load_json_and_toml(self, tmp_path):
+        json_path = tmp_path / "profile.json"
+        json_path.write_text(json.dumps({"adjusters": {"fill_soldiers": False, "stack_resources": {"amount": 5}},
+                                         "rules": [{"path": "/resource/Food/amount", "min": 50}]}))
+        toml_path = tmp_path / "profile.toml"
+        toml_path.write_text('[adjusters]\nfill_soldiers = false\n\n[adjusters.stack_resources]\namount = 5\n\n'
+                             '[[rules]]\npath = "/resource/Food/amount"\nmin = 50\n')
+        profiles = [evolvesaveeditor.load_adjustment_profile(str(path)) for path in (json_path, toml_path)]
+        assert profiles[0].get_settings() == profiles[1].get_settings()
+        assert "fill_soldiers" not in profiles[0].adjusters
+        assert profiles[0].stack_amount == 5
+
+    def test_load_toml_without_tomllib(self, tmp_path, monkeypatch):
+        toml_path = tmp_path / "profile.toml"
+        toml_path.write_text("[adjusters]\n")
+        monkeypatch.setitem(sys.modules, "tomllib", None)
+        with pytest.raises(ValueError, match="python 3.11"):
+            evolvesaveeditor.load_adjustment_profile(str(toml_path))
+
+    def test_profile_pickles(self):
+        profile = AdjustmentProfile.from_dict({"rules": [{"path": "/seed", "set": 1}]})
+        unpickled = pickle.loads(pickle.dumps(profile))
+        assert unpickled.apply_rules({"seed": 0}) == {"seed": 1}
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_edit_evolve_saves_with_profile(self, tmpdir, jobs):
+        profile = AdjustmentProfile.from_dict({"rules": [{"path": "/seed", "set": 12345}]})
+        paths = [os.path.join(tmpdir, f"save{number}.txt") for number in range(2)]
+        for path in paths:
+            copyfile(os.path.join(test_data_dir, "startgame_original.txt"), path)
+        results = evolvesaveeditor.edit_evolve_saves(paths, jobs, lazy=True, adjustment_profile=profile)
+        assert all(result.success for result in results)
+        for path in paths:
+            ese = Ese()
+            ese.load_data_from_file(path)
+            assert ese.save_data["seed"] == 12345
+
+    def test_edit_exported_saves_with_profile(self):
+        profile = AdjustmentProfile.from_dict({"rules": [{"path": "/seed", "set": 12345}]})
+        with open(os.path.join(test_data_dir, "startgame_original.txt")) as file:
+            lz_string = file.read()
+        (edited, message), = evolvesaveeditor.edit_exported_saves([lz_string], adjustment_profile=profile)
+        assert message == "edited"
+        assert json.loads(Ese.decompress_lz_string(edited))["seed"] == 12345
+
+    def test_main_with_adjustment_profile(self, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        profile_file = os.path.join(tmpdir, "profile.json")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        with open(profile_file, "w") as file:
+            json.dump({"adjusters": {name: False for name in Ese.ADJUSTERS},
+                       "rules": [{"path": "/seed", "set": 12345}]}, file)
+        monkeypatch.setattr(sys, 'argv', ["program", "--adjustment-profile", profile_file, actual_file])
+        main()
+        original, edited = Ese(), Ese()
+        original.load_data_from_file(os.path.join(test_data_dir, "startgame_original.txt"))
+        edited.load_data_from_file(actual_file)
+        assert edited.save_data == dict(original.save_data, seed=12345)
+
+    def test_main_with_bad_adjustment_profile(self, tmpdir, monkeypatch):
+        profile_file = os.path.join(tmpdir, "profile.json")
+        with open(profile_file, "w") as file:
+            json.dump({"adjusters": {"fill_everything": True}}, file)
+        monkeypatch.setattr(sys, 'argv', ["program", "--adjustment-profile", profile_file, "save.txt"])
+        with pytest.raises(SystemExit):
+            main()
+
+
+class TestFanOut:
+    @pytest.fixture
+    def profiles(self):
+        return [
+            AdjustmentProfile.from_dict({"adjusters": {name: name in ("fill_resources", "stack_resources")
+                                                       for name in Ese.ADJUSTERS}}),
+            AdjustmentProfile.from_dict({}),
+            AdjustmentProfile.from_dict({"adjusters": {name: False for name in Ese.ADJUSTERS},
+                                         "rules": [{"path": "/race/Plasmid/count", "min": 99999}]}),
+        ]
+
+    @pytest.fixture
+    def save_file(self, tmpdir):
+        path = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), path)
+        return path
+
+    @staticmethod
+    def edit_separately(save_file, profile):
+        ese = Ese()
+        ese.adjustment_profile = profile
+        ese.load_data_from_file(save_file)
+        ese.adjust_save_data()
+        return ese.save_data_to_string()
+
+    def test_make_view_shares_save_data(self, evolve_save_editor, save_file):
+        evolve_save_editor.json_backend = evolvesaveeditor.JSON_BACKEND_STDLIB
+        evolve_save_editor.load_data_from_file(save_file, Ese.get_adjuster_nodes())
+        loaded = evolve_save_editor.save_data
+        view = evolve_save_editor.make_view()
+        assert view.save_data is loaded
+        assert view.json_backend == evolvesaveeditor.JSON_BACKEND_STDLIB
+        assert view.timings is not evolve_save_editor.timings
+        assert view.adjust_save_data()
+        assert evolve_save_editor.save_data is loaded
+        assert not evolve_save_editor.get_patch()
+        assert view.save_data_to_string() == self.edit_separately(save_file, None)
+
+    def test_save_data_to_json(self, evolve_save_editor, save_file):
+        evolve_save_editor.load_data_from_file(save_file)
+        assert not evolve_save_editor.patch_save_data([])
+        assert evolve_save_editor.save_data_to_json() is None
+        evolve_save_editor.adjust_save_data()
+        assert json.loads(evolve_save_editor.save_data_to_json()) == evolve_save_editor.save_data
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_fan_out_save(self, save_file, profiles, tmpdir, jobs, lazy):
+        with open(save_file) as file:
+            original = file.read()
+        output_paths = [os.path.join(tmpdir, f"variant{number}.txt") for number in range(len(profiles))]
+        result = evolvesaveeditor.fan_out_save(save_file, profiles, output_paths, jobs, lazy=lazy)
+        assert result.load.success
+        assert [output.filepath for output in result.outputs] == output_paths
+        assert all(output.success for output in result.outputs)
+        for profile, output_path, output in zip(profiles, output_paths, result.outputs):
+            with open(output_path) as file:
+                assert file.read() == self.edit_separately(save_file, profile)
+            assert "serialize" in output.timings.as_dict() and "compress" in output.timings.as_dict()
+        with open(save_file) as file:
+            assert file.read() == original
+
+    def test_save_decoded_once(self, save_file, profiles, tmpdir, monkeypatch):
+        decompress = MagicMock(wraps=Ese.decompress_lz_string)
+        monkeypatch.setattr(Ese, "decompress_lz_string", decompress)
+        output_paths = [os.path.join(tmpdir, f"variant{number}.txt") for number in range(len(profiles))]
+        result = evolvesaveeditor.fan_out_save(save_file, profiles, output_paths)
+        assert all(output.success for output in result.outputs)
+        assert decompress.call_count == 1
+
+    def test_unchanged_variant_written_as_loaded(self, tmpdir, monkeypatch):
+        save_file = os.path.join(test_data_dir, "startgame_adjusted.txt")
+        output_path = os.path.join(tmpdir, "variant.txt")
+        monkeypatch.setattr(Ese, "compress_lz_string", MagicMock(side_effect=AssertionError("compressed")))
+        result = evolvesaveeditor.fan_out_save(save_file, [AdjustmentProfile()], [output_path])
+        assert result.outputs[0].success
+        assert result.outputs[0].message == "unchanged"
+        assert filecmp.cmp(output_path, save_file)
+
+    def test_load_failure(self, tmpdir, profiles):
+        output_paths = [os.path.join(tmpdir, f"variant{number}.txt") for number in range(len(profiles))]
+        result = evolvesaveeditor.fan_out_save(os.path.join(tmpdir, "missing.txt"), profiles, output_paths)
+        assert not result.load.success
+        assert not any(output.success for output in result.outputs)
+        assert not any(os.path.exists(output_path) for output_path in output_paths)
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_failed_variant_does_not_stop_others(self, save_file, profiles, tmpdir, jobs):
+        output_paths = [os.path.join(tmpdir, "variant0.txt"), os.path.join(tmpdir, "missing", "variant1.txt"),
+                        os.path.join(tmpdir, "variant2.txt")]
+        result = evolvesaveeditor.fan_out_save(save_file, profiles, output_paths, jobs)
+        assert [output.success for output in result.outputs] == [True, False, True]
+        assert result.outputs[1].message == "could not write save data"
+
+    def test_adjuster_error_does_not_stop_others(self, save_file, profiles, tmpdir, monkeypatch):
+        broken = AdjustmentProfile.from_dict({"rules": [{"path": "/seed", "set": 1}]})
+        monkeypatch.setattr(broken, "apply_rules", MagicMock(side_effect=RuntimeError("broken")))
+        output_paths = [os.path.join(tmpdir, "broken.txt"), os.path.join(tmpdir, "full.txt")]
+        result = evolvesaveeditor.fan_out_save(save_file, [broken, profiles[1]], output_paths)
+        assert [output.success for output in result.outputs] == [False, True]
+        assert result.outputs[0].message == "RuntimeError: broken"
+
+    @pytest.mark.parametrize(("filepath", "profile_path", "output_dir", "expected"), [
+        (os.path.join("saves", "save.txt"), os.path.join("profiles", "full.toml"), None,
+         os.path.join("saves", "save.full.txt")),
+        ("save", "prestige_only.json", "out", os.path.join("out", "save.prestige_only")),
+    ])
+    def test_get_fan_out_path(self, filepath, profile_path, output_dir, expected):
+        assert evolvesaveeditor.get_fan_out_path(filepath, profile_path, output_dir) == expected
+
+    def test_main_fan_out(self, save_file, tmpdir, monkeypatch, capsys):
+        profile_files = []
+        for name, config in (("resources", {"adjusters": {"adjust_buildings": False}}), ("full", {})):
+            profile_files.append(os.path.join(tmpdir, f"{name}.json"))
+            with open(profile_files[-1], "w") as file:
+                json.dump(config, file)
+        output_dir = os.path.join(tmpdir, "out")
+        monkeypatch.setattr(sys, 'argv', ["program", "fan-out", save_file, *profile_files, "-o", output_dir,
+                                          "--jobs", "2"])
+        main()
+        output = capsys.readouterr().out
+        assert f"OK: {save_file} (loaded)" in output
+        assert "2 of 2 saves edited, 0 unchanged, 0 failed" in output
+        full = Ese()
+        full.load_data_from_file(os.path.join(output_dir, "save.full.txt"))
+        expected = Ese()
+        expected.load_data_from_file(save_file)
+        expected.adjust_save_data()
+        assert full.save_data == expected.save_data
+        assert os.path.isfile(os.path.join(output_dir, "save.resources.txt"))
+
+    def test_main_fan_out_fails(self, tmpdir, monkeypatch):
+        profile_file = os.path.join(tmpdir, "full.json")
+        with open(profile_file, "w") as file:
+            json.dump({}, file)
+        monkeypatch.setattr(sys, 'argv', ["program", "fan-out", os.path.join(tmpdir, "missing.txt"), profile_file])
+        with pytest.raises(SystemExit):
+            main()
+
+    def test_parse_fan_out_args(self, tmpdir):
+        profile_file = os.path.join(tmpdir, "full.json")
+        with open(profile_file, "w") as file:
+            json.dump({}, file)
+        args = evolvesaveeditor.parse_args(["fan-out", "save.txt", profile_file])
+        assert args.command == evolvesaveeditor.FAN_OUT_COMMAND
+        assert args.jobs == (os.cpu_count() or 1)
+        assert args.output_paths == ["save.full.txt"]
+        assert isinstance(args.adjustment_profiles[0], AdjustmentProfile)
+
+    @pytest.mark.parametrize("profile_names", [["full.json", "full.toml"], ["bad.json"]])
+    def test_parse_fan_out_args_rejected(self, tmpdir, profile_names):
+        profile_files = [os.path.join(tmpdir, name) for name in profile_names]
+        for profile_file in profile_files:
+            with open(profile_file, "w") as file:
+                # an empty TOML file is a valid profile, so only the names of the first two clash
+                contents = "{}" if profile_file.endswith(".json") else ""
+                file.write("{\"rules\": 1}" if "bad" in profile_file else contents)
+        with pytest.raises(SystemExit):
+            evolvesaveeditor.parse_args(["fan-out", "save.txt", *profile_files])
+
+
+class TestEvolveSaveEditorBatch:
+    def test_parse_args_expands_directories_and_globs(self, tmpdir):
+        for name in ["b.txt", "a.txt", "c.dat"]:
+            copyfile(os.path.join(test_data_dir, "startgame_original.txt"), os.path.join(tmpdir, name))
+        os.mkdir(os.path.join(tmpdir, "subdir"))
+        missing = os.path.join(tmpdir, "missing.txt")
+        args = evolvesaveeditor.parse_args([os.path.join(tmpdir, "*.txt"), str(tmpdir), missing,
+                                            os.path.join(tmpdir, "*.nothing")])
+        expected = [os.path.join(tmpdir, name) for name in ["a.txt", "b.txt", "c.dat"]]
+        expected += [missing, os.path.join(tmpdir, "*.nothing")]
+        assert args.filepaths == expected
+        assert args.jobs == 1
+
+    @pytest.mark.parametrize("name", evolvesaveeditor.COMMANDS)
+    @pytest.mark.parametrize("options", [[], ["--jobs", "2"]])
+    def test_parse_args_edits_saves_named_like_commands(self, tmpdir, monkeypatch, name, options):
+        monkeypatch.chdir(tmpdir)
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), name)
+        args = evolvesaveeditor.parse_args([name, *options])
+        assert args.command is None
+        assert args.filepaths == [name]
+
+    @pytest.mark.parametrize("jobs", ["0", "-3", "potato"])
+    def test_parse_args_rejects_bad_jobs(self, jobs):
+        with pytest.raises(SystemExit):
+            evolvesaveeditor.parse_args(["--jobs", jobs, "save.txt"])
+
+    def test_edit_evolve_saves_edits_all_files_in_parallel(self, tmpdir):
+        actual_files = [os.path.join(tmpdir, f"save{i}.txt") for i in range(4)]
+        for actual_file in actual_files:
+            copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        expected_file = os.path.join(test_data_dir, "startgame_adjusted.txt")
+        results = evolvesaveeditor.edit_evolve_saves(actual_files, jobs=2)
+        assert [result.filepath for result in results] == actual_files
+        assert all(result.success for result in results)
+        for actual_file in actual_files:
+            assert filecmp.cmp(actual_file, expected_file)
+
+    def test_edit_evolve_saves_continues_after_failure(self, tmpdir):
+        good_file = os.path.join(tmpdir, "good.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), good_file)
+        broken_file = os.path.join(tmpdir, "broken.txt")
+        copyfile(os.path.join(test_data_dir, "broken_json.txt"), broken_file)
+        missing_file = os.path.join(tmpdir, "missing.txt")
+        results = evolvesaveeditor.edit_evolve_saves([broken_file, missing_file, good_file], jobs=2)
+        assert [result.success for result in results] == [False, False, True]
+        assert filecmp.cmp(good_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+        assert filecmp.cmp(broken_file, os.path.join(test_data_dir, "broken_json.txt"))
+
+    @pytest.mark.parametrize(("jobs", "fsync_every", "expected"), [
+        (1, 1, [True] * 5), (1, 2, [False] * 5), (2, 0, [False] * 5),
+    ])
+    def test_edit_evolve_saves_groups_fsyncs(self, jobs, fsync_every, expected, tmpdir, monkeypatch):
+        actual_files = [os.path.join(tmpdir, f"save{i}.txt") for i in range(5)]
+        for actual_file in actual_files:
+            copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        fsyncs = []
+        if jobs == 1:
+            # worker processes can't record what they were passed
+            edit_one_save = evolvesaveeditor.edit_one_save
+            monkeypatch.setattr(evolvesaveeditor, "edit_one_save", lambda *args, **kwargs: fsyncs.append(
+                kwargs["fsync"]) or edit_one_save(*args, **kwargs))
+        flushes = []
+        flush = evolvesaveeditor.SyncBatch._flush
+        monkeypatch.setattr(evolvesaveeditor.SyncBatch, "_flush",
+                            lambda batch: flushes.append(len(batch)) or flush(batch))
+        results = evolvesaveeditor.edit_evolve_saves(actual_files, jobs=jobs, fsync_every=fsync_every)
+        assert all(result.success for result in results)
+        assert fsyncs == (expected if jobs == 1 else [])
+        assert flushes == {1: [], 2: [2, 2, 1], 0: [5]}[fsync_every]
+
+    @pytest.mark.skipif(os.name == "nt", reason="windows doesn't sync directories")
+    def test_edit_evolve_saves_reports_sync_errors(self, tmpdir, monkeypatch):
+        actual_files = [os.path.join(tmpdir, f"save{i}.txt") for i in range(3)]
+        for actual_file in actual_files:
+            copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        monkeypatch.setattr(evolvesaveeditor, "_fsync_file", MagicMock(side_effect=OSError("io error")))
+        results = evolvesaveeditor.edit_evolve_saves(actual_files, fsync_every=2)
+        assert [result.success for result in results] == [True, False, False]
+        assert results[1].message == "could not sync save data (OSError: io error)"
+
+    def test_sync_batch_syncs_directories_every_few_files(self, tmpdir, monkeypatch):
+        m = MagicMock()
+        monkeypatch.setattr(os, "fsync", m)
+        actual_files = [os.path.join(tmpdir, f"save{i}.txt") for i in range(2)]
+        actual_files.append(os.path.join(tmpdir.mkdir("more"), "save.txt"))
+        batch = evolvesaveeditor.SyncBatch(every=2)
+        for actual_file in actual_files:
+            with open(actual_file, "w") as file:
+                file.write("save")
+            batch.add(actual_file)
+        # the first two files share a directory, which is synced once
+        directory_syncs = 1 if os.name != "nt" else 0
+        assert m.call_count == directory_syncs
+        assert len(batch) == 1
+        batch.flush()
+        assert m.call_count == 2 * directory_syncs
+        assert len(batch) == 0
+
+    def test_save_data_to_file_fsyncs_save_before_replacing_it(self, evolve_save_editor, tmpdir, monkeypatch):
+        calls = []
+        fsync = os.fsync
+        replace = os.replace
+        monkeypatch.setattr(os, "fsync", lambda fd: calls.append("fsync") or fsync(fd))
+        monkeypatch.setattr(os, "replace", lambda *args: calls.append("replace") or replace(*args))
+        evolve_save_editor.fsync = False
+        evolve_save_editor.save_data = {"resource": {}}
+        assert evolve_save_editor.save_data_to_file(os.path.join(tmpdir, "save.txt"))
+        assert calls == ["fsync", "replace"]
+
+    @pytest.mark.parametrize("fsync_every", ["-1", "potato"])
+    def test_parse_args_rejects_bad_fsync_every(self, fsync_every):
+        with pytest.raises(SystemExit):
+            evolvesaveeditor.parse_args(["--fsync-every", fsync_every, "save.txt"])
+
+    def test_main_groups_fsyncs(self, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        m = MagicMock(wraps=evolvesaveeditor.edit_evolve_saves)
+        monkeypatch.setattr(evolvesaveeditor, "edit_evolve_saves", m)
+        monkeypatch.setattr(sys, 'argv', ["program", "--fsync-every", "0", actual_file])
+        main()
+        assert m.call_args.args[-1] == 0
+        assert filecmp.cmp(actual_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+
+    def test_edit_one_save_reports_unexpected_errors(self, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        m = MagicMock()
+        m.side_effect = TypeError("bad data")
+        with monkeypatch.context() as mp:
+            mp.setattr(Ese, "adjust_save_data", m)
+            result = evolvesaveeditor.edit_one_save(actual_file)
+        assert result[:3] == (actual_file, False, "TypeError: bad data")
+
+    def test_edit_one_save_reports_write_errors(self, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        with monkeypatch.context() as mp:
+            mp.setattr(Ese, "write_file", MagicMock(return_value=False))
+            result = evolvesaveeditor.edit_one_save(actual_file)
+        assert result[:3] == (actual_file, False, "could not write save data")
+
+    def test_main_exits_with_error_when_a_save_fails(self, tmpdir, monkeypatch, capsys):
+        good_file = os.path.join(tmpdir, "good.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), good_file)
+        missing_file = os.path.join(tmpdir, "missing.txt")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", good_file, missing_file])
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+        assert exit_info.value.code == 1
+        output = capsys.readouterr().out
+        assert f"OK: {good_file}" in output
+        assert f"FAILED: {missing_file}" in output
+        assert "1 of 2 saves edited, 0 unchanged, 1 failed" in output
+
+
+class TestTimingReport:
+    def test_span_records_stages_in_order(self):
+        report = evolvesaveeditor.TimingReport()
+        with report.span("first"):
+            pass
+        with pytest.raises(ValueError):
+            with report.span("second"):
+                raise ValueError()
+        with report.span("first"):
+            pass
+        assert [stage for stage, _ in report.spans] == ["first", "second", "first"]
+        assert list(report.as_dict()) == ["first", "second"]
+        assert report.total == pytest.approx(sum(report.as_dict().values()))
+
+    def test_format_lists_every_stage_and_total(self):
+        report = evolvesaveeditor.TimingReport()
+        report.spans = [("read", 0.001), ("write", 0.003)]
+        lines = report.format().splitlines()
+        assert lines[0].split() == ["read", "1.000", "ms", "25.0%"]
+        assert lines[1].split() == ["write", "3.000", "ms", "75.0%"]
+        assert lines[2].split() == ["total", "4.000", "ms"]
+
+    def test_editor_times_every_stage(self, evolve_save_editor, tmpdir):
+        evolve_save_editor.load_data_from_file(os.path.join(test_data_dir, "endgame_original.txt"))
+        evolve_save_editor.adjust_save_data()
+        evolve_save_editor.save_data_to_string()
+        evolve_save_editor.save_data_to_file(os.path.join(tmpdir, "end_file.txt"))
+        assert list(evolve_save_editor.timings.as_dict()) == [
+            "read", "decompress", "parse", "census", "adjust_buildings", "adjust_resources", "fill_soldiers",
+            "adjust_prestige_currency", "adjust_arpa_research", "serialize", "compress", "stream_save"]
+
+    def test_main_prints_profile(self, tmpdir, monkeypatch, capsys):
+        actual_file = os.path.join(tmpdir, "startgame_final.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--profile", actual_file])
+            main()
+        output = capsys.readouterr().out
+        assert "decompress" in output
+        assert "total" in output
+
+    def test_main_writes_cprofile_output(self, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "startgame_final.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        profile_file = os.path.join(tmpdir, "out.prof")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--cprofile", profile_file, actual_file])
+            main()
+        stats = pstats.Stats(profile_file)
+        assert any(function_name == "edit_evolve_save" for _, _, function_name in stats.stats)
+
+
+class TestEvolveSaveEditorStreams:
+    @pytest.fixture
+    def original_save(self):
+        with open(os.path.join(test_data_dir, "startgame_original.txt")) as file:
+            return file.read()
+
+    @pytest.fixture
+    def adjusted_save(self):
+        with open(os.path.join(test_data_dir, "startgame_adjusted.txt")) as file:
+            return file.read()
+
+    def test_load_and_save_data_with_strings(self, evolve_save_editor, original_save, adjusted_save):
+        assert evolve_save_editor.load_data_from_string(original_save)
+        evolve_save_editor.adjust_save_data()
+        assert evolve_save_editor.save_data_to_string() == adjusted_save
+
+    def test_load_data_from_string_fails_on_bad_data(self, evolve_save_editor):
+        assert not evolve_save_editor.load_data_from_string("not a save")
+
+    @pytest.mark.parametrize("args", [["-"], ["--stdin"], ["--stdin", "-"], ["--stdin", "--stdout"],
+                                      ["--stdout", "-"]])
+    def test_parse_args_reads_stdin(self, args):
+        parsed_args = evolvesaveeditor.parse_args(args)
+        assert parsed_args.filepaths == [evolvesaveeditor.STDIN_PATH]
+        assert parsed_args.stdin and parsed_args.stdout
+
+    @pytest.mark.parametrize("args", [[], ["--stdin", "save.txt"], ["-", "save.txt"], ["--stdout", "a.txt", "b.txt"]])
+    def test_parse_args_rejects_bad_stream_args(self, args):
+        with pytest.raises(SystemExit):
+            evolvesaveeditor.parse_args(args)
+
+    @pytest.mark.parametrize("args", [["-"], ["--stdin"]])
+    def test_main_edits_stdin_to_stdout(self, args, original_save, adjusted_save, monkeypatch, capsys):
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program"] + args)
+            mp.setattr(sys, 'stdin', io.StringIO(original_save + "\n"))
+            main()
+        output = capsys.readouterr()
+        assert output.out == adjusted_save
+        assert "OK: <stdin> (edited)" in output.err
+
+    def test_main_writes_save_file_to_stdout(self, original_save, adjusted_save, tmpdir, monkeypatch, capsys):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--stdout", "--lazy", "--profile", actual_file])
+            main()
+        output = capsys.readouterr()
+        assert output.out == adjusted_save
+        assert f"OK: {actual_file} (edited)" in output.err
+        assert "adjust_buildings" in output.err
+        assert filecmp.cmp(actual_file, os.path.join(test_data_dir, "startgame_original.txt"))
+
+    def test_main_writes_nothing_to_stdout_on_failure(self, monkeypatch, capsys):
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "-"])
+            mp.setattr(sys, 'stdin', io.StringIO("not a save"))
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+        assert exit_info.value.code == 1
+        output = capsys.readouterr()
+        assert output.out == ""
+        assert "FAILED: <stdin> (could not load save data)" in output.err
+
+    def test_pipeline_keeps_logging_out_of_stdout(self, original_save, adjusted_save):
+        completed = subprocess.run([sys.executable, "-m", "evolvesaveeditor", "--no-cache", "-"],
+                                   cwd=os.path.dirname(current_dir), input=original_save, capture_output=True,
+                                   text=True, check=True)
+        assert completed.stdout == adjusted_save
+        assert "could not determine species" in completed.stderr
+
+
+class TestEvolveSaveEditorBulk:
+    @pytest.fixture
+    def saves(self):
+        saves = {}
+        for name in ["startgame", "endgame"]:
+            with open(os.path.join(test_data_dir, f"{name}_original.txt")) as file:
+                saves[f"{name}_original"] = file.read()
+            ese = Ese()
+            ese.load_data_from_string(saves[f"{name}_original"])
+            ese.adjust_save_data()
+            saves[f"{name}_adjusted"] = ese.save_data_to_string()
+        return saves
+
+    @pytest.fixture
+    def bulk_lines(self, saves):
+        return [saves["startgame_original"], "not a save", saves["endgame_original"]] * 4
+
+    @staticmethod
+    def expected_lines(saves, lines):
+        edited = {saves["startgame_original"]: saves["startgame_adjusted"],
+                  saves["endgame_original"]: saves["endgame_adjusted"]}
+        return [edited.get(line, line) for line in lines]
+
+    def test_edit_exported_saves(self, saves):
+        outcomes = evolvesaveeditor.edit_exported_saves([saves["startgame_original"], "not a save"])
+        assert outcomes == [(saves["startgame_adjusted"], "edited"), (None, "could not load save data")]
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_edit_bulk_saves_keeps_order(self, saves, bulk_lines, jobs):
+        results = list(evolvesaveeditor.edit_bulk_saves((line + "\n" for line in bulk_lines), jobs=jobs, lazy=True))
+        assert [result.lz_string for result in results] == self.expected_lines(saves, bulk_lines)
+        assert [result.line_number for result in results] == list(range(1, len(bulk_lines) + 1))
+        assert [result.success for result in results] == [line != "not a save" for line in bulk_lines]
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_edit_bulk_saves_reads_a_bounded_number_of_lines_ahead(self, jobs):
+        lines_read = []
+
+        def lines():
+            for line_number in itertools.count(1):
+                lines_read.append(line_number)
+                yield "not a save"
+
+        results = evolvesaveeditor.edit_bulk_saves(lines(), jobs=jobs)
+        for _ in range(3 * evolvesaveeditor.BULK_CHUNK_SIZE):
+            next(results)
+        assert len(lines_read) <= (jobs * evolvesaveeditor.BULK_CHUNKS_PER_JOB + 3) * evolvesaveeditor.BULK_CHUNK_SIZE
+        results.close()
+
+    def test_dead_worker_fails_only_its_chunk(self):
+        future = MagicMock()
+        future.result.side_effect = RuntimeError("worker died")
+        chunk, outcomes = evolvesaveeditor._get_chunk_outcomes(["a", "b"], future)
+        assert chunk == ["a", "b"]
+        assert outcomes == [(None, "RuntimeError: worker died")] * 2
+
+    def test_main_edits_bulk_file(self, saves, bulk_lines, tmpdir, monkeypatch, capsys):
+        bulk_file = os.path.join(tmpdir, "saves.txt")
+        with open(bulk_file, "w") as file:
+            file.write("\n".join(bulk_lines) + "\n")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--bulk", bulk_file])
+            with pytest.raises(SystemExit) as exit_info:
+                main()
+        assert exit_info.value.code == 1
+        output = capsys.readouterr()
+        assert output.out.splitlines() == self.expected_lines(saves, bulk_lines)
+        assert f"FAILED: {bulk_file}:2 (could not load save data)" in output.err
+        assert "8 of 12 saves edited, 0 unchanged, 4 failed in " in output.err
+        assert "saves/s)" in output.err
+        with open(bulk_file) as file:
+            assert file.read().splitlines() == bulk_lines
+
+    def test_main_edits_bulk_stdin(self, saves, monkeypatch, capsys):
+        lines = [saves["endgame_original"], saves["startgame_original"]]
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--bulk", "-"])
+            mp.setattr(sys, 'stdin', io.StringIO("\n".join(lines)))
+            main()
+        output = capsys.readouterr()
+        assert output.out == saves["endgame_adjusted"] + "\n" + saves["startgame_adjusted"] + "\n"
+        assert "2 of 2 saves edited, 0 unchanged, 0 failed" in output.err
+
+    def test_main_counts_unchanged_bulk_saves(self, saves, monkeypatch, capsys):
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--bulk", "-"])
+            mp.setattr(sys, 'stdin', io.StringIO(saves["startgame_adjusted"] + "\n" + saves["startgame_original"]))
+            main()
+        assert "1 of 2 saves edited, 1 unchanged, 0 failed" in capsys.readouterr().err
+
+    def test_main_reports_missing_bulk_file(self, tmpdir, monkeypatch, capsys):
+        missing_file = os.path.join(tmpdir, "missing.txt")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--bulk", missing_file])
+            with pytest.raises(SystemExit):
+                main()
+        assert f"FAILED: {missing_file} (FileNotFoundError" in capsys.readouterr().err
+
+    @pytest.mark.parametrize("args", [["--bulk", "a.txt", "b.txt"], ["--bulk", "--profile", "a.txt"]])
+    def test_parse_args_rejects_bad_bulk_args(self, args):
+        with pytest.raises(SystemExit):
+            evolvesaveeditor.parse_args(args)
+
+
+class TestResultCache:
+    SETTINGS = {"version": "1", "stack_amount": 1000}
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        cache = evolvesaveeditor.ResultCache(str(tmp_path / "cache" / "results.sqlite3"))
+        yield cache
+        cache.close()
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        # the cache orders saves by when they were used, so every call gets a time later than its resolution
+        ticks = itertools.count(1)
+        monkeypatch.setattr(evolvesaveeditor.time, "time",
+                            lambda: next(ticks) * evolvesaveeditor.ResultCache.USED_RESOLUTION)
+
+    def test_get_missing_save(self, cache):
+        assert cache.get("save", self.SETTINGS) is None
+
+    def test_put_then_get(self, cache):
+        cache.put("save", self.SETTINGS, "edited save")
+        assert cache.get("save", self.SETTINGS) == "edited save"
+        assert cache.get("other save", self.SETTINGS) is None
+
+    def test_different_settings_miss(self, cache):
+        cache.put("save", self.SETTINGS, "edited save")
+        assert cache.get("save", dict(self.SETTINGS, stack_amount=2000)) is None
+
+    def test_evicts_least_recently_used(self, tmp_path, clock):
+        cache = evolvesaveeditor.ResultCache(str(tmp_path / "results.sqlite3"), max_bytes=100)
+        for name in ["a", "b", "c"]:
+            cache.put(name, self.SETTINGS, name * 30)
+        cache.get("a", self.SETTINGS)
+        cache.put("d", self.SETTINGS, "d" * 30)
+        assert [cache.get(name, self.SETTINGS) is not None for name in ["a", "b", "c", "d"]] == \
+            [True, False, True, True]
+        cache.close()
+
+    def test_get_records_use_once_per_resolution(self, cache, monkeypatch):
+        now = 1000000.0
+        monkeypatch.setattr(evolvesaveeditor.time, "time", lambda: now)
+        cache.put("save", self.SETTINGS, "edited save")
+        writes = cache._connection.total_changes
+        assert cache.get("save", self.SETTINGS) == "edited save"
+        now += evolvesaveeditor.ResultCache.USED_RESOLUTION - 1
+        assert cache.get("save", self.SETTINGS) == "edited save"
+        assert cache._connection.total_changes == writes
+        now += 1
+        assert cache.get("save", self.SETTINGS) == "edited save"
+        assert cache._connection.total_changes == writes + 1
+
+    def test_can_be_pickled_for_workers(self, cache):
+        cache.put("save", self.SETTINGS, "edited save")
+        copied = pickle.loads(pickle.dumps(cache))
+        assert copied.get("save", self.SETTINGS) == "edited save"
+        copied.close()
+
+    def test_unusable_cache_is_skipped(self, tmp_path):
+        path = tmp_path / "results.sqlite3"
+        path.write_text("not a database" * 100)
+        cache = evolvesaveeditor.ResultCache(str(path))
+        assert cache.get("save", self.SETTINGS) is None
+        cache.put("save", self.SETTINGS, "edited save")
+        assert cache.get("save", self.SETTINGS) is None
+
+    def test_settings_change_with_editor_defaults(self, monkeypatch):
+        settings = Ese().get_settings()
+        monkeypatch.setattr(Ese, "DEFAULT_STACK_AMOUNT", 5)
+        assert Ese().get_settings() != settings
+        assert settings["version"] == evolvesaveeditor._get_editor_version()
+
+    def test_edit_one_save_uses_cache(self, cache, tmpdir):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        expected_file = os.path.join(test_data_dir, "startgame_adjusted.txt")
+        messages = []
+        for _ in range(2):
+            copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+            result = evolvesaveeditor.edit_one_save(actual_file, cache=cache)
+            messages.append(result.message)
+            assert filecmp.cmp(actual_file, expected_file)
+        assert messages == ["edited", "edited from cache"]
+        assert "adjust_buildings" not in result.timings.as_dict()
+
+    def test_lazy_edits_are_cached_separately(self, cache, tmpdir):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        messages = []
+        for lazy in [False, True, True]:
+            copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+            messages.append(evolvesaveeditor.edit_one_save(actual_file, lazy=lazy, cache=cache).message)
+        assert messages == ["edited", "edited", "edited from cache"]
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_bulk_edits_use_cache(self, cache, jobs):
+        with open(os.path.join(test_data_dir, "startgame_original.txt")) as file:
+            lines = [file.read(), "not a save"] * 3
+        first = list(evolvesaveeditor.edit_bulk_saves(lines, jobs=jobs, cache=cache))
+        second = list(evolvesaveeditor.edit_bulk_saves(lines, jobs=jobs, cache=cache))
+        assert [result.lz_string for result in first] == [result.lz_string for result in second]
+        assert [result.message for result in second] == ["edited from cache", "could not load save data"] * 3
+
+    def test_main_uses_cache(self, result_cache_path, tmpdir, monkeypatch, capsys):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        for _ in range(2):
+            copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+            with monkeypatch.context() as mp:
+                mp.setattr(sys, 'argv', ["program", actual_file, "--cache"])
+                main()
+            assert filecmp.cmp(actual_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+        assert os.path.isfile(result_cache_path)
+        assert f"OK: {actual_file} (edited from cache)" in capsys.readouterr().out
+
+    def test_main_with_cache_options(self, result_cache_path, tmpdir, monkeypatch):
+        actual_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), actual_file)
+        cache_file = os.path.join(tmpdir, "other.sqlite3")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--cache", cache_file, "--cache-size", "1", actual_file])
+            main()
+            assert os.path.isfile(cache_file)
+            mp.setattr(sys, 'argv', ["program", "--no-cache", actual_file, "--cache"])
+            main()
+            mp.setattr(sys, 'argv', ["program", actual_file])
+            main()
+        assert not os.path.exists(result_cache_path)
+
+    def test_default_cache_path(self, monkeypatch):
+        monkeypatch.undo()
+        monkeypatch.delenv("LOCALAPPDATA", raising=False)
+        monkeypatch.setenv("XDG_CACHE_HOME", "/cache")
+        expected = os.path.join("/cache", "evolvesaveeditor", "results.sqlite3")
+        assert evolvesaveeditor.get_default_cache_path() == expected
+
+
+class TestParsedSaveCache:
+    @pytest.fixture
+    def save_file(self, tmpdir):
+        save_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), save_file)
+        return save_file
+
+    @staticmethod
+    def load(save_file, cache, nodes=None):
+        ese = Ese()
+        ese.parsed_save_cache = cache
+        assert ese.load_data_from_file(save_file, nodes)
+        return ese
+
+    def test_unchanged_file_is_not_parsed_again(self, save_file, monkeypatch):
+        cache = evolvesaveeditor.ParsedSaveCache()
+        expected = self.load(save_file, cache).save_data
+        monkeypatch.setattr(Ese, "decompress_lz_string", MagicMock(side_effect=AssertionError("decompressed")))
+        ese = self.load(save_file, cache)
+        assert ese.save_data == expected
+        assert "parse" not in ese.timings.as_dict()
+
+    def test_changed_file_is_parsed_again(self, save_file):
+        cache = evolvesaveeditor.ParsedSaveCache()
+        self.load(save_file, cache)
+        copyfile(os.path.join(test_data_dir, "endgame_original.txt"), save_file)
+        ese = self.load(save_file, cache)
+        assert "parse" in ese.timings.as_dict()
+        assert ese.save_data == Ese.parse_json(Ese.decompress_lz_string(ese.read_file(save_file)))
+        assert len(cache) == 2
+
+    def test_touched_file_is_parsed_again(self, save_file):
+        cache = evolvesaveeditor.ParsedSaveCache()
+        self.load(save_file, cache)
+        stat = os.stat(save_file)
+        os.utime(save_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert "parse" in self.load(save_file, cache).timings.as_dict()
+
+    def test_changing_save_data_does_not_change_cache(self, save_file):
+        cache = evolvesaveeditor.ParsedSaveCache()
+        ese = self.load(save_file, cache)
+        expected = copy.deepcopy(ese.save_data)
+        ese.save_data["resource"].clear()
+        ese.adjust_save_data()
+        assert self.load(save_file, cache).save_data == expected
+
+    def test_lazy_loads_are_cached_separately(self, save_file):
+        cache = evolvesaveeditor.ParsedSaveCache()
+        nodes = Ese.get_adjuster_nodes(["adjust_arpa_research"])
+        full = self.load(save_file, cache)
+        self.load(save_file, cache, nodes)
+        lazy = self.load(save_file, cache, nodes)
+        assert "parse" not in lazy.timings.as_dict()
+        assert list(lazy.save_data) == ["arpa"]
+        lazy.adjust_save_data(["adjust_arpa_research"])
+        full.adjust_save_data(["adjust_arpa_research"])
+        assert lazy.save_data_to_string() == full.save_data_to_string()
+
+    def test_evicts_least_recently_used(self):
+        entry_size = len(marshal.dumps(({"a": "x" * 100}, None)))
+        cache = evolvesaveeditor.ParsedSaveCache(max_bytes=entry_size * 2)
+        for key in ["a", "b"]:
+            cache.put(key, ({"a": "x" * 100}, None))
+        cache.get("a")
+        cache.put("c", ({"a": "x" * 100}, None))
+        assert [cache.get(key) is not None for key in ["a", "b", "c"]] == [True, False, True]
+        cache.put("d", ({"a": "x" * 1000}, None))
+        assert cache.get("d") is None
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_missing_file_is_not_cached(self, tmpdir):
+        cache = evolvesaveeditor.ParsedSaveCache()
+        key = cache.get_key(os.path.join(tmpdir, "missing.txt"), "save")
+        assert key is None
+        cache.put(key, ({}, None))
+        assert len(cache) == 0
+
+    def test_failed_load_is_not_cached(self, tmpdir):
+        broken_file = os.path.join(tmpdir, "broken.txt")
+        copyfile(os.path.join(test_data_dir, "broken_json.txt"), broken_file)
+        ese = Ese()
+        ese.parsed_save_cache = evolvesaveeditor.ParsedSaveCache()
+        assert not ese.load_data_from_file(broken_file)
+        assert len(ese.parsed_save_cache) == 0
+
+
+class TestEvolveSaveEditorNoOp:
+    @pytest.fixture
+    def adjusted_file(self, tmpdir):
+        adjusted_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_adjusted.txt"), adjusted_file)
+        return adjusted_file
+
+    @pytest.mark.parametrize(("changes", "expected_same"), [
+        ({"amount": 1000}, True),
+        ({"amount": 1000, "max": -1}, True),
+        ({"amount": 1000.0}, False),
+        ({"amount": 999}, False),
+        ({"crates": 0}, False),
+    ])
+    def test_copy_with_changes_ignores_equal_values(self, changes, expected_same):
+        node = json.loads('{"amount": 1000, "max": -1}')
+        updated = evolvesaveeditor._copy_with_changes(node, changes)
+        assert (updated is node) == expected_same
+        assert updated == dict(node, **changes)
+
+    @pytest.mark.parametrize(("file_name", "expected"), [
+        ("startgame_original.txt", True),
+        ("startgame_adjusted.txt", False),
+    ])
+    def test_adjust_save_data_reports_changes(self, evolve_save_editor, file_name, expected):
+        evolve_save_editor.load_data_from_file(os.path.join(test_data_dir, file_name))
+        assert evolve_save_editor.adjust_save_data() == expected
+        assert evolve_save_editor.changed == expected
+        assert (evolve_save_editor.get_patch() == []) != expected
+
+    def test_adjusted_generated_saves_are_unchanged(self):
+        for seed in range(5):
+            ese = Ese()
+            ese.load_data_from_string(evolvesavegenerator.export_save(evolvesavegenerator.generate_save(seed=seed)))
+            assert ese.adjust_save_data()
+            adjusted = Ese()
+            adjusted.load_data_from_string(ese.save_data_to_string())
+            assert not adjusted.adjust_save_data()
+
+    def test_unchanged_save_is_not_written(self, evolve_save_editor, adjusted_file, monkeypatch):
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        evolve_save_editor.adjust_save_data()
+        monkeypatch.setattr(Ese, "write_file", MagicMock(side_effect=AssertionError("written")))
+        monkeypatch.setattr(Ese, "compress_lz_string", MagicMock(side_effect=AssertionError("compressed")))
+        assert evolve_save_editor.save_data_to_file(adjusted_file)
+
+    def test_unchanged_save_is_copied_to_other_files(self, evolve_save_editor, adjusted_file, tmpdir):
+        other_file = os.path.join(tmpdir, "other.txt")
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        evolve_save_editor.adjust_save_data()
+        assert "serialize" not in evolve_save_editor.timings.as_dict()
+        assert evolve_save_editor.save_data_to_file(other_file)
+        assert filecmp.cmp(other_file, adjusted_file)
+
+    def test_assigned_save_data_is_changed(self, evolve_save_editor, adjusted_file):
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        evolve_save_editor.save_data = dict(evolve_save_editor.save_data, resource={})
+        assert evolve_save_editor.changed
+        assert evolve_save_editor.save_data_to_file(adjusted_file)
+        assert not filecmp.cmp(adjusted_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+
+    def test_save_data_edited_in_place_is_saved(self, evolve_save_editor, adjusted_file):
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        evolve_save_editor.save_data["resource"] = {}
+        assert evolve_save_editor.changed
+        assert evolve_save_editor.save_data_to_file(adjusted_file)
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        assert evolve_save_editor.save_data["resource"] == {}
+
+    def test_save_data_edited_in_place_before_adjusting_is_saved(self, evolve_save_editor, adjusted_file):
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        evolve_save_editor.save_data["seed"] = 424242
+        assert not evolve_save_editor.adjust_save_data()
+        assert evolve_save_editor.changed
+        assert evolve_save_editor.save_data_to_file(adjusted_file)
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        assert evolve_save_editor.save_data["seed"] == 424242
+
+    def test_save_data_edited_in_place_after_adjusting_is_saved(self, evolve_save_editor, adjusted_file):
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        evolve_save_editor.adjust_save_data()
+        evolve_save_editor.save_data["seed"] = 424242
+        assert evolve_save_editor.changed
+        assert "424242" in evolve_save_editor.save_data_to_json()
+
+    def test_save_data_assigned_before_adjusting_is_saved(self, evolve_save_editor, adjusted_file):
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        evolve_save_editor.save_data = dict(evolve_save_editor.save_data, resource={})
+        evolve_save_editor.adjust_save_data(())
+        assert evolve_save_editor.changed
+        assert evolve_save_editor.save_data_to_file(adjusted_file)
+        evolve_save_editor.load_data_from_file(adjusted_file)
+        assert evolve_save_editor.save_data["resource"] == {}
+
+    def test_edit_one_save_skips_unchanged_save(self, adjusted_file, monkeypatch):
+        monkeypatch.setattr(Ese, "write_file", MagicMock(side_effect=AssertionError("written")))
+        result = evolvesaveeditor.edit_one_save(adjusted_file)
+        assert result[:3] == (adjusted_file, True, "unchanged")
+        assert {"serialize", "compress", "write"}.isdisjoint(result.timings.as_dict())
+
+    def test_cached_unchanged_save_is_not_written(self, adjusted_file, tmp_path, monkeypatch):
+        cache = evolvesaveeditor.ResultCache(str(tmp_path / "results.sqlite3"))
+        assert evolvesaveeditor.edit_one_save(adjusted_file, cache=cache).message == "unchanged"
+        monkeypatch.setattr(Ese, "write_file", MagicMock(side_effect=AssertionError("written")))
+        assert evolvesaveeditor.edit_one_save(adjusted_file, cache=cache).message == "unchanged"
+        cache.close()
+
+    def test_main_reports_unchanged(self, adjusted_file, monkeypatch, capsys):
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", adjusted_file])
+            main()
+        output = capsys.readouterr().out
+        assert f"OK: {adjusted_file} (unchanged)" in output
+        assert "0 of 1 saves edited, 1 unchanged, 0 failed" in output
+        assert filecmp.cmp(adjusted_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+
+    def test_unchanged_save_still_written_to_stdout(self, adjusted_file, monkeypatch, capsys):
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--stdout", adjusted_file])
+            main()
+        output = capsys.readouterr()
+        with open(adjusted_file) as file:
+            assert output.out == file.read()
+        assert "(unchanged)" in output.err
+
+    def test_bulk_reports_unchanged(self):
+        with open(os.path.join(test_data_dir, "startgame_adjusted.txt")) as file:
+            adjusted = file.read()
+        results = list(evolvesaveeditor.edit_bulk_saves([adjusted]))
+        assert results == [evolvesaveeditor.BulkResult(1, adjusted, True, "unchanged")]
+
+
+class TestJsonPatch:
+    @pytest.fixture
+    def generated_saves(self):
+        return [evolvesavegenerator.export_save(evolvesavegenerator.generate_save(seed=seed)) for seed in range(3)]
+
+    @pytest.fixture
+    def patch_file(self, tmpdir):
+        # the patch of editing startgame_original.txt
+        ese = Ese()
+        ese.load_data_from_file(os.path.join(test_data_dir, "startgame_original.txt"))
+        ese.adjust_save_data()
+        patch_file = os.path.join(tmpdir, "patch.json")
+        with open(patch_file, "w") as file:
+            json.dump(ese.get_patch(), file)
+        return patch_file
+
+    @pytest.fixture
+    def original_file(self, tmpdir):
+        original_file = os.path.join(tmpdir, "save.txt")
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), original_file)
+        return original_file
+
+    def test_patch_reproduces_edit(self, generated_saves):
+        for lz_string in generated_saves:
+            ese = Ese()
+            ese.load_data_from_string(lz_string)
+            ese.adjust_save_data()
+            patched = Ese()
+            patched.load_data_from_string(lz_string)
+            assert patched.patch_save_data(ese.get_patch())
+            assert patched.save_data == ese.save_data
+            assert patched.save_data_to_string() == ese.save_data_to_string()
+
+    def test_patch_applies_to_only_the_nodes_it_needs(self, generated_saves):
+        ese = Ese()
+        ese.load_data_from_string(generated_saves[0])
+        ese.adjust_save_data()
+        patch = ese.get_patch()
+        patched = Ese()
+        patched.load_data_from_string(generated_saves[0], Ese.get_patch_nodes(patch))
+        assert "seed" not in patched.save_data
+        patched.patch_save_data(patch)
+        assert patched.save_data_to_string() == ese.save_data_to_string()
+
+    def test_get_patch_is_empty_when_unchanged(self, evolve_save_editor):
+        evolve_save_editor.load_data_from_file(os.path.join(test_data_dir, "startgame_adjusted.txt"))
+        evolve_save_editor.adjust_save_data()
+        assert evolve_save_editor.get_patch() == []
+
+    def test_make_patch_only_looks_at_copied_nodes(self):
+        shared = MagicMock()
+        original = {"resource": {"Food": {"amount": 1}}, "city": shared}
+        adjusted = {"resource": {"Food": {"amount": 2, "max": 5}}, "city": shared}
+        assert Ese.make_patch(original, adjusted) == [{"op": "replace", "path": "/resource/Food/amount", "value": 2},
+                                                      {"op": "add", "path": "/resource/Food/max", "value": 5}]
+        shared.__eq__.assert_not_called()
+
+    @pytest.mark.parametrize("original,adjusted,expected", [
+        ({"a": 1, "b": 2}, {"a": 1}, [{"op": "remove", "path": "/b"}]),
+        ({"a": 1000}, {"a": 1000.0}, [{"op": "replace", "path": "/a", "value": 1000.0}]),
+        ({"a": [1, 2]}, {"a": [1, 3]}, [{"op": "replace", "path": "/a", "value": [1, 3]}]),
+        ({"a/b": {"c~d": 1}}, {"a/b": {"c~d": 2}}, [{"op": "replace", "path": "/a~1b/c~0d", "value": 2}]),
+        ({"a": 1}, {"a": 1}, []),
+    ])
+    def test_make_patch(self, original, adjusted, expected):
+        assert Ese.make_patch(original, adjusted) == expected
+        assert Ese.apply_patch(original, expected) == adjusted
+
+    @pytest.mark.parametrize("patch,expected", [
+        ([{"op": "add", "path": "/b/x", "value": 1}], {"a": [1, 2], "b": {"c": 3, "x": 1}}),
+        ([{"op": "add", "path": "/a/0", "value": 0}], {"a": [0, 1, 2], "b": {"c": 3}}),
+        ([{"op": "add", "path": "/a/-", "value": 3}], {"a": [1, 2, 3], "b": {"c": 3}}),
+        ([{"op": "remove", "path": "/a/1"}], {"a": [1], "b": {"c": 3}}),
+        ([{"op": "replace", "path": "/b/c", "value": 4}], {"a": [1, 2], "b": {"c": 4}}),
+        ([{"op": "move", "from": "/b/c", "path": "/a/0"}], {"a": [3, 1, 2], "b": {}}),
+        ([{"op": "copy", "from": "/b", "path": "/d"}, {"op": "replace", "path": "/d/c", "value": 5}],
+         {"a": [1, 2], "b": {"c": 3}, "d": {"c": 5}}),
+        ([{"op": "test", "path": "/b/c", "value": 3}], {"a": [1, 2], "b": {"c": 3}}),
+        ([{"op": "replace", "path": "", "value": {}}], {}),
+    ])
+    def test_apply_patch_operations(self, patch, expected):
+        save_data = {"a": [1, 2], "b": {"c": 3}}
+        assert Ese.apply_patch(save_data, patch) == expected
+        assert save_data == {"a": [1, 2], "b": {"c": 3}}
+
+    @pytest.mark.parametrize("patch", [
+        [{"op": "replace", "path": "/missing", "value": 1}],
+        [{"op": "remove", "path": "/a/2"}],
+        [{"op": "add", "path": "/a/01", "value": 1}],
+        [{"op": "add", "path": "/b/c/d", "value": 1}],
+        [{"op": "test", "path": "/b/c", "value": 4}],
+        [{"op": "test", "path": "/b/c", "value": True}],
+        [{"op": "move", "from": "/b", "path": "/b/d"}],
+        [{"op": "remove", "path": ""}],
+        [{"op": "merge", "path": "/b"}],
+        [{"op": "add", "path": "b", "value": 1}],
+        [{"op": "add", "path": "/b/d"}],
+    ])
+    def test_apply_patch_rejects_what_it_cant_apply(self, patch):
+        with pytest.raises(ValueError):
+            Ese.apply_patch({"a": [1, 2], "b": {"c": 3}}, patch)
+
+    def test_apply_patch_copies_each_node_once(self):
+        save_data = {"resource": {"Food": {"amount": 1}, "Lumber": {"amount": 1}}, "city": {}}
+        patched = Ese.apply_patch(save_data, [{"op": "replace", "path": "/resource/Food/amount", "value": 2},
+                                              {"op": "replace", "path": "/resource/Lumber/amount", "value": 2}])
+        assert patched == {"resource": {"Food": {"amount": 2}, "Lumber": {"amount": 2}}, "city": {}}
+        assert patched["city"] is save_data["city"]
+
+    def test_apply_patch_that_changes_nothing_returns_save_data(self):
+        save_data = {"a": {"b": 1}}
+        assert Ese.apply_patch(save_data, [{"op": "replace", "path": "/a/b", "value": 1},
+                                           {"op": "add", "path": "/a/b", "value": 1}]) is save_data
+
+    def test_get_patch_nodes(self):
+        assert Ese.get_patch_nodes([{"op": "replace", "path": "/resource/Food", "value": 1},
+                                    {"op": "move", "from": "/city/farm", "path": "/space/farm"}]) == \
+            frozenset(["resource", "city", "space"])
+        assert Ese.get_patch_nodes([{"op": "replace", "path": "", "value": {}}]) is None
+
+    def test_main_emits_patch(self, original_file, tmpdir, monkeypatch):
+        patch_file = os.path.join(tmpdir, "edit.json")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", "--emit-patch", patch_file, original_file])
+            main()
+        assert filecmp.cmp(original_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+        original = Ese()
+        original.load_data_from_file(os.path.join(test_data_dir, "startgame_original.txt"))
+        adjusted = Ese()
+        adjusted.load_data_from_file(original_file)
+        with open(patch_file) as file:
+            assert Ese.apply_patch(original.save_data, json.load(file)) == adjusted.save_data
+
+    def test_emit_patch_needs_one_save(self, tmpdir):
+        with pytest.raises(SystemExit):
+            evolvesaveeditor.parse_args(["--emit-patch", os.path.join(tmpdir, "edit.json"), "a.txt", "b.txt"])
+
+    @pytest.mark.parametrize("jobs", ["1", "2"])
+    def test_main_applies_patch(self, patch_file, tmpdir, jobs, monkeypatch):
+        save_files = []
+        for name in ["a.txt", "b.txt"]:
+            save_files.append(os.path.join(tmpdir, name))
+            copyfile(os.path.join(test_data_dir, "startgame_original.txt"), save_files[-1])
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", evolvesaveeditor.APPLY_PATCH_COMMAND, patch_file, "--jobs", jobs,
+                                     *save_files])
+            main()
+        for save_file in save_files:
+            assert filecmp.cmp(save_file, os.path.join(test_data_dir, "startgame_adjusted.txt"))
+
+    def test_main_applies_patch_in_bulk(self, patch_file, tmpdir, monkeypatch, capsys):
+        with open(os.path.join(test_data_dir, "startgame_original.txt")) as file:
+            original = file.read()
+        with open(os.path.join(test_data_dir, "startgame_adjusted.txt")) as file:
+            adjusted = file.read()
+        bulk_file = os.path.join(tmpdir, "saves.txt")
+        with open(bulk_file, "w") as file:
+            file.write(f"{original}\n{adjusted}\n")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", evolvesaveeditor.APPLY_PATCH_COMMAND, patch_file, "--bulk", bulk_file])
+            main()
+        assert capsys.readouterr().out == f"{adjusted}\n{adjusted}\n"
+
+    def test_apply_patch_reports_saves_it_does_not_fit(self, patch_file, tmpdir, monkeypatch, capsys):
+        save_file = os.path.join(tmpdir, "save.txt")
+        lz_string = evolvesavegenerator.export_save({"seed": 1, "resource": {}})
+        with open(save_file, "w") as file:
+            file.write(lz_string)
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", evolvesaveeditor.APPLY_PATCH_COMMAND, patch_file, save_file])
+            with pytest.raises(SystemExit):
+                main()
+        assert f"FAILED: {save_file} (ValueError: could not" in capsys.readouterr().out
+        with open(save_file) as file:
+            assert file.read() == lz_string
+
+    def test_apply_patch_caches_by_patch(self, patch_file, original_file):
+        cache = evolvesaveeditor.ResultCache(evolvesaveeditor.get_default_cache_path())
+        patch = evolvesaveeditor.load_patch_file(patch_file)
+        assert evolvesaveeditor.edit_one_save(original_file, cache=cache, patch=patch).message == "edited"
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), original_file)
+        assert evolvesaveeditor.edit_one_save(original_file, cache=cache, patch=patch).message == "edited from cache"
+        copyfile(os.path.join(test_data_dir, "startgame_original.txt"), original_file)
+        assert evolvesaveeditor.edit_one_save(original_file, cache=cache, patch=patch[:1]).message == "edited"
+        cache.close()
+
+    @pytest.mark.parametrize("contents", ["not json", "{}", '[{"op": "merge", "path": "/a"}]', '[{"op": "add"}]',
+                                          '[{"op": "move", "path": "/a"}]', '[{"op": "copy", "path": "/a", "from": 1}]',
+                                          '[{"op": "add", "path": "/a"}]', '[{"op": "replace", "path": "/a"}]',
+                                          '[{"op": "test", "path": "/a"}]'])
+    def test_apply_patch_rejects_bad_patch_files(self, contents, tmpdir):
+        patch_file = os.path.join(tmpdir, "patch.json")
+        with open(patch_file, "w") as file:
+            file.write(contents)
+        with pytest.raises(SystemExit):
+            evolvesaveeditor.parse_args([evolvesaveeditor.APPLY_PATCH_COMMAND, patch_file, "save.txt"])
+
+    def test_load_patch_file_accepts_every_operation(self, tmpdir):
+        patch = [{"op": "add", "path": "/a", "value": None}, {"op": "remove", "path": "/a"},
+                 {"op": "replace", "path": "/b", "value": 1}, {"op": "move", "path": "/c", "from": "/b"},
+                 {"op": "copy", "path": "/d", "from": "/c"}, {"op": "test", "path": "/d", "value": 1}]
+        patch_file = os.path.join(tmpdir, "patch.json")
+        with open(patch_file, "w") as file:
+            json.dump(patch, file)
+        assert evolvesaveeditor.load_patch_file(patch_file) == patch
+
+
+class TestSaveHashIndex:
+    OLD = {"resource": {"Food": {"amount": 1, "max": 10}, "Lumber": {"amount": 5}}, "city": {"farm": {"count": 2}},
+           "arpa": {"lhc": {"rank": 1}}, "queue": [1, 2], "seed": 3}
+    NEW = {"resource": {"Food": {"amount": 2, "max": 10}, "Lumber": {"amount": 5}}, "city": {"farm": {"count": 2}},
+           "queue": [1, 2, 3], "seed": 3, "stats": {"reset": 1}}
+    EXPECTED = [(("resource", "Food", "amount"), 1, 2), (("arpa",), {"lhc": {"rank": 1}}, evolvesaveeditor.MISSING),
+                (("queue", 2), evolvesaveeditor.MISSING, 3), (("stats",), evolvesaveeditor.MISSING, {"reset": 1})]
+
+    @staticmethod
+    def index_of_json(save_data):
+        return evolvesaveeditor.SaveHashIndex(*Ese.parse_save_nodes(json.dumps(save_data), ()))
+
+    @pytest.mark.parametrize("make_old,make_new", [
+        (evolvesaveeditor.SaveHashIndex, evolvesaveeditor.SaveHashIndex),
+        ("index_of_json", "index_of_json"),
+        ("index_of_json", evolvesaveeditor.SaveHashIndex),
+        (evolvesaveeditor.SaveHashIndex, "index_of_json"),
+    ])
+    def test_diff(self, make_old, make_new):
+        make_old, make_new = (getattr(self, make) if isinstance(make, str) else make for make in (make_old, make_new))
+        assert make_old(self.OLD).diff(make_new(self.NEW)) == self.EXPECTED
+
+    def test_diff_of_same_save_is_empty(self):
+        assert self.index_of_json(self.OLD).diff(self.index_of_json(self.OLD)) == []
+        assert evolvesaveeditor.SaveHashIndex(self.OLD).diff(self.index_of_json(self.OLD)) == []
+
+    def test_diff_only_descends_into_nodes_that_differ(self, monkeypatch):
+        parse_json = MagicMock(side_effect=Ese.parse_json)
+        monkeypatch.setattr(Ese, "parse_json", parse_json)
+        big_node = {f"building_{number}": {"count": number} for number in range(500)}
+        old = self.index_of_json({"city": big_node, "space": big_node})
+        new = self.index_of_json({"city": dict(big_node, building_7={"count": 8}), "space": big_node})
+        assert old.diff(new) == [(("city", "building_7", "count"), 7, 8)]
+        assert [call.args[0] for call in parse_json.call_args_list] == ['{"count": 7}', '{"count": 8}']
+
+    def test_diff_handles_brackets_in_strings(self):
+        old = {"city": {"name": "{[", "farm": {"count": 1}, **{f"b{number}": number for number in range(300)}}}
+        new = copy.deepcopy(old)
+        new["city"]["farm"]["count"] = 2
+        assert self.index_of_json(old).diff(self.index_of_json(new)) == [(("city", "farm", "count"), 1, 2)]
+
+    @pytest.mark.parametrize("path", [(), ("city",)])
+    def test_diff_handles_unbalanced_brackets_in_strings(self, path):
+        padding = {f"b{number}": number for number in range(300)}
+        old = {"x": {"a": "{", **padding}, "z": {"b": "}", **padding}, "seed": 1}
+        new = copy.deepcopy(old)
+        new["x"]["b7"] = 8
+        new["seed"] = 2
+        for key in reversed(path):
+            old, new = {key: old, "queue": []}, {key: new, "queue": []}
+        assert self.index_of_json(old).diff(self.index_of_json(new)) == [(path + ("x", "b7"), 7, 8),
+                                                                         (path + ("seed",), 1, 2)]
+
+    def test_diff_save_files_handles_unbalanced_brackets_in_strings(self, tmpdir):
+        old = {"x": {"a": "{"}, "z": {"b": "}"}, "seed": 1}
+        filepaths = []
+        for name, save_data in (("old.txt", old), ("new.txt", dict(old, x={"a": "{", "c": 2}, seed=2))):
+            filepaths.append(os.path.join(tmpdir, name))
+            with open(filepaths[-1], "w") as file:
+                file.write(Ese.compress_lz_string(json.dumps(save_data)))
+        output = io.StringIO()
+        assert evolvesaveeditor.diff_save_files(*filepaths, file=output)
+        assert output.getvalue().splitlines()[:2] == ["x.c: (missing) -> 2", "seed: 1 -> 2"]
+
+    @pytest.mark.parametrize("old,new", [(1, 1.0), (1, True), ("1", 1), ([1], {"0": 1}), (None, 0)])
+    def test_diff_tells_types_apart(self, old, new):
+        assert self.index_of_json({"a": {"b": old}}).diff(self.index_of_json({"a": {"b": new}})) == \
+            [(("a", "b"), old, new)]
+
+    def test_get_digest(self):
+        index = evolvesaveeditor.SaveHashIndex(self.OLD)
+        assert index.get_digest(self.OLD["resource"]) == index.get_digest(copy.deepcopy(self.OLD["resource"]))
+        assert index.get_digest({"a": 1}) != index.get_digest({"a": 1.0})
+        assert index.get_digest({"a": [1]}) != index.get_digest({"a": {"0": 1}})
+        assert index.get_digest({"a": 1, "b": 2}) != index.get_digest({"a": 2, "b": 1})
+
+    def test_editor_index_matches_lazy_load(self, end_game_json):
+        lz_string = evolvesavegenerator.export_save(end_game_json)
+        ese = Ese()
+        ese.load_data_from_string(lz_string, Ese.get_adjuster_nodes())
+        original = ese.get_hash_index()
+        ese.adjust_save_data()
+        full = Ese()
+        full.load_data_from_string(lz_string)
+        full.adjust_save_data()
+        assert original.diff(ese.get_hash_index()) == evolvesaveeditor.SaveHashIndex(end_game_json).diff(
+            full.get_hash_index())
+
+    def test_format_save_change(self):
+        assert evolvesaveeditor.format_save_change(evolvesaveeditor.SaveChange(("resource", "Food", "amount"),
+                                                                               1, 2.5)) == \
+            "resource.Food.amount: 1 -> 2.5"
+        assert evolvesaveeditor.format_save_change(evolvesaveeditor.SaveChange(("queue", 0), evolvesaveeditor.MISSING,
+                                                                               {"a": "b"})) == \
+            'queue.0: (missing) -> {"a": "b"}'
+
+    def test_main_diffs_saves(self, monkeypatch, capsys):
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", evolvesaveeditor.DIFF_COMMAND,
+                                     os.path.join(test_data_dir, "startgame_original.txt"),
+                                     os.path.join(test_data_dir, "startgame_adjusted.txt")])
+            main()
+        lines = capsys.readouterr().out.splitlines()
+        assert "resource.RNA.amount: 0 -> 100" in lines
+        assert lines[-1].startswith(f"{len(lines) - 1} values differ between ")
+
+    def test_main_fails_on_save_it_cant_load(self, monkeypatch, capsys):
+        broken_file = os.path.join(test_data_dir, "broken_json.txt")
+        with monkeypatch.context() as mp:
+            mp.setattr(sys, 'argv', ["program", evolvesaveeditor.DIFF_COMMAND, broken_file,
+                                     os.path.join(test_data_dir, "startgame_adjusted.txt")])
+            with pytest.raises(SystemExit):
+                main()
+        assert f"FAILED: {broken_file} (could not load save data)" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("args", [[], ["a.txt"], ["a.txt", "b.txt", "c.txt"]])
+    def test_diff_needs_two_saves(self, args):
+        with pytest.raises(SystemExit):
+            evolvesaveeditor.parse_args([evolvesaveeditor.DIFF_COMMAND, *args])
+
+
+class TestEvolveSaveEditorThreads:
+    THREADS = 8
+
+    @pytest.fixture
+    def exports(self):
+        exports = [evolvesavegenerator.export_save(evolvesavegenerator.generate_save(seed=seed)) for seed in range(3)]
+        for name in ["startgame_original.txt", "endgame_original.txt", "startgame_adjusted.txt"]:
+            with open(os.path.join(test_data_dir, name)) as file:
+                exports.append(file.read())
+        return exports
+
+    @pytest.fixture(autouse=True)
+    def switch_often(self):
+        # switch threads far more often than usual, so any shared state gets used by several at once
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        yield
+        sys.setswitchinterval(interval)
+
+    @staticmethod
+    def edit_export(lz_string, lazy):
+        ese = Ese()
+        ese.load_data_from_string(lz_string, Ese.get_adjuster_nodes() if lazy else None)
+        ese.adjust_save_data()
+        return ese.save_data_to_string()
+
+    def test_editors_in_threads_match_sequential_edits(self, exports):
+        import concurrent.futures
+        tasks = [(lz_string, lazy) for lz_string in exports for lazy in (False, True)] * 2
+        expected = [self.edit_export(*task) for task in tasks]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            assert list(executor.map(lambda task: self.edit_export(*task), tasks)) == expected
+
+    def test_editors_in_threads_share_loaded_save_data(self, exports):
+        import concurrent.futures
+        loaded = Ese()
+        loaded.load_data_from_string(exports[0])
+        before = copy.deepcopy(loaded.save_data)
+
+        def adjust(adjusters):
+            ese = Ese()
+            ese.save_data = loaded.save_data
+            ese.adjust_save_data(adjusters)
+            return ese.save_data
+
+        adjuster_sets = [Ese.ADJUSTERS[:count] for count in range(1, len(Ese.ADJUSTERS) + 1)] * 6
+        expected = [adjust(adjusters) for adjusters in adjuster_sets]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            assert list(executor.map(adjust, adjuster_sets)) == expected
+        assert loaded.save_data == before
+
+    def test_edit_one_save_in_threads_with_shared_caches(self, exports, tmpdir, monkeypatch):
+        import concurrent.futures
+        monkeypatch.setattr(Ese, "parsed_save_cache", evolvesaveeditor.ParsedSaveCache(max_bytes=256 * 1024))
+        cache = evolvesaveeditor.ResultCache(os.path.join(tmpdir, "results.sqlite3"))
+        saves = {os.path.join(tmpdir, f"save_{number}.txt"): lz_string for number, lz_string in enumerate(exports * 3)}
+        expected = {lz_string: self.edit_export(lz_string, False) for lz_string in exports}
+
+        def edit(filepath):
+            with open(filepath, "w") as file:
+                file.write(saves[filepath])
+            result = evolvesaveeditor.edit_one_save(filepath, cache=cache)
+            with open(filepath) as file:
+                return result.success, file.read()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            # twice over, the second time round every save comes from the result cache
+            for _ in range(2):
+                assert list(executor.map(edit, saves)) == [(True, expected[lz_string]) for lz_string in saves.values()]
+        assert not cache._failed
+        cache.close()
+
+    def test_get_logger_configures_logger_once(self, monkeypatch):
+        import concurrent.futures
+        import logging
+        logger = logging.getLogger("evolvesaveeditor.py")
+        monkeypatch.setattr(evolvesaveeditor, "_CONFIGURED_LOGGERS", set())
+        monkeypatch.setattr(logger, "handlers", [])
+        monkeypatch.setattr(logger, "propagate", False)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            assert set(executor.map(lambda _: evolvesaveeditor.get_logger(), range(100))) == {logger}
+        assert len(logger.handlers) == 1
+
+    def test_result_cache_pickles_without_its_connection(self, tmpdir):
+        cache = evolvesaveeditor.ResultCache(os.path.join(tmpdir, "results.sqlite3"))
+        cache.put("save", {}, "edited")
+        copied = pickle.loads(pickle.dumps(cache))
+        assert copied.get("save", {}) == "edited"
+        copied.close()
+        cache.close()
+
+
+class TestStartup:
+    # how long a cold start takes is timed against its budget by benchmarks/benchmark_startup.py, not here
+    OPTIONAL_MODULES = ["argparse", "logging", "concurrent.futures", "multiprocessing", "lzstring", "orjson",
+                        "cProfile", "glob"]
+
+    @pytest.fixture
+    def environment(self, tmpdir):
+        # write bytecode like an installed copy would, so the module isn't recompiled on every start
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=str(tmpdir.join("pycache")))
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        return env
+
+    def test_plain_paths_parsed_like_argparse_defaults(self):
+        assert vars(evolvesaveeditor.parse_args(["save.txt", "other.txt"])) == \
+            vars(evolvesaveeditor.parse_args(["--jobs", "1", "save.txt", "other.txt"]))
+
+    def test_plain_paths_skip_optional_imports(self, environment):
+        code = "import sys, evolvesaveeditor; evolvesaveeditor.parse_args(['save.txt']); " \
+               f"print(','.join(name for name in {self.OPTIONAL_MODULES!r} if name in sys.modules))"
+        completed = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(current_dir), env=environment,
+                                   capture_output=True, text=True, check=True)
+        assert completed.stdout.strip() == ""
+
+
 class TestEvolveSaveEditorOverall:
     def test_main(self, tmpdir, monkeypatch):
         actual_file = os.path.join(tmpdir, "startgame_final.txt")
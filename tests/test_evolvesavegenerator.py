@@ -0,0 +1,135 @@
+# Tests for evolvesavegenerator.py
+# run from evolvesaveeditor dir as:
+#    python -m pytest tests/test_evolvesavegenerator.py
+
+import json
+import sys
+
+import lzstring
+import pytest
+
+import evolvesavegenerator
+from evolvesaveeditor import BuildingCensus
+from evolvesaveeditor import EvolveSaveEditor as Ese
+from evolvesavegenerator import generate_save, export_save
+
+
+class TestGenerateSave:
+    def test_same_seed_same_save(self):
+        assert generate_save(seed=42) == generate_save(seed=42)
+
+    def test_different_seed_different_save(self):
+        assert generate_save(seed=1) != generate_save(seed=2)
+
+    def test_default_size(self):
+        save_data = generate_save()
+        assert len(save_data["resource"]) == evolvesavegenerator.DEFAULT_RESOURCES
+        for zone, count in evolvesavegenerator.DEFAULT_BUILDINGS.items():
+            assert len(BuildingCensus(save_data).counts[zone]) == count
+        assert len([name for name in save_data["arpa"] if name != "m_type"]) == \
+            evolvesavegenerator.DEFAULT_ARPA_PROJECTS
+
+    @pytest.mark.parametrize("resources,buildings,arpa_projects,jobs", [
+        (0, {"city": 0, "space": 0, "interstellar": 0, "portal": 0}, 0, 0),
+        (5, {"city": 3, "space": 2, "interstellar": 1, "portal": 1}, 2, 3),
+        (500, {"city": 400, "space": 300, "interstellar": 200, "portal": 100}, 60, 50),
+    ])
+    def test_configured_size(self, resources, buildings, arpa_projects, jobs):
+        save_data = generate_save(resources, buildings, arpa_projects, jobs)
+        assert len(save_data["resource"]) == resources
+        census = BuildingCensus(save_data)
+        for zone, count in buildings.items():
+            assert len(census.counts[zone]) == count
+        assert len([name for name in save_data["arpa"] if name != "m_type"]) == arpa_projects
+        assert len([name for name, job in save_data["civic"].items()
+                    if isinstance(job, dict) and "job" in job]) == jobs
+
+    def test_species_resource_first(self):
+        save_data = generate_save()
+        assert next(iter(save_data["resource"])) == save_data["race"]["species"]
+
+    def test_real_names_used_first(self):
+        save_data = generate_save(buildings={"portal": 8})
+        assert list(save_data["portal"]) == list(evolvesavegenerator.ZONE_BUILDINGS["portal"]) + \
+            ["turret_2", "carport_2"]
+
+    def test_every_building_type_in_a_zone(self):
+        zone_buildings = {name for names in evolvesavegenerator.ZONE_BUILDINGS.values() for name in names}
+        assert zone_buildings == set(Ese.BUILDING_CATEGORIES)
+
+    def test_special_buildings_not_complete(self):
+        for seed in range(20):
+            space = generate_save(seed=seed)["space"]
+            assert space["world_collider"]["count"] < 1859
+            assert space["swarm_satellite"]["count"] <= max(1, 18 * space["swarm_control"]["count"])
+
+    def test_save_is_json(self):
+        save_data = generate_save()
+        assert json.loads(json.dumps(save_data)) == save_data
+
+
+class TestExportSave:
+    def test_export_save_round_trips(self):
+        save_data = generate_save()
+        assert json.loads(Ese.decompress_lz_string(export_save(save_data))) == save_data
+
+    def test_export_save_matches_lzstring(self):
+        save_data = generate_save(resources=10, buildings={"city": 10, "space": 5, "interstellar": 5, "portal": 2})
+        expected = lzstring.LZString().compressToBase64(json.dumps(save_data, separators=(',', ':')))
+        assert export_save(save_data) == expected
+
+
+class TestEditGeneratedSave:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_adjust_save_data(self, seed):
+        save_data = generate_save(seed=seed)
+        ese = Ese()
+        ese.save_data = save_data
+        ese.adjust_save_data()
+        adjusted = ese.save_data
+        species = save_data["race"]["species"]
+        assert adjusted["resource"][species]["amount"] >= save_data["resource"][species]["amount"]
+        assert adjusted["civic"]["garrison"]["workers"] >= save_data["civic"]["garrison"]["workers"]
+        for research_name, research in adjusted["arpa"].items():
+            if research_name not in ("sequence", "launch_facility", "m_type"):
+                assert research["complete"] == 99
+
+    def test_adjust_save_data_scaled_up(self):
+        save_data = generate_save(resources=400, buildings={"city": 450, "space": 370, "interstellar": 200,
+                                                            "portal": 60}, arpa_projects=50, jobs=140)
+        ese = Ese()
+        ese.save_data = save_data
+        ese.adjust_save_data()
+        # the numbered copies aren't buildings the editor knows, so only the real ones change
+        assert ese.save_data["city"]["farm_2"] == save_data["city"]["farm_2"]
+        for name, count in BuildingCensus(ese.save_data).counts["city"].items():
+            if name in Ese.BUILDING_CATEGORIES and save_data["city"][name]["count"] > 0:
+                assert count >= 100
+
+    def test_edit_generated_save_file(self, tmp_path):
+        save_path = tmp_path / "save.txt"
+        save_path.write_text(export_save(generate_save()))
+        ese = Ese()
+        assert ese.load_data_from_file(str(save_path))
+        ese.adjust_save_data()
+        assert ese.save_data_to_file(str(save_path))
+        assert json.loads(Ese.decompress_lz_string(save_path.read_text())) == ese.save_data
+
+
+class TestMain:
+    def test_main_writes_lz_save(self, tmp_path, monkeypatch):
+        output_path = tmp_path / "save.txt"
+        monkeypatch.setattr(sys, "argv", ["evolvesavegenerator.py", "--seed", "3", "--city", "5", "-o",
+                                          str(output_path)])
+        evolvesavegenerator.main()
+        expected = generate_save(buildings={"city": 5}, seed=3)
+        assert json.loads(Ese.decompress_lz_string(output_path.read_text())) == expected
+
+    def test_main_writes_json_to_stdout(self, capsys, monkeypatch):
+        monkeypatch.setattr(sys, "argv", ["evolvesavegenerator.py", "--format", "json", "--resources", "3"])
+        evolvesavegenerator.main()
+        assert json.loads(capsys.readouterr().out) == generate_save(resources=3)
+
+    def test_negative_count_rejected(self):
+        with pytest.raises(SystemExit):
+            evolvesavegenerator.parse_args(["--space", "-1"])